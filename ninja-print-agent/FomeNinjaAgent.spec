@@ -3,7 +3,7 @@ from PyInstaller.utils.hooks import collect_all
 
 datas = [('../public/logo-fome-ninja.png', '.'), ('mensagens_reserva.json', '.')]
 binaries = []
-hiddenimports = ['flask', 'flask_cors', 'win32print', 'win32ui', 'win32con', 'dotenv', 'pyautogui']
+hiddenimports = ['flask', 'flask_cors', 'waitress', 'win32print', 'win32ui', 'win32con', 'win32event', 'win32api', 'winerror', 'dotenv']
 tmp_ret = collect_all('pystray')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 tmp_ret = collect_all('PIL')
@@ -20,7 +20,7 @@ if exist "%VENV_PYTHON%" (
 )
 
 echo 1. Verificando/Instalando dependencias...
-%PY_CMD% -m pip install pyinstaller flask flask-cors pywin32 pystray pyautogui playwright python-dotenv pillow --quiet
+%PY_CMD% -m pip install pyinstaller flask flask-cors waitress pywin32 pystray playwright python-dotenv pillow --quiet
 
 echo 2. Preparando Playwright...
 %PY_CMD% -m playwright install chromium
@@ -38,11 +38,14 @@ echo.
     --collect-all playwright ^
     --hidden-import flask ^
     --hidden-import flask_cors ^
+    --hidden-import waitress ^
     --hidden-import win32print ^
     --hidden-import win32ui ^
     --hidden-import win32con ^
+    --hidden-import win32event ^
+    --hidden-import win32api ^
+    --hidden-import winerror ^
     --hidden-import dotenv ^
-    --hidden-import pyautogui ^
     agent.py
 
 echo.
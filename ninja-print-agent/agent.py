@@ -6,6 +6,10 @@ import os
 import sys
 import time
 
+# ⏱️ Linha do tempo da inicialização (zero = este import)
+from startup import StartupOrchestrator
+startup = StartupOrchestrator()
+
 # 🛡️ BLINDAGEM MÁXIMA PARA WINDOWS
 # Essas flags evitam o erro "Assertion failed: process_title" no Windows
 os.environ["UV_THREADPOOL_SIZE"] = "64"
@@ -28,30 +32,62 @@ import urllib.parse
 import io
 import asyncio
 import subprocess
+import socket
+import ctypes
 import re
-from concurrent.futures import ThreadPoolExecutor
-import http.client as http_client
+
+from print_spooler import PrintSpooler, PrinterRejected, Win32Printer, FilePrinter, batch_pages
+from print_store import PrintJobStore
+from browser_install import BrowserInstall
+from wa_journal import MessageJournal
+from dedup_store import DedupStore
+from contacts_store import AutoReplyStore
+from message_templates import MessageTemplates
+from intent_matcher import IntentMatcher
+from supabase_client import SupabaseClient
+from order_mirror import OrderMirror, PollingFeed
+from wa_dispatch import PageDispatcher
+from wa_scheduler import PriorityScheduler
+from loop_services import BlockingServices, LoopLagMonitor
+from worker_pool import BoundedExecutor
+from printer_inventory import PrinterInventory, Win32Inventory, FakeInventory, NO_PRINTER
+from escpos_render import render_ticket, encode_text
+from lazy_imports import lazy, lazy_stats, dependency_available
+from wa_supervisor import PageSupervisor, WHATSAPP_URL
+from wa_resources import ResourcePolicy, parse_list, DEFAULT_BLOCK_TYPES, DEFAULT_BLOCK_HOSTS
+from wa_inbox import InboxWatcher, open_chat, open_phone_chat, close_chat, read_last_incoming
+from wa_steps import (
+    StepTimer, COMPOSE_SELECTOR, focus_compose, wait_compose_text, compose_has_text, send_and_confirm, wait_ack, count_outgoing,
+    insert_message, insert_strategy_stats
+)
+
+# 🖥️ Modo serviço (--headless ou AGENT_HEADLESS=1): sem bandeja nem navegador; a pilha gráfica nem é carregada
+HEADLESS = "--headless" in sys.argv or os.getenv("AGENT_HEADLESS", "0") == "1"
+
+# 💤 Dependências pesadas: confere que estão instaladas (sem importar) e só importa no primeiro uso
+REQUIRED_DEPENDENCIES = ["win32api", "win32event", "win32con", "winerror", "playwright"]
+if not HEADLESS:
+    REQUIRED_DEPENDENCIES += ["pystray", "PIL"]
 
 try:
     from flask import Flask, request, jsonify
     from flask_cors import CORS
-    import win32print
-    import win32ui
-    import win32con
-    import win32event
-    import winerror
-    import win32api
-    from PIL import Image
-    import pystray
-    from pystray import MenuItem as item
-    import pyautogui
-    from playwright.async_api import async_playwright
     from dotenv import load_dotenv
+    missing = [name for name in REQUIRED_DEPENDENCIES if not dependency_available(name)]
+    if missing:
+        raise ImportError(f"No module named {', '.join(missing)}")
 except ImportError as e:
     print(f"❌ Erro crítico: Dependência não encontrada: {e}")
     print("💡 Dica: Verifique se todas as bibliotecas foram instaladas com 'pip install -r requirements.txt' ou manualmente.")
     sys.exit(1)
 
+win32api = lazy("win32api")
+win32con = lazy("win32con")
+pw_async_api = lazy("playwright.async_api")
+pystray = lazy("pystray")
+PIL_Image = lazy("PIL.Image")
+startup.checkpoint("dependencias")
+
 # --- TRAVA DE INSTÂNCIA ÚNICA (SINGLETON) ---
 def show_windows_notification(title, message):
     """Dispara uma notificacao real do Windows (Toast) via PowerShell"""
@@ -65,13 +101,25 @@ def show_windows_notification(title, message):
     except:
         pass
 
+# winerror.ERROR_ALREADY_EXISTS
+ERROR_ALREADY_EXISTS = 183
+
 def check_single_instance():
     """Garante que apenas UMA instancia do agente rode por vez"""
     mutex_name = "Global\\FomeNinjaAgent_Mutex_1337"
-    mutex = win32event.CreateMutex(None, False, mutex_name)
-    last_error = win32api.GetLastError()
+    # Mutex direto no kernel32 (ctypes): o pywin32 não entra no caminho da subida
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateMutexW.restype = ctypes.c_void_p
+    kernel32.CreateMutexW.argtypes = [ctypes.c_void_p, ctypes.c_bool, ctypes.c_wchar_p]
+    mutex = kernel32.CreateMutexW(None, False, mutex_name)
+    last_error = ctypes.get_last_error()
+    if not mutex:
+        raise ctypes.WinError(last_error)
     
-    if last_error == winerror.ERROR_ALREADY_EXISTS:
+    if last_error == ERROR_ALREADY_EXISTS:
+        if HEADLESS:
+            print("⚠️ O Agente Ninja já está rodando; esta instância vai encerrar.", flush=True)
+            return False
         # Dispara a notificacao no canto da tela
         show_windows_notification("NinjaTalk Ativo", "O Agente Ninja já está rodando em segundo plano! Procure o ícone da laranja perto do relógio.")
         
@@ -87,6 +135,7 @@ def check_single_instance():
 app_mutex = check_single_instance()
 if not app_mutex:
     os._exit(0)
+startup.checkpoint("instancia_unica")
 
 app = Flask(__name__)
 CORS(app)
@@ -94,13 +143,45 @@ CORS(app)
 # --- CONFIGURAÇÃO NINJA ---
 load_dotenv()
 print("✨ Agente Ninja (Modo Local JSON) configurado!", flush=True)
-
-# 🛡️ Cache de Notificacoes Enviadas (Evita Duplicidade)
-sent_notifications = set() # Store (order_id, status)
-
-# 🤝 Cache de Auto-Resposta (Evita spam de boas-vindas)
-# Estrutura: {phone: {restaurante_id: timestamp, ...}, ...}
-auto_responded_contacts = {} # Store {phone: {restaurante_slug: timestamp}}
+startup.checkpoint("dotenv")
+
+# 💾 Dados persistentes do agente (diário da fila, caches duráveis)
+AGENT_DATA_DIR = os.getenv("NINJA_AGENT_DATA_DIR", "C:\\ninja_agent_data")
+if not os.path.exists(AGENT_DATA_DIR):
+    os.makedirs(AGENT_DATA_DIR)
+startup.timeline_path = os.path.join(AGENT_DATA_DIR, "startup_timeline.json")
+
+# 🛡️ Cache de Notificacoes Enviadas (Evita Duplicidade, sobrevive a reinícios)
+NOTIFY_DEDUP_TTL_HOURS = float(os.getenv("NOTIFY_DEDUP_TTL_HOURS", "24"))
+sent_notifications = DedupStore(
+    os.path.join(AGENT_DATA_DIR, "notificacoes_enviadas.db"),
+    ttl_seconds=NOTIFY_DEDUP_TTL_HOURS * 3600
+) # Store (order_id, status)
+
+# 🤝 Cache de Auto-Resposta (Evita spam de boas-vindas, sobrevive a reinícios)
+# Pares (telefone, restaurante_id) com TTL, limite LRU e índice por restaurante.
+# Só abre o banco aqui; a recarga é a fase "contatos", em paralelo depois que o servidor sobe
+AUTO_REPLY_TTL_DAYS = float(os.getenv("AUTO_REPLY_TTL_DAYS", "30"))
+AUTO_REPLY_MAX_CONTACTS = int(os.getenv("AUTO_REPLY_MAX_CONTACTS", "50000"))
+auto_responded_contacts = AutoReplyStore(
+    os.path.join(AGENT_DATA_DIR, "auto_resposta.db"),
+    ttl_seconds=AUTO_REPLY_TTL_DAYS * 24 * 3600,
+    max_entries=AUTO_REPLY_MAX_CONTACTS,
+    preload=False
+)
+startup.checkpoint("stores")
+
+# Rotas que dependem de uma fase da subida esperam até STARTUP_WAIT_S antes de responder 503
+STARTUP_WAIT_S = float(os.getenv("STARTUP_WAIT_S", "10"))
+
+def not_ready(*subsystems):
+    """503 + Retry-After enquanto uma fase da inicialização que a rota usa ainda não terminou"""
+    pending = [name for name in subsystems if not startup.wait_ready(name, STARTUP_WAIT_S)]
+    if not pending:
+        return None
+    response = jsonify({"success": False, "message": "Agente ainda iniciando", "pending": pending})
+    response.headers["Retry-After"] = "2"
+    return response, 503
 
 # 🔗 Link do Cardápio para Auto-Resposta (pode ser sobrescrito por restaurante)
 CARDAPIO_LINK = os.getenv("CARDAPIO_LINK", "")  # Link padrão vazio - será enviado pelo painel
@@ -111,9 +192,53 @@ login_mode = False
 # 🏪 Cache de Links de Restaurantes (ID -> Link do Cardápio)
 restaurantes_cache = {} # {restaurante_id: {nome: "Fenix", link: "https://..."}}
 
+# 🏪 Restaurante dono deste WhatsApp: a caixa de entrada não diz de qual restaurante é a conversa
+AGENT_RESTAURANTE_ID = os.getenv("RESTAURANTE_ID") or None
+
+def inbox_restaurant_id():
+    """Restaurante das conversas da caixa de entrada: o do .env ou o último registrado pelo painel"""
+    if AGENT_RESTAURANTE_ID:
+        return AGENT_RESTAURANTE_ID
+    registrados = list(restaurantes_cache)
+    return registrados[-1] if registrados else None
+
 # 🔗 Configurações do Supabase para consulta de pedidos
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "5"))
+SUPABASE_CACHE_TTL = float(os.getenv("SUPABASE_CACHE_TTL", "15"))
+
+# Cliente com pool keep-alive (criado uma vez; None se não configurado)
+supabase_client = None
+if SUPABASE_URL and SUPABASE_KEY:
+    try:
+        supabase_client = SupabaseClient(
+            SUPABASE_URL, SUPABASE_KEY, timeout=SUPABASE_TIMEOUT, cache_ttl=SUPABASE_CACHE_TTL
+        )
+    except ValueError as e:
+        print(f"⚠️ {e}", flush=True)
+
+# 🪞 Espelho local dos pedidos recentes (respostas de status saem da memória)
+ORDER_FEED_CURSOR = os.getenv("ORDER_FEED_CURSOR", "updated_at")  # ou criado_em
+ORDER_FEED_INTERVAL = float(os.getenv("ORDER_FEED_INTERVAL", "3"))
+ORDER_MIRROR_HOURS = float(os.getenv("ORDER_MIRROR_HOURS", "12"))
+
+order_mirror = None
+if supabase_client is not None:
+    order_mirror = OrderMirror(
+        PollingFeed(
+            supabase_client,
+            cursor_column=ORDER_FEED_CURSOR,
+            lookback_hours=ORDER_MIRROR_HOURS,
+            # Registrados pelo painel + o da caixa de entrada; vazio = não consulta nada
+            restaurant_ids=lambda: sorted(set(restaurantes_cache) | ({inbox_restaurant_id()} - {None})),
+        ),
+        poll_interval=ORDER_FEED_INTERVAL,
+        retention_hours=ORDER_MIRROR_HOURS,
+        stale_after=max(30.0, ORDER_FEED_INTERVAL * 5),
+    )
+    order_mirror.start()
+startup.checkpoint("supabase")
 
 # 🤖 Palavras-chave para detecção de intenção
 PALAVRAS_CHAVE_STATUS = [
@@ -133,6 +258,23 @@ PALAVRAS_CHAVE_HORARIO = [
     "que horas", "quando abre", "quando fecha", "expediente"
 ]
 
+# 🎯 Autômato único com todas as palavras-chave (ordem = prioridade no empate)
+intent_matcher = IntentMatcher({
+    'status_pedido': PALAVRAS_CHAVE_STATUS,
+    'cardapio': PALAVRAS_CHAVE_CARDAPIO,
+    'horario': PALAVRAS_CHAVE_HORARIO,
+})
+
+# Palavras extras por restaurante (opcional): {restaurante_id: {intencao: [palavras]}}
+PALAVRAS_CHAVE_RESTAURANTES_PATH = os.getenv("PALAVRAS_CHAVE_RESTAURANTES", "palavras_chave_restaurantes.json")
+if os.path.exists(PALAVRAS_CHAVE_RESTAURANTES_PATH):
+    try:
+        total = intent_matcher.load_restaurant_file(PALAVRAS_CHAVE_RESTAURANTES_PATH)
+        print(f"🎯 Palavras-chave de {total} restaurante(s) carregadas", flush=True)
+    except Exception as e:
+        print(f"⚠️ Erro ao carregar palavras-chave por restaurante: {e}", flush=True)
+startup.checkpoint("intencoes")
+
 if sys.platform == "win32":
     # 🛡️ Proteção contra erro NoneType em modo --windowed (sem console)
     if sys.stdout is not None:
@@ -156,80 +298,120 @@ def resource_path(relative_path):
 
 ICON_PATH = resource_path("logo-fome-ninja.png")
 
-def ensure_playwright_installed():
-    """Garante que os drivers do browser estao instalados"""
-    try:
-        print("🔍 Verificando motores ninja...", flush=True)
-        # Se for executável, usamos o python do sistema ou verificamos apenas se existe
-        python_exe = sys.executable if not getattr(sys, 'frozen', False) else "python"
-        
-        subprocess.run([python_exe, "-m", "playwright", "install", "chromium"], 
-                       capture_output=True, check=True)
-        print("✅ Motores ninja prontos!", flush=True)
-    except Exception as e:
-        print(f"⚙️ Tentando instalar componentes (Aguarde)...", flush=True)
-        try:
-            python_exe = "python" # Fallback para o python do windows
-            subprocess.run([python_exe, "-m", "playwright", "install", "chromium"], check=True)
-            print("✅ Instalacao concluida com sucesso!", flush=True)
-        except Exception as err:
-            print(f"❌ Erro ao instalar componentes: {err}. Certifique-se que o Python está no PATH.")
+# 🧭 Chromium do Playwright: manifesto em cache (rápido); instalação só se falhar, em segundo plano
+# (start() é a fase "chromium" da subida)
+browser_install = BrowserInstall(os.path.join(AGENT_DATA_DIR, "playwright_manifest.json"))
+
+# 🖨️ Spooler de Impressão (workers dedicados por impressora)
+# PRINT_BACKEND=file grava os tickets em PRINT_FILE_DIR (testes de carga sem impressora)
+PRINT_BACKEND = os.getenv("PRINT_BACKEND", "win32")
 
-# Sempre verificar os motores, mesmo no EXE, para garantir que o Chromium está lá
-ensure_playwright_installed()
+# 🗂️ Inventário de impressoras em cache (atualizado em segundo plano; start() é a fase "impressoras")
+PRINTER_REFRESH_INTERVAL = float(os.getenv("PRINTER_REFRESH_INTERVAL", "60"))
+printer_inventory = PrinterInventory(
+    FakeInventory(["Ninja Arquivo"]) if PRINT_BACKEND == "file" else Win32Inventory(),
+    refresh_interval=PRINTER_REFRESH_INTERVAL,
+)
+
+def start_printer_inventory():
+    printer_inventory.start()
+    print(f"🖨️ Impressora padrão: {get_default_printer()}", flush=True)
 
 def get_default_printer():
-    try:
-        return win32print.GetDefaultPrinter()
-    except:
-        return "Nenhuma impressora encontrada"
+    return printer_inventory.default_printer()
 
-def print_raw_text(printer_name, text):
-    try:
-        hPrinter = win32print.OpenPrinter(printer_name)
-        try:
-            hJob = win32print.StartDocPrinter(hPrinter, 1, ("Fome Ninja Print", None, "RAW"))
-            try:
-                win32print.StartPagePrinter(hPrinter)
-                win32print.WritePrinter(hPrinter, text.encode('utf-8'))
-                win32print.EndPagePrinter(hPrinter)
-            finally:
-                win32print.EndDocPrinter(hPrinter)
-        finally:
-            win32print.ClosePrinter(hPrinter)
-        return True
-    except Exception as e:
-        print(f"Erro na impressão RAW: {e}")
+def printer_exists(printer_name):
+    if not printer_name or printer_name == NO_PRINTER:
         return False
+    inventory = printer_inventory.snapshot()
+    if printer_name == inventory["default"] or printer_name in inventory["printers"]:
+        return True
+    if inventory["refreshed_at"] is None:
+        # Enumeração inicial ainda rodando: o spooler falha na hora se o Windows não conhecer o nome
+        return True
+    return False
+
+def reject_printers(printer_names):
+    """404 para impressoras desconhecidas: o painel cai no fallback em vez de achar que vai imprimir"""
+    unknown = [name for name in printer_names if not printer_exists(name)]
+    if not unknown:
+        return None
+    # Pode ser uma impressora recém-instalada: a thread do inventário reenumera (fora da requisição)
+    printer_inventory.request_refresh()
+    print(f"⚠️ Impressora não encontrada: {', '.join(map(str, unknown))}", flush=True)
+    response = jsonify({"success": False, "message": "Impressora não encontrada", "printers": unknown})
+    response.headers["Retry-After"] = "2"
+    return response, 404
+
+@app.errorhandler(PrinterRejected)
+def printer_rejected(e):
+    # Recusa do spooler no submit (nome inválido ou teto de impressoras): o documento não entrou na fila
+    return jsonify({"success": False, "message": str(e)}), 404
+PRINT_FILE_DIR = os.getenv("PRINT_FILE_DIR", "print_spool_out")
+PRINT_WORKERS_PER_PRINTER = int(os.getenv("PRINT_WORKERS_PER_PRINTER", "1"))
+
+def make_printer_backend(printer_name):
+    if PRINT_BACKEND == "file":
+        return FilePrinter(printer_name, directory=PRINT_FILE_DIR)
+    return Win32Printer(printer_name)
+
+# Impressora fora do ar: a comanda segura a fila e é tentada de novo (backoff) até PRINT_RETRY_MAX_HOURS
+PRINT_RETRY_MAX_HOURS = float(os.getenv("PRINT_RETRY_MAX_HOURS", "6"))
+PRINT_RETRY_MAX_DELAY = float(os.getenv("PRINT_RETRY_MAX_DELAY", "60"))
+# Cada impressora tem fila e threads próprias: teto para nomes que o cliente inventar
+PRINT_MAX_PRINTERS = int(os.getenv("PRINT_MAX_PRINTERS", "16"))
+
+print_spooler = PrintSpooler(
+    make_printer_backend,
+    workers_per_printer=PRINT_WORKERS_PER_PRINTER,
+    store=PrintJobStore(os.path.join(AGENT_DATA_DIR, "fila_impressao.db")),
+    retry_max=PRINT_RETRY_MAX_DELAY,
+    max_age=PRINT_RETRY_MAX_HOURS * 3600,
+    printer_exists=printer_exists,
+    max_printers=PRINT_MAX_PRINTERS,
+)
+startup.checkpoint("spooler")
+
+def restore_print_queue():
+    """Fase "spooler": devolve à fila as comandas que ficaram pendentes no último encerramento"""
+    pendentes = print_spooler.restore()
+    if pendentes:
+        print(f"💾 {pendentes} comanda(s) pendente(s) recuperada(s) da fila de impressão", flush=True)
+
+# 🧾 Perfil ESC/POS das térmicas (largura do papel e página de código)
+# PRINTER_PROFILES='{"Elgin i9": {"paper_width": 58, "codepage": "cp860"}}' sobrescreve por impressora
+ESCPOS_PAPER_WIDTH = int(os.getenv("ESCPOS_PAPER_WIDTH", "80"))
+ESCPOS_CODEPAGE = os.getenv("ESCPOS_CODEPAGE", "cp850")
+try:
+    PRINTER_PROFILES = json.loads(os.getenv("PRINTER_PROFILES", "{}"))
+except ValueError:
+    print("⚠️ PRINTER_PROFILES inválido (JSON), usando o perfil padrão", flush=True)
+    PRINTER_PROFILES = {}
+
+def printer_profile(printer_name, paper_width=None):
+    profile = PRINTER_PROFILES.get(printer_name, {})
+    width = paper_width or profile.get('paper_width') or ESCPOS_PAPER_WIDTH
+    return int(width), profile.get('codepage') or ESCPOS_CODEPAGE
 
 # --- Lógica de Mensagens Ninja (100% Local) ---
 
+# 💬 Matriz de mensagens compilada uma vez (recarrega sozinha quando o JSON muda)
+message_templates = MessageTemplates(resource_path('mensagens_reserva.json'))
+message_templates.start_watching()
+startup.checkpoint("templates")
+
 def generate_matrix_message(status_key, customer_name, codigo_entrega=None):
     """Gera uma mensagem humana usando a matriz de mensagens embutida no EXE"""
     try:
-        path = resource_path('mensagens_reserva.json')
-        if not os.path.exists(path):
+        if not message_templates.loaded:
             base_msg = f"Olá {customer_name}, seu pedido foi atualizado!"
             if codigo_entrega:
                 base_msg += f" Seu código de confirmação: *{codigo_entrega}*"
             return base_msg
 
-        with open(path, 'r', encoding='utf-8') as f:
-            matriz = json.load(f)
-
-        saudacoes = matriz.get('saudacoes', ["Olá, {customer_name}!"])
-        corpos = matriz.get('corpos', {}).get(status_key, ["Seu pedido foi atualizado."])
-        fechamentos = matriz.get('fechamentos', ["😉"])
-
-        saudacao = random.choice(saudacoes)
-        corpo = random.choice(corpos)
-        fechamento = random.choice(fechamentos)
-
-        mensagem = f"{saudacao} {corpo} {fechamento}"
-        mensagem = mensagem.replace("{customer_name}", customer_name)
-        if codigo_entrega:
-            mensagem = mensagem.replace("{codigo_entrega}", str(codigo_entrega))
-        return mensagem
+        return message_templates.status_message(
+            status_key, customer_name=customer_name, codigo_entrega=codigo_entrega
+        )
     except Exception as e:
         print(f"⚠️ Erro ao gerar mensagem: {e}")
         return f"Olá {customer_name}, seu pedido foi atualizado!"
@@ -238,7 +420,7 @@ def generate_matrix_message(status_key, customer_name, codigo_entrega=None):
 def consultar_pedido_supabase(phone, restaurante_id=None):
     """Consulta pedidos do cliente no Supabase pelo telefone"""
     try:
-        if not SUPABASE_URL or not SUPABASE_KEY:
+        if supabase_client is None:
             print("⚠️ Supabase não configurado (SUPABASE_URL/SUPABASE_KEY no .env)", flush=True)
             return None
         
@@ -247,31 +429,12 @@ def consultar_pedido_supabase(phone, restaurante_id=None):
         if not clean_phone.startswith("55") and len(clean_phone) <= 11:
             clean_phone = "55" + clean_phone
         
-        # Monta URL do Supabase
-        url = SUPABASE_URL.rstrip('/') + f"/rest/v1/pedidos?telefone=eq.{clean_phone}"
-        if restaurante_id:
-            url += f"&id_restaurante=eq.{restaurante_id}"
-        url += "&order=criado_em.desc&limit=1"
-        
-        # Faz requisição
-        conn = http_client.HTTPSURLConnection(SUPABASE_URL.replace("https://", ""))
-        headers = {
-            'apikey': SUPABASE_KEY,
-            'Authorization': f'Bearer {SUPABASE_KEY}',
-            'Content-Type': 'application/json'
-        }
-        
-        conn.request("GET", url, headers=headers)
-        response = conn.getresponse()
+        # Espelho em dia e com este restaurante: responde da memória, sem rede
+        if order_mirror is not None and order_mirror.fresh and order_mirror.covers(restaurante_id):
+            return order_mirror.latest(clean_phone, restaurante_id)
         
-        if response.status == 200:
-            data = response.read().decode('utf-8')
-            pedidos = json.loads(data)
-            
-            if pedidos and len(pedidos) > 0:
-                return pedidos[0]  # Retorna pedido mais recente
-        
-        return None
+        # Espelho frio/atrasado ou sem este restaurante: pool keep-alive + cache curto por (telefone, restaurante)
+        return supabase_client.latest_order(clean_phone, restaurante_id)
         
     except Exception as e:
         print(f"⚠️ Erro ao consultar pedido no Supabase: {e}", flush=True)
@@ -317,27 +480,9 @@ def gerar_resposta_status_pedido(pedido, customer_name):
         return None
 
 
-def detectar_intencao_mensagem(mensagem):
-    """Detecta a intenção da mensagem do cliente baseada em palavras-chave"""
-    if not mensagem:
-        return None
-    
-    mensagem_lower = mensagem.lower()
-    
-    # Verifica cada grupo de palavras-chave
-    for palavra in PALAVRAS_CHAVE_STATUS:
-        if palavra.lower() in mensagem_lower:
-            return 'status_pedido'
-    
-    for palavra in PALAVRAS_CHAVE_CARDAPIO:
-        if palavra.lower() in mensagem_lower:
-            return 'cardapio'
-    
-    for palavra in PALAVRAS_CHAVE_HORARIO:
-        if palavra.lower() in mensagem_lower:
-            return 'horario'
-    
-    return None
+def detectar_intencao_mensagem(mensagem, restaurante_id=None):
+    """Detecta a intenção da mensagem do cliente baseada em palavras-chave (uma passada)"""
+    return intent_matcher.best(mensagem, restaurante_id)
 
 
 def gerar_resposta_intencao(intencao, customer_name=None, restaurante_id=None, mensagem_cliente=None, phone=None):
@@ -364,244 +509,134 @@ def gerar_resposta_intencao(intencao, customer_name=None, restaurante_id=None, m
     return None
 
 
-async def check_and_reply_new_messages(page, auto_responded_contacts, restaurante_id=None):
-    """Verifica novas mensagens no WhatsApp Web e responde automaticamente"""
-    try:
-        print("🔍 Verificando novas conversas...", flush=True)
-        
-        # Clica no painel lateral para garantir que estamos na view de conversas
-        try:
-            await page.click("div[data-testid='chat-list']", timeout=3000)
-            await asyncio.sleep(1)
-        except:
-            pass
-        
-        # Procura por conversas com mensagens não lidas
-        # WhatsApp Web marca com classe 'unread' ou mostra badge verde
-        chat_items = await page.query_selector_all("div[data-testid='cell-frame-container']")
-        
-        if not chat_items:
-            print("  Nenhuma conversa encontrada na lista", flush=True)
-            return
-        
-        print(f"  Encontradas {len(chat_items)} conversas na lista", flush=True)
-        
-        for item in chat_items[:5]:  # Checa apenas as 5 primeiras
-            try:
-                # Verifica se tem badge de não lida
-                unread_badge = await item.query_selector("span[data-testid='unread-count']")
-                
-                # Tenta extrair nome e telefone
-                title_el = await item.query_selector("span[title]")
-                if not title_el:
-                    continue
-                    
-                title = await title_el.get_attribute("title")
-                if not title:
-                    continue
-                
-                print(f"  📱 Conversa: {title}", flush=True)
-                
-                # Se tem mensagem não lida, responde
-                if unread_badge or True:  # Responde a todas as novas conversas
-                    # Clica na conversa para abrir
-                    await item.click()
-                    await asyncio.sleep(2)
-                    
-                    # Verifica se já respondeu antes PARA ESTE RESTAURANTE
-                    phone_clean = "".join(filter(str.isdigit, title))
-                    if not phone_clean.startswith("55") and len(phone_clean) <= 11:
-                        phone_clean = "55" + phone_clean
-                    
-                    # Inicializa estrutura do telefone se não existe
-                    if phone_clean not in auto_responded_contacts:
-                        auto_responded_contacts[phone_clean] = {}
-                    
-                    # Verifica se já respondeu para este contato neste restaurante
-                    if restaurante_id and restaurante_id in auto_responded_contacts[phone_clean]:
-                        print(f"    ⏭️ Já respondeu para {title} neste restaurante, pulando...", flush=True)
-                        continue
-                    
-                    # Verifica se é uma conversa nova (sem mensagens enviadas ainda)
-                    # Procura pela última mensagem enviada (que seria nossa, à direita)
-                    sent_msgs = await page.query_selector_all("div[data-testid='chat-body-content'] > div:nth-child(2)")
-                    
-                    # Se tem poucas ou nenhuma mensagem enviada, é conversa nova
-                    if len(sent_msgs) < 2:
-                        print(f"    ✨ Nova conversa detectada! Respondendo {title}...", flush=True)
-                        
-                        # Gera mensagem de boas-vindas com link do restaurante específico
-                        reply_msg = generate_auto_reply_message(title, restaurante_id)
-                        
-                        # Envia a mensagem
-                        await send_message_direct(page, reply_msg)
-                        
-                        # Marca como respondido PARA ESTE RESTAURANTE
-                        if restaurante_id:
-                            auto_responded_contacts[phone_clean][restaurante_id] = time.time()
-                        else:
-                            auto_responded_contacts[phone_clean]["default"] = time.time()
-                        
-                        print(f"    ✅ Auto-resposta enviada para {title}!", flush=True)
-                    else:
-                        print(f"    ⏭️ Conversa já existente com {title}", flush=True)
-                        
-            except Exception as e:
-                print(f"    ⚠️ Erro ao processar conversa: {e}", flush=True)
-                continue
-        
-        # Volta para o painel inicial
-        await page.goto("https://web.whatsapp.com", wait_until="networkidle", timeout=30000)
-        
-    except Exception as e:
-        print(f"❌ Erro ao verificar mensagens: {e}", flush=True)
+async def check_and_reply_new_messages(page, title, auto_responded_contacts, restaurante_id=None):
+    """Responde com boas-vindas se a conversa aberta for nova (retorna True se respondeu)"""
+    # Verifica se já respondeu antes PARA ESTE RESTAURANTE
+    phone_clean = "".join(filter(str.isdigit, title))
+    if not phone_clean.startswith("55") and len(phone_clean) <= 11:
+        phone_clean = "55" + phone_clean
+    
+    # Verifica se já respondeu para este contato neste restaurante
+    if restaurante_id and await pw_io.run(auto_responded_contacts.has, phone_clean, restaurante_id):
+        print(f"    ⏭️ Já respondeu para {title} neste restaurante, pulando...", flush=True)
+        return False
+    
+    # Verifica se é uma conversa nova (sem mensagens enviadas ainda)
+    # Se tem poucas ou nenhuma mensagem nossa (bolhas de saída), é conversa nova
+    if await count_outgoing(page) >= 2:
+        print(f"    ⏭️ Conversa já existente com {title}", flush=True)
+        return False
+
+    print(f"    ✨ Nova conversa detectada! Respondendo {title}...", flush=True)
+    
+    # Gera mensagem de boas-vindas com link do restaurante específico
+    reply_msg = generate_auto_reply_message(title, restaurante_id)
+    
+    # Envia a mensagem
+    await send_message_direct(page, reply_msg)
+    
+    # Marca como respondido PARA ESTE RESTAURANTE (ou "default")
+    await pw_io.run(auto_responded_contacts.mark, phone_clean, restaurante_id)
+    
+    print(f"    ✅ Auto-resposta enviada para {title}!", flush=True)
+    return True
+
+
+async def check_and_reply_incoming_messages(page, title, restaurante_id=None):
+    """Responde por intenção à última mensagem RECEBIDA na conversa aberta"""
+    phone_clean = "".join(filter(str.isdigit, title))
+    if not phone_clean.startswith("55") and len(phone_clean) <= 11:
+        phone_clean = "55" + phone_clean
+    
+    # Extrai última mensagem recebida (do cliente)
+    message_text = await read_last_incoming(page)
+    
+    if not message_text or len(message_text.strip()) < 3:
+        print("    ⚠️ Mensagem muito curta ou vazia", flush=True)
+        return False
+    
+    print(f"    💬 Mensagem recebida: '{message_text[:50]}...'")
+    
+    # Detecta intenção
+    intencao = detectar_intencao_mensagem(message_text, restaurante_id)
+    
+    if not intencao:
+        print("    ⏭️ Sem intenção detectada, pulando...", flush=True)
+        return False
+    
+    print(f"    🎯 Intenção detectada: {intencao}")
+    
+    # Gera resposta baseada na intenção (pode consultar o Supabase: fora do loop)
+    reply_msg = await pw_io.run(
+        gerar_resposta_intencao,
+        intencao=intencao,
+        customer_name=title,
+        restaurante_id=restaurante_id,
+        mensagem_cliente=message_text,
+        phone=phone_clean
+    )
+    
+    if not reply_msg:
+        print("    ⚠️ Não foi possível gerar resposta", flush=True)
+        return False
+    
+    # Envia resposta
+    print(f"    📨 Enviando resposta...", flush=True)
+    await send_message_direct(page, reply_msg)
+    print(f"    ✅ Resposta enviada para {title}!", flush=True)
+    return True
 
 
-async def check_and_reply_incoming_messages(page, restaurante_id=None):
-    """Verifica mensagens RECEBIDAS em conversas existentes e responde por intenção"""
+async def handle_inbox_event(page, event, restaurante_id=None):
+    """Processa um chat não lido avisado pelo vigia da caixa de entrada"""
+    title = event['title']
+    print(f"📬 Mensagem não lida de: {title} ({event.get('unread', 1)})", flush=True)
     try:
-        print("🔍 Verificando mensagens recebidas...", flush=True)
-        
-        # Clica na lista de conversas
-        try:
-            await page.click("div[data-testid='chat-list']", timeout=3000)
-            await asyncio.sleep(1)
-        except:
-            pass
-        
-        # Procura por conversas com mensagens não lidas
-        chat_items = await page.query_selector_all("div[data-testid='cell-frame-container']")
+        await open_chat(page, title)
         
-        if not chat_items:
+        # 1️⃣ Conversa nova: auto-resposta de boas-vindas
+        if await check_and_reply_new_messages(page, title, auto_responded_contacts, restaurante_id):
             return
         
-        for item in chat_items[:5]:  # Checa até 5 conversas
-            try:
-                # Verifica badge de não lida
-                unread_badge = await item.query_selector("span[data-testid='unread-count']")
-                if not unread_badge:
-                    continue  # Só processa se tiver mensagens não lidas
-                
-                # Extrai nome/telefone
-                title_el = await item.query_selector("span[title]")
-                if not title_el:
-                    continue
-                
-                title = await title_el.get_attribute("title")
-                phone_clean = "".join(filter(str.isdigit, title))
-                if not phone_clean.startswith("55") and len(phone_clean) <= 11:
-                    phone_clean = "55" + phone_clean
-                
-                print(f"  📨 Mensagem não lida de: {title}", flush=True)
-                
-                # Clica para abrir conversa
-                await item.click()
-                await asyncio.sleep(2)
-                
-                # Extrai última mensagem recebida (do cliente)
-                # Mensagens recebidas têm classe específica no WhatsApp Web
-                last_incoming_msg = await page.query_selector_all("div[data-testid='chat-body-content'] span[dir='ltr']")
-                
-                if not last_incoming_msg:
-                    print("    ⚠️ Não foi possível extrair mensagem", flush=True)
-                    continue
-                
-                # Pega a última mensagem
-                last_msg_el = last_incoming_msg[-1]
-                message_text = await last_msg_el.inner_text()
-                
-                if not message_text or len(message_text.strip()) < 3:
-                    print("    ⚠️ Mensagem muito curta ou vazia", flush=True)
-                    continue
-                
-                print(f"    💬 Mensagem recebida: '{message_text[:50]}...'")
-                
-                # Detecta intenção
-                intencao = detectar_intencao_mensagem(message_text)
-                
-                if not intencao:
-                    print("    ⏭️ Sem intenção detectada, pulando...", flush=True)
-                    continue
-                
-                print(f"    🎯 Intenção detectada: {intencao}")
-                
-                # Gera resposta baseada na intenção
-                reply_msg = gerar_resposta_intencao(
-                    intencao=intencao,
-                    customer_name=title,
-                    restaurante_id=restaurante_id,
-                    mensagem_cliente=message_text,
-                    phone=phone_clean
-                )
-                
-                if not reply_msg:
-                    print("    ⚠️ Não foi possível gerar resposta", flush=True)
-                    continue
-                
-                # Envia resposta
-                print(f"    📨 Enviando resposta...", flush=True)
-                await send_message_direct(page, reply_msg)
-                print(f"    ✅ Resposta enviada para {title}!", flush=True)
-                
-                # Aguarda antes de processar próxima conversa
-                await asyncio.sleep(3)
-                
-            except Exception as e:
-                print(f"    ⚠️ Erro ao processar conversa: {e}", flush=True)
-                continue
-        
-        # Volta para painel inicial
-        await page.goto("https://web.whatsapp.com", wait_until="networkidle", timeout=30000)
-        
+        # 2️⃣ Conversa existente: resposta por intenção
+        await check_and_reply_incoming_messages(page, title, restaurante_id)
     except Exception as e:
-        print(f"❌ Erro ao verificar mensagens recebidas: {e}", flush=True)
+        print(f"    ⚠️ Erro ao processar conversa: {e}", flush=True)
+    finally:
+        # Volta para a lista sem recarregar o WhatsApp Web
+        try:
+            await close_chat(page)
+        except Exception:
+            pass
 
 
 async def send_message_direct(page, message):
     """Envia mensagem diretamente na conversa atual"""
+    timer = StepTimer("Resposta direta")
     try:
         # Foca no campo de texto
-        await page.click("div[contenteditable='true']", timeout=10000)
-        await asyncio.sleep(1)
-        
-        # Digita a mensagem
-        await page.type("div[contenteditable='true']", message, delay=50)
-        await asyncio.sleep(2)
-        
-        # Clica no botão de enviar
-        btn_selectors = [
-            "span[data-icon='send']",
-            "[data-testid='compose-btn-send']",
-            "button[aria-label='Enviar']",
-            "footer button"
-        ]
+        await timer.run("compose", focus_compose(page))
         
-        sent = False
-        for sel in btn_selectors:
-            btn = await page.query_selector(sel)
-            if btn:
-                await btn.click()
-                print(f"    ✅ Enviado via selector: {sel}", flush=True)
-                sent = True
-                break
+        # Insere a mensagem (insert_text/colar; digitação só se a verificação falhar)
+        strategy = await insert_message(page, message, timer)
+        print(f"    ✍️ Texto inserido via {strategy}", flush=True)
+        await timer.run("texto", wait_compose_text(page))
         
-        if not sent:
-            await page.keyboard.press("Enter")
-            print("    ✅ Enviado via Enter", flush=True)
-        
-        await asyncio.sleep(3)
+        # Envia e espera a confirmação do WhatsApp
+        used = await send_and_confirm(page, timer)
+        print(f"    ✅ Enviado via {used}", flush=True)
         return True
         
     except Exception as e:
         print(f"    ❌ Erro ao enviar mensagem: {e}", flush=True)
         return False
+    finally:
+        timer.report()
 
 
 def generate_auto_reply_message(customer_name=None, restaurante_id=None):
     """Gera mensagem automática de boas-vindas para novos contatos"""
     try:
-        path = resource_path('mensagens_reserva.json')
-        
         # Obtém link do cardápio do restaurante específico ou usa o padrão
         cardapio_link = CARDAPIO_LINK
         restaurante_nome = ""
@@ -613,23 +648,12 @@ def generate_auto_reply_message(customer_name=None, restaurante_id=None):
         if not cardapio_link:
             return f"Olá! 👋 Bem-vindo! 🥷\n\nFaça seu pedido conosco!"
 
-        if not os.path.exists(path):
+        if not message_templates.loaded:
             return f"Olá! 👋 Bem-vindo ao *{restaurante_nome or 'nosso restaurante'}*! 🥷\n\nNosso cardápio: {cardapio_link}"
 
-        with open(path, 'r', encoding='utf-8') as f:
-            matriz = json.load(f)
-
-        auto_resposta = matriz.get('auto_resposta', {})
-        saudacoes = auto_resposta.get('saudacoes', ["Olá! Bem-vindo ao nosso restaurante! 🥷"])
-        corpo = auto_resposta.get('corpo', "Confira nosso cardápio: {cardapio_link}")
-        fechamentos = auto_resposta.get('fechamentos', ["Qualquer dúvida estamos aqui! 👍"])
-
-        saudacao = random.choice(saudacoes)
-        corpo_msg = corpo.replace("{cardapio_link}", cardapio_link)
-        fechamento = random.choice(fechamentos)
-
-        mensagem = f"{saudacao}\n\n{corpo_msg}\n\n{fechamento}"
-        return mensagem
+        return message_templates.auto_reply_message(
+            customer_name=customer_name, cardapio_link=cardapio_link, restaurante_nome=restaurante_nome
+        )
     except Exception as e:
         print(f"⚠️ Erro ao gerar auto-resposta: {e}")
         return f"Olá! 👋 Bem-vindo! 🥷\n\nNosso cardápio: {CARDAPIO_LINK}"
@@ -640,27 +664,182 @@ PLAYWRIGHT_DATA_DIR = "C:\\ninja_wp_data"
 if not os.path.exists(PLAYWRIGHT_DATA_DIR):
     os.makedirs(PLAYWRIGHT_DATA_DIR)
 
+# 📒 Diário da fila do WhatsApp (sobrevive a crashes e reinícios do motor)
+# Mensagem mais velha que WA_MESSAGE_MAX_AGE_MIN não é mais enviada (nem no replay, nem nas novas tentativas)
+WA_MESSAGE_MAX_AGE_MIN = float(os.getenv("WA_MESSAGE_MAX_AGE_MIN", "30"))
+WA_SEND_RETRY_DELAY = float(os.getenv("WA_SEND_RETRY_DELAY", "30"))
+WA_SEND_MAX_RETRIES = int(os.getenv("WA_SEND_MAX_RETRIES", "3"))
+message_journal = MessageJournal(
+    os.path.join(AGENT_DATA_DIR, "fila_whatsapp.db"), max_age=WA_MESSAGE_MAX_AGE_MIN * 60
+)
+
+# 🗂️ Os envios saem pela aba ativa, em série: o WhatsApp Web só mantém uma aba ativa por sessão
+
+# 🧵 Chamadas bloqueantes (Supabase, SQLite) feitas pelo motor rodam fora do pw_loop
+WA_IO_WORKERS = int(os.getenv("WA_IO_WORKERS", "4"))
+WA_LOOP_LAG_MS = float(os.getenv("WA_LOOP_LAG_MS", "100"))
+pw_io = BlockingServices(max_workers=WA_IO_WORKERS)
+loop_lag = LoopLagMonitor(threshold=WA_LOOP_LAG_MS / 1000)
+
+# Aviso do WhatsApp Web quando a sessão está ativa em outra aba
+USE_HERE_SELECTOR = "div[role='dialog'] button:has-text('Usar aqui'), div[role='dialog'] button:has-text('Use here')"
+
+# 🩺 Supervisor da aba principal: sonda (logada, respondendo, heap JS) e troca só a aba que falhar
+WA_PROBE_INTERVAL = float(os.getenv("WA_PROBE_INTERVAL", "15"))
+WA_PAGE_MAX_HEAP_MB = int(os.getenv("WA_PAGE_MAX_HEAP_MB", "1024"))
+# Aba reserva: "lazy" (só enquanto a principal falha), "1" (sempre aquecida, +1 WhatsApp Web na memória) ou "0"
+WA_WARM_STANDBY = {"1": True, "0": False}.get(os.getenv("WA_WARM_STANDBY", "lazy"), "lazy")
+WA_RESTART_MAX_DELAY = float(os.getenv("WA_RESTART_MAX_DELAY", "300"))
+
+# 🪶 Recursos que o agente não precisa para texto (fotos, mídia, fontes); WA_BLOCK_RESOURCES= vazio desliga
+WA_BLOCK_RESOURCES = parse_list(os.getenv("WA_BLOCK_RESOURCES", ",".join(DEFAULT_BLOCK_TYPES)))
+WA_BLOCK_HOSTS = parse_list(os.getenv("WA_BLOCK_HOSTS", ",".join(DEFAULT_BLOCK_HOSTS)))
+WA_REDUCED_MOTION = os.getenv("WA_REDUCED_MOTION", "1") == "1"
+resource_policy = ResourcePolicy(WA_BLOCK_RESOURCES, WA_BLOCK_HOSTS)
+
+# ⚖️ Pistas do agendador e seus pesos (status de pedido > auto-resposta > intenção)
+WA_LANE_WEIGHTS = {"status": 4, "auto_reply": 2, "intencao": 1}
+
 # Filas e Loops para integração Async + Sync
 pw_loop = None
-msg_queue = None # Será inicializado dentro do loop asyncio
+msg_scheduler = None # Será inicializado dentro do loop asyncio
+wa_supervisor = None
+
+def inbound_lane(title):
+    """Pista de um chat não lido: contato novo recebe boas-vindas, conhecido recebe resposta por intenção"""
+    phone_clean = "".join(filter(str.isdigit, title))
+    if not phone_clean.startswith("55") and len(phone_clean) <= 11:
+        phone_clean = "55" + phone_clean
+    return "intencao" if auto_responded_contacts.has_phone(phone_clean) else "auto_reply"
+
+async def retry_later(task_data, reason, count=True):
+    """Devolve a tarefa à frente da pista após WA_SEND_RETRY_DELAY; vencida ou tentada demais, descarta no diário"""
+    age = time.time() - task_data.get('queued_at', time.time())
+    if count:
+        task_data['retries'] = task_data.get('retries', 0) + 1
+    if age > WA_MESSAGE_MAX_AGE_MIN * 60 or task_data.get('retries', 0) > WA_SEND_MAX_RETRIES:
+        print(f"🗑️ Mensagem para {task_data.get('customer_name')} descartada ({reason}, {age / 60:.0f} min na fila)", flush=True)
+        await pw_io.run(message_journal.fail, task_data.get('journal_id'))
+        return
+    lane = task_data.get('lane', 'status')
+    print(f"⏳ Mensagem para {task_data.get('customer_name')} volta para a fila em {WA_SEND_RETRY_DELAY:.0f}s ({reason})", flush=True)
+    pw_loop.call_later(WA_SEND_RETRY_DELAY, lambda: msg_scheduler.put_nowait(lane, task_data, front=True))
+
+async def dispatch_whatsapp_task(page, task_data):
+    """Envia UMA tarefa da fila pela aba ativa (o despachante segura a trava da sessão)"""
+    phone, message, customer_name = task_data['phone'], task_data['message'], task_data['customer_name']
+    timer = StepTimer(f"Disparo {customer_name}")
+
+    try:
+        print(f"\n⚡ INICIANDO DISPARO: {customer_name} ({phone})", flush=True)
+        
+        # Verificação se ainda precisa de login antes de enviar
+        if await page.query_selector("canvas"):
+            print("❌ ABORTADO: Robô está deslogado. Escaneie o QR Code primeiro!")
+            # Espera o login sem gastar tentativas; só a idade da mensagem a descarta
+            await retry_later(task_data, "deslogado", count=False)
+            return
+
+        clean_phone = "".join(filter(str.isdigit, phone))
+        if not clean_phone.startswith("55") and len(clean_phone) <= 11:
+            clean_phone = "55" + clean_phone
+        
+        print(f"🔗 Abrindo chat de {customer_name}...", flush=True)
+        
+        # Tenta carregar o chat
+        try:
+            # Dentro do app (sem recarregar o WhatsApp Web); o /send/ com recarga fica de reserva
+            if not await timer.run("abrir", open_phone_chat(page, clean_phone)):
+                print("🔁 App não abriu o chat por dentro, usando o link /send/ (recarrega a aba)...", flush=True)
+                wp_url = f"https://web.whatsapp.com/send/?phone={clean_phone}&text={urllib.parse.quote(message)}&type=phone_number&app_absent=0"
+                await timer.run("abrir", page.goto(wp_url, wait_until="load", timeout=60000))
+            
+            print("⏳ Aguardando processamento do WhatsApp...", flush=True)
+            # Esperar o campo de texto carregar, erro de número inválido OU o aviso de "outra aba ativa"
+            await timer.run("chat", page.wait_for_selector(f"{COMPOSE_SELECTOR}, [data-testid='popup-controls-ok'], {USE_HERE_SELECTOR}", timeout=45000))
+            
+            # O WhatsApp Web só mantém uma aba ativa por sessão: retoma esta aba se necessário
+            use_here = await page.query_selector(USE_HERE_SELECTOR)
+            if use_here:
+                print("🔁 Retomando a sessão nesta aba (Usar aqui)...", flush=True)
+                await use_here.click()
+                await timer.run("usar_aqui", page.wait_for_selector(f"{COMPOSE_SELECTOR}, [data-testid='popup-controls-ok']", timeout=45000))
+
+            # Verifica se o número é inválido
+            invalid_popup = await page.query_selector("[data-testid='popup-controls-ok']")
+            if invalid_popup:
+                print(f"❌ ERRO: O número {phone} parece ser inválido para o WhatsApp.")
+                await pw_io.run(message_journal.ack, task_data.get('journal_id'))
+                await invalid_popup.click()
+                await page.wait_for_selector("[data-testid='popup-controls-ok']", state="detached", timeout=5000)
+                return
+
+            print("🖱️ Focando no campo de mensagem...", flush=True)
+            await timer.run("compose", focus_compose(page))
+
+            # Aberto por dentro do app o campo vem vazio; pelo /send/ a URL às vezes falha em preencher
+            if not await compose_has_text(page):
+                strategy = await insert_message(page, message, timer)
+                print(f"✍️ Texto inserido via {strategy}", flush=True)
+                await timer.run("texto", wait_compose_text(page))
+            
+            print("🚀 Pressionando ENVIAR...", flush=True)
+            used = await send_and_confirm(page, timer)
+            print(f"✅ Enviado via {used}!", flush=True)
+                
+            print(f"🎯 CONCLUÍDO! Mensagem processada para {customer_name}.", flush=True)
+            await pw_io.run(message_journal.ack, task_data.get('journal_id'))
+        except Exception as inner_e:
+            print(f"❌ Falha técnica no chat: {inner_e}", flush=True)
+            await page.keyboard.press("Enter")
+            try:
+                await timer.run("ack", wait_ack(page, timeout=5000))
+            except Exception:
+                # Sem confirmação de envio: tenta de novo mais tarde
+                await retry_later(task_data, "falha no chat")
+            else:
+                # O Enter entregou o texto: confirma para o replay não mandar de novo
+                print(f"✅ Enviado via Enter após a falha!", flush=True)
+                await pw_io.run(message_journal.ack, task_data.get('journal_id'))
+        
+    except Exception as e:
+        print(f"⚠️ Erro no ciclo de envio: {e}", flush=True)
+        await retry_later(task_data, "erro no ciclo de envio")
+    finally:
+        timer.report()
 
 async def playwright_manager():
-    global pw_loop, msg_queue
+    global pw_loop, msg_scheduler, wa_supervisor
     pw_loop = asyncio.get_running_loop()
-    msg_queue = asyncio.Queue()
+    loop_lag.start()
+    scheduler = PriorityScheduler(WA_LANE_WEIGHTS)
+
+    # 🧭 Espera a verificação/instalação do Chromium (o Flask já está no ar)
+    if not browser_install.ready.is_set():
+        print("⏳ Aguardando instalação dos motores ninja...", flush=True)
+        await pw_io.run(browser_install.wait)
+
+    # 📒 Reenfileira o que ficou pendente no diário antes de abrir a fila para o Flask
+    pendentes = await pw_io.run(message_journal.replay)
+    for task in pendentes:
+        scheduler.put_nowait(task.get('lane', 'status'), task)
+    if pendentes:
+        print(f"📒 {len(pendentes)} mensagem(ns) pendente(s) recuperada(s) do diário", flush=True)
+    await pw_io.run(message_journal.compact)
+    msg_scheduler = scheduler
     
     print("\n" + "🚀"*10)
     print("🚀 MOTOR PLAYWRIGHT ATIVO")
     print("🚀 FILA NINJA INICIALIZADA")
     print("🚀"*10 + "\n")
     
-    max_retries = 10
+    # Falhas seguidas ao subir o navegador: espera cresce até WA_RESTART_MAX_DELAY, mas nunca desiste
     retry_count = 0
     
-    while retry_count < max_retries:
+    while True:
         try:
             print(f"🌐 Conectando ao WhatsApp Web...", flush=True)
-            async with async_playwright() as p:
+            async with pw_async_api.async_playwright() as p:
                 # No Windows, headless=False é essencial para interação de teclado confiável
                 is_headless = False
                 
@@ -670,12 +849,15 @@ async def playwright_manager():
                     user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
                     viewport={'width': 1280, 'height': 720},
                     ignore_https_errors=True,
+                    reduced_motion="reduce" if WA_REDUCED_MOTION else "no-preference",
                     args=["--disable-blink-features=AutomationControlled", "--no-sandbox"]
                 )
+                # Vale para todas as abas do contexto (principal e reserva)
+                await resource_policy.install(context)
                 
                 page = await context.new_page()
                 print("⏳ Carregando WhatsApp Web...", flush=True)
-                await page.goto("https://web.whatsapp.com", wait_until="networkidle", timeout=180000)
+                await page.goto(WHATSAPP_URL, wait_until="networkidle", timeout=180000)
                 
                 # Verificação de Login
                 try:
@@ -688,138 +870,90 @@ async def playwright_manager():
                     print("✅ Sessão do WhatsApp detectada!")
 
                 print("✅ [MOTOR OK] Agente Ninja pronto para receber missões!", flush=True)
+                startup.mark_ready("whatsapp")
+                retry_count = 0
+
+                # 🔒 Uma aba ativa por sessão: envios, caixa de entrada e supervisor se revezam na principal
+                session_lock = asyncio.Lock()
+
+                # 🩺 Sonda a aba principal e mantém uma aba reserva aquecida para trocas rápidas
+                wa_supervisor = PageSupervisor(
+                    context, page,
+                    probe_interval=WA_PROBE_INTERVAL,
+                    max_heap_mb=WA_PAGE_MAX_HEAP_MB,
+                    standby=WA_WARM_STANDBY,
+                    session_lock=session_lock,
+                )
+                await wa_supervisor.start()
 
-                # 🤝 Monitor de novas conversas (Auto-resposta)
-                last_checked_time = time.time()
-                print("👂 Monitor de conversas ativado! Respondendo automaticamente...", flush=True)
-
-                while True:
-                    # 🤝 VERIFICAR MENSAGENS RECEBIDAS (Prioridade baixa, roda entre envios)
-                    try:
-                        current_time = time.time()
-                        # Checa a cada 30 segundos
-                        if current_time - last_checked_time >= 30:
-                            last_checked_time = current_time
-                            
-                            # 1️⃣ Verifica NOVAS conversas (auto-resposta de boas-vindas)
-                            try:
-                                unread_badges = await page.query_selector("span[data-testid='unread-count']")
-                                if unread_badges:
-                                    print("📬 Detectada(s) mensagem(ns não lida(s), verificando...", flush=True)
-                                    await check_and_reply_new_messages(page, auto_responded_contacts, restaurante_id=None)
-                            except Exception as e:
-                                print(f"⚠️ Erro ao verificar novas conversas: {e}", flush=True)
-                            
-                            # 2️⃣ Verifica MENSAGENS RECEBIDAS em conversas existentes (respostas por intenção)
-                            try:
-                                await check_and_reply_incoming_messages(page, restaurante_id=None)
-                            except Exception as e:
-                                print(f"⚠️ Erro ao verificar mensagens recebidas: {e}", flush=True)
-                                
-                    except Exception as e:
-                        pass  # Silenciar erros de monitoramento para não atrapalhar envios
-
-                    task_data = await msg_queue.get()
-                    phone, message, customer_name = task_data['phone'], task_data['message'], task_data['customer_name']
-                    restaurante_id = task_data.get('restaurante_id')  # 🏪 Extrai ID do restaurante
-
-                    try:
-                        print(f"\n⚡ INICIANDO DISPARO: {customer_name} ({phone})", flush=True)
-                        
-                        # Verificação se ainda precisa de login antes de enviar
-                        if await page.query_selector("canvas"):
-                            print("❌ ABORTADO: Robô está deslogado. Escaneie o QR Code primeiro!")
-                            msg_queue.task_done()
-                            continue
-
-                        clean_phone = "".join(filter(str.isdigit, phone))
-                        if not clean_phone.startswith("55") and len(clean_phone) <= 11:
-                            clean_phone = "55" + clean_phone
-                        
-                        wp_url = f"https://web.whatsapp.com/send/?phone={clean_phone}&text={urllib.parse.quote(message)}&type=phone_number&app_absent=0"
-                        print(f"🔗 Abrindo chat de {customer_name}...", flush=True)
-                        
-                        # Tenta carregar o chat
+                # 🗂️ Envios pela aba ativa (a principal), revezando com a caixa de entrada: outra aba
+                # clicando em "Usar aqui" tiraria a sessão do vigia de conversas
+                dispatcher = PageDispatcher(lambda: wa_supervisor.primary, dispatch_whatsapp_task, session_lock)
+                dispatcher.start()
+
+                try:
+                    while True:
+                        # 👂 Vigia da caixa de entrada (eventos empurrados pela página, sem polling)
+                        watcher = InboxWatcher(
+                            page, lambda ev: msg_scheduler.put_nowait(inbound_lane(ev['title']), {'kind': 'inbox', **ev})
+                        )
+                        await watcher.start()
+                        print("👂 Monitor de conversas ativado! Respondendo automaticamente...", flush=True)
+
+                        # ⚖️ Um único consumidor retira do agendador por peso:
+                        # envios vão para o despachante e chats não lidos são atendidos, ambos na aba principal
                         try:
-                            await page.goto(wp_url, wait_until="load", timeout=60000)
-                            
-                            print("⏳ Aguardando processamento do WhatsApp...", flush=True)
-                            # Esperar o campo de texto carregar OU mensagem de erro de número inválido
-                            await page.wait_for_selector("div[contenteditable='true'], [data-testid='popup-controls-ok']", timeout=45000)
-                            
-                            # Verifica se o número é inválido
-                            invalid_popup = await page.query_selector("[data-testid='popup-controls-ok']")
-                            if invalid_popup:
-                                print(f"❌ ERRO: O número {phone} parece ser inválido para o WhatsApp.")
-                                await invalid_popup.click()
-                                await asyncio.sleep(2)
-                                continue
-
-                            print("🖱️ Focando no campo de mensagem...", flush=True)
-                            await page.click("div[contenteditable='true']")
-                            await asyncio.sleep(2)
-
-                            # Verificar se o texto está lá (às vezes a URL falha em preencher)
-                            text_exists = await page.evaluate("() => document.querySelector('div[contenteditable=\"true\"]').innerText.length > 0")
-                            if not text_exists:
-                                print("✍️ Texto não detectado! Digitando manualmente...", flush=True)
-                                await page.type("div[contenteditable='true']", message)
-                                await asyncio.sleep(2)
-                            
-                            print("🚀 Pressionando ENVIAR...", flush=True)
-                            # Tenta todos os seletores conhecidos de botão
-                            btn_selectors = [
-                                "span[data-icon='send']",
-                                "[data-testid='compose-btn-send']",
-                                "button[aria-label='Enviar']",
-                                "footer button"
-                            ]
-                            
-                            sent = False
-                            for sel in btn_selectors:
-                                btn = await page.query_selector(sel)
-                                if btn:
-                                    await btn.click()
-                                    print(f"✅ Botão '{sel}' clicado!", flush=True)
-                                    sent = True
-                                    break
-                            
-                            if not sent:
-                                await page.keyboard.press("Enter")
-                                print("⌨️ Tecla Enter disparada como fallback!", flush=True)
-                                
-                            print(f"🎯 CONCLUÍDO! Mensagem processada para {customer_name}.", flush=True)
-                            await asyncio.sleep(8) 
-                        except Exception as inner_e:
-                            print(f"❌ Falha técnica no chat: {inner_e}", flush=True)
-                            await page.keyboard.press("Enter")
-                            await asyncio.sleep(5)
-                        
-                    except Exception as e:
-                        print(f"⚠️ Erro no ciclo de envio: {e}", flush=True)
-                    finally:
-                        msg_queue.task_done()
+                            while True:
+                                lane, item = await watcher.guard(msg_scheduler.get())
+                                if item.get('kind') == 'inbox':
+                                    try:
+                                        async with session_lock:
+                                            await handle_inbox_event(page, item, restaurante_id=inbox_restaurant_id())
+                                    finally:
+                                        watcher.done(item['title'])
+                                else:
+                                    try:
+                                        await watcher.guard(dispatcher.submit(item))
+                                    except RuntimeError:
+                                        msg_scheduler.put_nowait(lane, item, front=True)
+                                        raise
+                        except RuntimeError:
+                            # Aba principal caiu: o supervisor troca só ela; o navegador só é relançado se o contexto caiu
+                            page = await wa_supervisor.replacement(page)
+                            if page is None:
+                                raise
+                            print("♻️ Religando o monitor de conversas na nova aba principal...", flush=True)
+                finally:
+                    await wa_supervisor.stop()
+                    # Motor caiu: o que não foi enviado volta para a frente da sua pista
+                    for task_data in reversed(await dispatcher.stop()):
+                        msg_scheduler.put_nowait(task_data.get('lane', 'status'), task_data, front=True)
                         
         except Exception as e:
             retry_count += 1
-            print(f"⚠️ Erro no Motor Playwright (Tentativa {retry_count}): {e}")
-            await asyncio.sleep(10)
+            delay = min(WA_RESTART_MAX_DELAY, 10 * 2 ** (retry_count - 1))
+            print(f"⚠️ Erro no Motor Playwright (Tentativa {retry_count}): {e}. Relançando em {delay:.0f}s...", flush=True)
+            await asyncio.sleep(delay)
 
 def start_pw_thread():
+    # Sem a memória de auto-respostas carregada todo contato pareceria novo
+    startup.wait_ready("contatos")
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     loop.run_until_complete(playwright_manager())
 
-# Inicia a thread do motor Playwright
-threading.Thread(target=start_pw_thread, daemon=True).start()
+def enqueue_whatsapp_task(task, lane):
+    """Grava a tarefa no diário e envia para a pista do agendador de forma segura entre threads"""
+    if not (pw_loop and msg_scheduler):
+        return False
+    task['lane'] = lane
+    task['queued_at'] = time.time()
+    task['journal_id'] = message_journal.append(task)
+    pw_loop.call_soon_threadsafe(msg_scheduler.put_nowait, lane, task)
+    return True
 
 def send_whatsapp_message(phone, message, customer_name):
-    # Envia a tarefa para a fila do Playwright de forma segura entre threads
-    if pw_loop and msg_queue:
-        pw_loop.call_soon_threadsafe(
-            msg_queue.put_nowait, 
-            {'phone': phone, 'message': message, 'customer_name': customer_name}
-        )
+    if enqueue_whatsapp_task({'phone': phone, 'message': message, 'customer_name': customer_name}, "status"):
         print(f"📥 [FILA NINJA] Tarefa agendada para: {customer_name}")
         return True
     print("⚠️ AVISO: O Motor de WhatsApp ainda está aquecendo. Tente em 30 segundos.")
@@ -830,33 +964,164 @@ def get_status():
     return jsonify({
         "status": "online",
         "printer": get_default_printer(),
-        "engine": "Ninja Matrix 1.0 (Local)"
+        "printer_inventory_age_s": printer_inventory.snapshot()["age_s"],
+        "print_queue": print_spooler.summary(),
+        "browser_install": browser_install.status(),
+        "startup": startup.readiness(),
+        "lazy_imports": lazy_stats(),
+        "headless": HEADLESS,
+        "engine": "Ninja Matrix 1.0 (Local)",
+        "whatsapp_insert_strategies": dict(insert_strategy_stats),
+        "whatsapp_lanes": msg_scheduler.stats() if msg_scheduler else {},
+        "supabase": supabase_client.stats() if supabase_client else None,
+        "order_mirror": order_mirror.stats() if order_mirror else None,
+        "pw_loop": {"lag": loop_lag.stats(), "io": pw_io.stats()},
+        "whatsapp_supervisor": wa_supervisor.stats() if wa_supervisor else None,
+        "whatsapp_resources": resource_policy.stats(),
+        "notify_pool": notify_pool.stats(),
+        "notify_backlog": {"pending": notify_backlog(), "max": NOTIFY_MAX_BACKLOG}
     })
 
 @app.route('/printers', methods=['GET'])
 def list_printers():
-    printers = [p[2] for p in win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS)]
-    return jsonify({"printers": printers})
+    inventory = printer_inventory.snapshot()
+    return jsonify({
+        "printers": inventory["printers"],
+        "default": inventory["default"],
+        "age_s": inventory["age_s"],
+        "refreshing": inventory["refreshing"]
+    })
 
 @app.route('/print', methods=['POST'])
 def print_content():
-    data = request.json
+    data = request.json or {}
     content = data.get('content')
-    printer_name = data.get('printer_name') or get_default_printer()
+    order = data.get('order')
+    printers = data.get('printers') or [data.get('printer_name') or get_default_printer()]
 
-    if not content:
+    if not content and not order:
         return jsonify({"success": False, "message": "Sem conteúdo"}), 400
 
-    # ✅ IMPRESSÃO DIRETA: Usa RAW mode (sem dialog do Windows)
-    print(f"🖨️ Impressão direta para: {printer_name}", flush=True)
-    success = print_raw_text(printer_name, content)
-    
-    if success:
-        print(f"✅ Comanda impressa com sucesso!", flush=True)
-    else:
-        print(f"❌ Falha na impressão", flush=True)
-    
-    return jsonify({"success": success})
+    pending = not_ready("impressoras", "spooler")
+    if pending:
+        return pending
+
+    rejected = reject_printers(printers)
+    if rejected:
+        return rejected
+
+    if not order:
+        # ✅ IMPRESSÃO DIRETA: texto pronto do painel, enfileirado no spooler (RAW, sem dialog do Windows)
+        printer_name = printers[0]
+        job = print_spooler.submit(printer_name, [encode_text(content, printer_profile(printer_name)[1])])
+        print(f"🖨️ Comanda enfileirada para: {printer_name} (Job {job.id})", flush=True)
+        return jsonify({"success": True, "job_id": job.id, "status": job.status}), 202
+
+    # 🧾 Pedido estruturado: renderiza em ESC/POS uma vez por perfil (largura + página de código)
+    ticket = data.get('ticket') or {}
+    rendered = {}
+    jobs = []
+    try:
+        for printer_name in printers:
+            profile = printer_profile(printer_name, ticket.get('paper_width'))
+            if profile not in rendered:
+                rendered[profile] = render_ticket(
+                    order,
+                    template=ticket.get('template', 'complete'),
+                    paper_width=profile[0],
+                    codepage=profile[1],
+                    company=ticket.get('company'),
+                    bairro_cidade=ticket.get('bairro_cidade', ''),
+                    reprint=bool(ticket.get('reprint')),
+                    logo_path=ICON_PATH if ticket.get('show_logo') else None,
+                    cut=ticket.get('autocut', True),
+                )
+            job = print_spooler.submit(printer_name, [rendered[profile]], doc_name=f"Fome Ninja Pedido {order.get('numero_pedido') or ''}".strip())
+            print(f"🧾 Pedido renderizado ({profile[0]}mm/{profile[1]}) para: {printer_name} (Job {job.id})", flush=True)
+            jobs.append({"printer": printer_name, "job_id": job.id, "status": job.status})
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        # Pedido malformado (campo com tipo errado, largura/página de código inválida)
+        return jsonify({"success": False, "message": f"Pedido inválido: {e}"}), 400
+
+    return jsonify({"success": True, "job_id": jobs[0]["job_id"], "status": jobs[0]["status"], "jobs": jobs}), 202
+
+@app.route('/print/batch', methods=['POST'])
+def print_batch():
+    """Imprime N tickets como páginas de UM documento RAW (um único job no spooler)"""
+    data = request.json or {}
+    tickets = data.get('tickets') or []
+    pending = not_ready("impressoras", "spooler")
+    if pending:
+        return pending
+    printer_name = data.get('printer_name') or get_default_printer()
+    rejected = reject_printers([printer_name])
+    if rejected:
+        return rejected
+
+    ticket_opts = data.get('ticket') or {}
+    paper_width, codepage = printer_profile(printer_name, ticket_opts.get('paper_width'))
+
+    # Aceita ["texto", ...], [{"content": "texto"}, ...] e [{"order": {...}}, ...] (pedido estruturado)
+    rendered = []
+    try:
+        for t in tickets:
+            order = t.get('order') if isinstance(t, dict) else None
+            if order:
+                opts = {**ticket_opts, **(t.get('ticket') or {})}
+                rendered.append(render_ticket(
+                    order,
+                    template=opts.get('template', 'complete'),
+                    paper_width=paper_width,
+                    codepage=codepage,
+                    company=opts.get('company'),
+                    bairro_cidade=opts.get('bairro_cidade', ''),
+                    reprint=bool(opts.get('reprint')),
+                    logo_path=ICON_PATH if opts.get('show_logo') else None,
+                    cut=False,  # o corte entre tickets vem do batch_pages
+                ))
+                continue
+            content = t.get('content') if isinstance(t, dict) else t
+            if content:
+                # Mesma página de código do renderizador: acentos certos na térmica
+                rendered.append(encode_text(content, codepage))
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        return jsonify({"success": False, "message": f"Ticket inválido: {e}"}), 400
+
+    if not rendered:
+        return jsonify({"success": False, "message": "Nenhum ticket para imprimir"}), 400
+
+    pages = batch_pages(rendered)
+    job = print_spooler.submit(printer_name, pages, doc_name=f"Fome Ninja Lote ({len(pages)})")
+    print(f"🖨️ Lote de {len(pages)} comandas enfileirado para: {printer_name} (Job {job.id})", flush=True)
+
+    return jsonify({"success": True, "job_id": job.id, "status": job.status, "tickets": len(pages)}), 202
+
+@app.route('/print/jobs/<job_id>', methods=['GET'])
+def get_print_job(job_id):
+    job = print_spooler.get_job(job_id)
+    if not job:
+        return jsonify({"success": False, "message": "Trabalho não encontrado"}), 404
+    return jsonify(job.to_dict())
+
+# 🏊 Pool limitado para o /notify (fila cheia = 429 + Retry-After, sem criar threads sem fim)
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "4"))
+NOTIFY_QUEUE_DEPTH = int(os.getenv("NOTIFY_QUEUE_DEPTH", "200"))
+notify_pool = BoundedExecutor(max_workers=NOTIFY_WORKERS, max_queue=NOTIFY_QUEUE_DEPTH, name="notify")
+# 🚦 Contrapressão de verdade: o acúmulo fica na pista "status" do agendador (um envio leva segundos)
+NOTIFY_MAX_BACKLOG = int(os.getenv("NOTIFY_MAX_BACKLOG", "100"))
+
+def notify_backlog():
+    """Notificações esperando envio: na pista de status do agendador + ainda no pool"""
+    depth = msg_scheduler.depth("status") if msg_scheduler else 0
+    return depth + notify_pool.pending()
+
+def notify_retry_after(backlog):
+    """Segundos até a pista de status voltar para baixo do limite (mínimo 1)"""
+    excess = max(backlog - NOTIFY_MAX_BACKLOG + 1, 1)
+    if msg_scheduler:
+        return max(1, int(round(msg_scheduler.drain_eta(excess))))
+    return notify_pool.retry_after()
+
 
 @app.route('/notify', methods=['POST'])
 def notify():
@@ -870,56 +1135,79 @@ def notify():
     if not phone or phone == 'Telefone não cadastrado':
         return jsonify({"success": False, "message": "Telefone inválido"}), 400
 
-    # 🛡️ Garantir envio único por status de pedido
-    notif_id = (order_id, status_key)
-    if order_id and notif_id in sent_notifications:
+    # 🛡️ Garantir envio único por status de pedido (check-and-set atômico)
+    notif_id = DedupStore.make_key(order_id, status_key)
+    if order_id and not sent_notifications.claim(notif_id):
         print(f"🚫 Notificacao já enviada para {customer_name} (Status: {status_key})", flush=True)
         return jsonify({"success": True, "message": "Já enviado"}), 200
 
+    backlog = notify_backlog()
+    if backlog >= NOTIFY_MAX_BACKLOG:
+        return reject_notify(notif_id if order_id else None, customer_name, notify_retry_after(backlog))
+
     def process_task():
         print(f"🤖 Preparando mensagem p/ {customer_name} (Status: {status_key})...", flush=True)
 
         # Gera mensagem usando a Matriz Ninja (JSON Local)
         msg = generate_matrix_message(status_key, customer_name, codigo_entrega)
 
-        # Registrar como enviada para evitar duplicidade
-        if order_id:
-            sent_notifications.add(notif_id)
-
-        # Envio Real
-        send_whatsapp_message(phone, msg, customer_name)
+        # Envio Real (se o motor não estiver pronto, libera para o painel tentar de novo)
+        if not send_whatsapp_message(phone, msg, customer_name) and order_id:
+            sent_notifications.release(notif_id)
 
-    threading.Thread(target=process_task).start()
+    if not notify_pool.try_submit(process_task):
+        return reject_notify(notif_id if order_id else None, customer_name, notify_pool.retry_after())
     return jsonify({"success": True})
 
 
+def reject_notify(notif_id, customer_name, retry_after):
+    """429 + Retry-After; devolve a vaga do dedup para o painel poder tentar de novo"""
+    if notif_id:
+        sent_notifications.release(notif_id)
+    print(f"🚦 Fila de notificações cheia, recusando {customer_name} (tente em {retry_after}s)", flush=True)
+    response = jsonify({"success": False, "message": "Fila de notificações cheia", "retry_after": retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+
 @app.route('/auto-reply/contacts', methods=['GET'])
 def get_auto_reply_contacts():
-    """Lista contatos que já receberam auto-resposta"""
+    """Lista contatos que já receberam auto-resposta (paginado, opcional por restaurante)"""
+    pending = not_ready("contatos")
+    if pending:
+        return pending
+    restaurante_id = request.args.get('restaurante_id')
+    limit = request.args.get('limit', 100, type=int)
+    offset = request.args.get('offset', 0, type=int)
     return jsonify({
-        "total": len(auto_responded_contacts),
-        "contacts": list(auto_responded_contacts)
+        "total": auto_responded_contacts.count(restaurante_id),
+        "contacts": auto_responded_contacts.phones(restaurante_id, limit=limit, offset=offset)
     })
 
 
 @app.route('/auto-reply/reset', methods=['POST'])
 def reset_auto_reply():
-    """Reseta cache de auto-resposta (opcional: para contato específico ou todos)"""
+    """Reseta cache de auto-resposta (opcional: para contato específico, restaurante ou todos)"""
+    pending = not_ready("contatos")
+    if pending:
+        return pending
     data = request.json or {}
     phone = data.get('phone')
+    restaurante_id = data.get('restaurante_id')
     
     if phone:
         clean_phone = "".join(filter(str.isdigit, phone))
         if not clean_phone.startswith("55") and len(clean_phone) <= 11:
             clean_phone = "55" + clean_phone
         
-        if clean_phone in auto_responded_contacts:
-            del auto_responded_contacts[clean_phone]
+        if auto_responded_contacts.forget_phone(clean_phone):
             return jsonify({"success": True, "message": f"Contato {phone} liberado para auto-resposta"})
         return jsonify({"success": False, "message": "Contato não encontrado"}), 404
+    elif restaurante_id:
+        count = auto_responded_contacts.forget_restaurant(restaurante_id)
+        return jsonify({"success": True, "message": f"Cache de auto-resposta do restaurante resetado ({count} contatos)"})
     else:
-        count = len(auto_responded_contacts)
-        auto_responded_contacts.clear()
+        count = auto_responded_contacts.clear()
         return jsonify({"success": True, "message": f"Cache de auto-resposta resetado ({count} contatos)"})
 
 
@@ -935,6 +1223,8 @@ def register_restaurant():
     if not restaurante_id or not cardapio_link:
         return jsonify({"success": False, "message": "restaurante_id e cardapio_link são obrigatórios"}), 400
     
+    # Reposiciona no fim: o último registrado é o restaurante da caixa de entrada (sem RESTAURANTE_ID)
+    restaurantes_cache.pop(restaurante_id, None)
     restaurantes_cache[restaurante_id] = {
         'nome': restaurante_nome,
         'link': cardapio_link
@@ -949,6 +1239,35 @@ def register_restaurant():
     })
 
 
+@app.route('/intent-keywords', methods=['POST'])
+def register_intent_keywords():
+    """Carrega/troca palavras-chave extras de um restaurante sem reiniciar o agent"""
+    data = request.json or {}
+    restaurante_id = data.get('restaurante_id')
+    keywords = data.get('keywords')
+
+    if not restaurante_id or not isinstance(keywords, dict):
+        return jsonify({"success": False, "message": "restaurante_id e keywords ({intencao: [palavras]}) são obrigatórios"}), 400
+
+    try:
+        intent_matcher.set_restaurant_keywords(restaurante_id, keywords)
+    except ValueError as e:
+        return jsonify({"success": False, "message": f"Palavras-chave inválidas: {e}"}), 400
+    print(f"🎯 Palavras-chave atualizadas para o restaurante {restaurante_id}", flush=True)
+    return jsonify({"success": True, "message": "Palavras-chave atualizadas"})
+
+
+@app.route('/intent-keywords/detect', methods=['POST'])
+def detect_intent_keywords():
+    """Detecta a intenção de uma mensagem como a caixa de entrada faria (confere as palavras-chave do restaurante)"""
+    data = request.json or {}
+    restaurante_id = data.get('restaurante_id') or inbox_restaurant_id()
+    return jsonify({
+        "restaurante_id": restaurante_id,
+        "intencao": detectar_intencao_mensagem(data.get('mensagem') or "", restaurante_id)
+    })
+
+
 @app.route('/auto-reply/send', methods=['POST'])
 def trigger_auto_reply():
     """Dispara auto-resposta para um contato específico (chamado pelo painel web)"""
@@ -960,39 +1279,32 @@ def trigger_auto_reply():
     
     if not phone:
         return jsonify({"success": False, "message": "Telefone é obrigatório"}), 400
+
+    pending = not_ready("contatos")
+    if pending:
+        return pending
     
     # Verifica se já respondeu para este contato neste restaurante
     clean_phone = "".join(filter(str.isdigit, phone))
     if not clean_phone.startswith("55") and len(clean_phone) <= 11:
         clean_phone = "55" + clean_phone
     
-    if clean_phone not in auto_responded_contacts:
-        auto_responded_contacts[clean_phone] = {}
-    
-    if restaurante_id and restaurante_id in auto_responded_contacts[clean_phone]:
+    if restaurante_id and auto_responded_contacts.has(clean_phone, restaurante_id):
         return jsonify({"success": True, "message": "Já respondeu para este contato neste restaurante"}), 200
     
     # Gera mensagem com link do restaurante específico
     reply_msg = generate_auto_reply_message(customer_name, restaurante_id)
     
-    # Envia via fila do Playwright
-    if pw_loop and msg_queue:
-        pw_loop.call_soon_threadsafe(
-            msg_queue.put_nowait,
-            {
-                'phone': phone, 
-                'message': reply_msg, 
-                'customer_name': customer_name,
-                'is_auto_reply': True,
-                'restaurante_id': restaurante_id
-            }
-        )
-        
+    # Envia via fila do Playwright (passando pelo diário)
+    if enqueue_whatsapp_task({
+        'phone': phone,
+        'message': reply_msg,
+        'customer_name': customer_name,
+        'is_auto_reply': True,
+        'restaurante_id': restaurante_id
+    }, "auto_reply"):
         # Marca como respondido
-        if restaurante_id:
-            auto_responded_contacts[clean_phone][restaurante_id] = time.time()
-        else:
-            auto_responded_contacts[clean_phone]["default"] = time.time()
+        auto_responded_contacts.mark(clean_phone, restaurante_id)
         
         print(f"📨 Auto-resposta agendada para {customer_name} ({phone})", flush=True)
         return jsonify({"success": True, "message": "Auto-resposta agendada"})
@@ -1020,6 +1332,7 @@ def on_connect_whatsapp(icon, item):
 def on_reset_auto_reply(icon, item):
     """Reseta cache de auto-resposta pelo menu do tray"""
     print("🔄 Resetando cache de auto-resposta...", flush=True)
+    startup.wait_ready("contatos")
     auto_responded_contacts.clear()
     print("✅ Cache resetado! Novas conversas serão respondidas automaticamente.", flush=True)
 
@@ -1036,9 +1349,10 @@ def on_view_restaurantes(icon, item):
 
 def setup_tray():
     try:
-        image = Image.open(ICON_PATH)
+        image = PIL_Image.open(ICON_PATH)
     except:
-        image = Image.new('RGB', (64, 64), color=(255, 69, 0))
+        image = PIL_Image.new('RGB', (64, 64), color=(255, 69, 0))
+    item = pystray.MenuItem
 
     menu = (
         item('Abrir Painel Ninja', on_open_dashboard),
@@ -1051,27 +1365,94 @@ def setup_tray():
     )
     
     icon = pystray.Icon("Fome Ninja", image, "Fome Ninja Agent", menu)
-    icon.run()
+
+    def on_tray_ready(icon):
+        icon.visible = True
+        startup.mark_ready("bandeja")
+
+    icon.run(setup=on_tray_ready)
+
+# 🌐 Servidor HTTP: "waitress" (produção, multi-thread) ou "dev" (servidor de desenvolvimento do Flask)
+SERVER_MODE = os.getenv("AGENT_SERVER", "waitress").lower()
+SERVER_THREADS = int(os.getenv("AGENT_SERVER_THREADS", "8"))
+SERVER_CONNECTION_LIMIT = int(os.getenv("AGENT_SERVER_CONNECTION_LIMIT", "200"))
+SERVER_CHANNEL_TIMEOUT = int(os.getenv("AGENT_SERVER_CHANNEL_TIMEOUT", "30"))  # conexão keep-alive ociosa (s)
+SERVER_BACKLOG = int(os.getenv("AGENT_SERVER_BACKLOG", "1024"))
 
 def run_flask():
+    if SERVER_MODE == "waitress":
+        try:
+            from waitress import serve
+        except ImportError:
+            print("⚠️ waitress não instalado (pip install waitress). Usando o servidor de desenvolvimento.", flush=True)
+        else:
+            print(f"🚀 Servidor (waitress, {SERVER_THREADS} threads) rodando na porta {PORT}...", flush=True)
+            serve(
+                app,
+                host="127.0.0.1",
+                port=PORT,
+                threads=SERVER_THREADS,
+                connection_limit=SERVER_CONNECTION_LIMIT,
+                channel_timeout=SERVER_CHANNEL_TIMEOUT,
+                backlog=SERVER_BACKLOG,
+                ident="FomeNinjaAgent",
+            )
+            return
     print(f"🚀 Servidor rodando na porta {PORT}...", flush=True)
-    app.run(port=PORT, debug=False, use_reloader=False)
+    app.run(port=PORT, debug=False, use_reloader=False, threaded=True)
+
+startup.checkpoint("rotas")
+
+def flask_listening():
+    """O servidor já aceita conexões na porta do agente?"""
+    try:
+        with socket.create_connection(("127.0.0.1", PORT), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+def open_dashboard_when_ready():
+    """Abre o painel assim que o Flask atende (em vez de um atraso fixo)"""
+    deadline = time.time() + 30
+    while not startup.is_ready("flask") and time.time() < deadline:
+        time.sleep(0.1)
+    webbrowser.open(DASHBOARD_URL)
 
 if __name__ == '__main__':
     try:
+        startup.checkpoint("modulo")
         print("="*50)
         print("      🥷 FOME NINJA - AGENTE 100% LOCAL 🚀")
         print("="*50)
         
-        print(f"Impressora Padrao: {get_default_printer()}")
-        print("="*50)
-        
-        t = threading.Thread(target=run_flask)
-        t.daemon = True
-        t.start()
-        
-        threading.Timer(2, lambda: webbrowser.open(DASHBOARD_URL)).start()
-        setup_tray()
+        # 🚦 Servidor primeiro (o /status responde já); as fases pesadas e independentes rodam em paralelo
+        # e cada subsistema avisa quando fica pronto (/status -> startup). Rotas esperam a fase que usam.
+        startup.run_parallel("servidor", run_flask, ready=False)
+        startup.track("flask", flask_listening)
+        startup.run_parallel("contatos", auto_responded_contacts.load)
+        startup.run_parallel("spooler", restore_print_queue)
+        startup.run_parallel("impressoras", start_printer_inventory)
+        startup.run_parallel("verificacao_chromium", browser_install.start)
+        startup.track("chromium", browser_install.ready.is_set)
+        startup.track("inventario_impressoras", lambda: printer_inventory.snapshot()["refreshed_at"] is not None)
+        # Motor do WhatsApp: a thread espera a fase "contatos" antes de abrir o navegador
+        threading.Thread(target=start_pw_thread, name="playwright", daemon=True).start()
+        if order_mirror is not None:
+            startup.track("espelho_pedidos", lambda: order_mirror.fresh)
+        startup.expect("whatsapp")
+        if HEADLESS:
+            startup.write_timeline()
+            print("🖥️ Modo serviço: sem bandeja. Ctrl+C (ou parar o serviço) encerra o agente.", flush=True)
+            while True:
+                time.sleep(3600)
+        else:
+            startup.expect("bandeja")
+            startup.run_parallel("painel", open_dashboard_when_ready)
+            startup.write_timeline()
+            setup_tray()
+    except KeyboardInterrupt:
+        print("👋 Agente encerrado.", flush=True)
+        os._exit(0)
     except Exception as e:
         import traceback
         error_msg = f"❌ ERRO FATAL AO INICIAR AGENTE: {e}\n{traceback.format_exc()}"
@@ -0,0 +1,130 @@
+"""
+⏱️ Benchmark - Tempo de Importação (-X importtime)
+
+Roda cada cenário num Python novo com -X importtime e resume o custo das
+importações de topo: o bloco antigo do agent.py (tudo importado de uma vez,
+incluindo pyautogui, que não era usado) contra o que o agente importa agora
+antes do servidor HTTP atender (Flask + dotenv; o mutex vai por ctypes).
+
+A camada preguiçosa tira as dependências do caminho até o servidor, não da
+subida inteira: o win32print (inventário), o Playwright (motor) e, no modo
+bandeja, pystray + PIL ainda carregam logo depois, em threads próprias. Os
+cenários "fundo_*" mostram esse custo; só o "sob_demanda" é de primeiro uso.
+
+    py bench_imports.py --save imports.json
+    py bench_imports.py --baseline imports.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = {
+    # Bloco de importação do agent.py antes da camada preguiçosa
+    "eager": [
+        "flask", "flask_cors", "win32print", "win32ui", "win32con", "win32event", "winerror", "win32api",
+        "PIL.Image", "pystray", "pyautogui", "playwright.async_api", "dotenv",
+    ],
+    # O que é importado antes do servidor HTTP atender (modo bandeja e modo serviço)
+    "lazy": ["flask", "flask_cors", "dotenv", "lazy_imports"],
+    # Carregado logo após a subida, em threads de fundo (inventário de impressoras, motor WhatsApp)
+    "fundo_servico": ["win32print", "win32event", "playwright.async_api"],
+    # Modo bandeja: o mesmo fundo mais o ícone da bandeja
+    "fundo_bandeja": ["win32print", "win32event", "playwright.async_api", "pystray", "PIL.Image"],
+    # Só no primeiro uso: aviso de instância duplicada (MessageBox)
+    "on_demand": ["win32api", "win32con"],
+}
+
+
+def profile(modules):
+    """Importa os módulos num interpretador novo; retorna ({módulo_topo: µs}, [faltando])"""
+    # __import__ (e não importlib.import_module) para o -X importtime registrar o módulo
+    code = (
+        "import sys\n"
+        "sys.stderr.write('--- cenario ---\\n')\n"
+        f"for name in {modules!r}:\n"
+        "    try:\n"
+        "        __import__(name)\n"
+        "    except Exception:\n"
+        "        print(name)\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=HERE,
+    )
+    # Ignora o que o próprio interpretador importa ao subir (site, encodings...)
+    stderr = proc.stderr.split("--- cenario ---\n", 1)[-1]
+    cumulative = {}
+    for line in stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumul_us, name = line[len("import time:"):].split("|", 2)
+        name = name[1:]
+        # Só o nível de topo (sem recuo): o cumulativo já inclui os submódulos
+        if not name.startswith(" "):
+            cumulative[name] = cumulative.get(name, 0) + int(cumul_us)
+    missing = proc.stdout.split()
+    return cumulative, missing
+
+
+def run_scenario(name, repeat):
+    totals = []
+    last = {}
+    missing = []
+    for _ in range(repeat):
+        cumulative, missing = profile(SCENARIOS[name])
+        totals.append(sum(cumulative.values()) / 1000)
+        last = cumulative
+    top = sorted(last.items(), key=lambda kv: kv[1], reverse=True)[:8]
+    return {
+        "total_ms": round(statistics.median(totals), 1),
+        "runs_ms": [round(t, 1) for t in totals],
+        "top": [{"module": mod, "ms": round(us / 1000, 1)} for mod, us in top],
+        "missing": missing,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de importação das dependências do agente")
+    parser.add_argument("--repeat", type=int, default=5, help="interpretadores novos por cenário (mediana)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--save", help="grava o resultado em JSON")
+    parser.add_argument("--baseline", help="JSON de uma rodada anterior para comparar")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenarios.split(","):
+        result = results[name] = run_scenario(name, args.repeat)
+        print(f"\n📦 {name}: {result['total_ms']:.1f} ms (mediana de {args.repeat})")
+        for entry in result["top"]:
+            print(f"   {entry['ms']:8.1f} ms  {entry['module']}")
+        if result["missing"]:
+            print(f"   ⚠️ não instalados (fora da conta): {', '.join(result['missing'])}")
+
+    if "eager" in results and "lazy" in results:
+        saved = results["eager"]["total_ms"] - results["lazy"]["total_ms"]
+        print(f"\n💤 Até o servidor atender, sem a camada eager: {saved:.1f} ms a menos")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n📊 Comparação com a rodada anterior:")
+        for name, result in results.items():
+            before = baseline.get(name, {}).get("total_ms")
+            if before:
+                print(f"   {name}: {before:.1f} ms -> {result['total_ms']:.1f} ms")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Resultado salvo em {args.save}")
+
+
+if __name__ == "__main__":
+    main()
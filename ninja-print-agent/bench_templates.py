@@ -0,0 +1,55 @@
+"""
+⏱️ Micro-benchmark - Geração de Mensagens
+
+Compara o custo por mensagem do jeito antigo (abrir + json.load do
+mensagens_reserva.json e str.replace encadeado a cada notificação) com o
+motor de templates pré-compilado.
+
+Uso: py bench_templates.py
+"""
+
+import json
+import os
+import random
+import timeit
+
+from message_templates import MessageTemplates
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mensagens_reserva.json")
+N = 20000
+
+
+def legacy_matrix_message(status_key, customer_name, codigo_entrega=None):
+    """Cópia fiel do generate_matrix_message anterior (lê o JSON a cada chamada)"""
+    with open(PATH, 'r', encoding='utf-8') as f:
+        matriz = json.load(f)
+
+    saudacoes = matriz.get('saudacoes', ["Olá, {customer_name}!"])
+    corpos = matriz.get('corpos', {}).get(status_key, ["Seu pedido foi atualizado."])
+    fechamentos = matriz.get('fechamentos', ["😉"])
+
+    mensagem = f"{random.choice(saudacoes)} {random.choice(corpos)} {random.choice(fechamentos)}"
+    mensagem = mensagem.replace("{customer_name}", customer_name)
+    if codigo_entrega:
+        mensagem = mensagem.replace("{codigo_entrega}", str(codigo_entrega))
+    return mensagem
+
+
+def main():
+    templates = MessageTemplates(PATH)
+
+    antigo = timeit.timeit(lambda: legacy_matrix_message("coletado", "Ninja de Teste", "1234"), number=N)
+    novo = timeit.timeit(
+        lambda: templates.status_message("coletado", customer_name="Ninja de Teste", codigo_entrega="1234"), number=N
+    )
+
+    print("=" * 60)
+    print(f"🥷 Benchmark de mensagens ({N} renderizações)")
+    print("=" * 60)
+    print(f"Antes  (json.load + replace): {antigo / N * 1e6:8.2f} µs/mensagem")
+    print(f"Depois (templates compilados): {novo / N * 1e6:8.2f} µs/mensagem")
+    print(f"Ganho: {antigo / novo:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+📏 Medição - WhatsApp Web com e sem o filtro de recursos
+
+Abre o WhatsApp Web no perfil do agente, alternando sem filtro e com o
+ResourcePolicy, e mede o tempo até a lista de conversas (ou o QR Code)
+aparecer, o heap JS da aba (CDP Performance.getMetrics) e, com psutil
+instalado, a memória RSS somada de todos os processos do Chromium.
+
+Feche o agente antes (o perfil do Chromium só abre em um processo):
+
+    py bench_wa_resources.py --runs 3 --settle 30 --save recursos.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from lazy_imports import lazy, dependency_available
+from wa_resources import ResourcePolicy, parse_list, DEFAULT_BLOCK_TYPES, DEFAULT_BLOCK_HOSTS
+from wa_supervisor import WHATSAPP_URL, CHAT_LIST_SELECTOR, QR_SELECTOR
+
+pw_async_api = lazy("playwright.async_api")
+psutil = lazy("psutil")
+
+
+def chromium_rss_mb(profile):
+    """RSS somado dos processos do Chromium deste perfil (None sem psutil)"""
+    if not dependency_available("psutil"):
+        return None
+    total = 0
+    for proc in psutil.process_iter(["cmdline", "memory_info"]):
+        try:
+            cmdline = " ".join(proc.info["cmdline"] or [])
+            if f"--user-data-dir={profile}" in cmdline and proc.info["memory_info"]:
+                total += proc.info["memory_info"].rss
+        except Exception:
+            continue
+    return round(total / 1048576, 1)
+
+
+async def measure(p, profile, policy, settle):
+    context = await p.chromium.launch_persistent_context(
+        profile,
+        headless=False,
+        viewport={'width': 1280, 'height': 720},
+        ignore_https_errors=True,
+        reduced_motion="reduce" if policy.enabled else "no-preference",
+        args=["--disable-blink-features=AutomationControlled", "--no-sandbox"],
+    )
+    try:
+        await policy.install(context)
+        page = await context.new_page()
+        requests = []
+        page.on("request", lambda req: requests.append(req.resource_type))
+        cdp = await context.new_cdp_session(page)
+        await cdp.send("Performance.enable")
+
+        start = time.perf_counter()
+        await page.goto(WHATSAPP_URL, wait_until="domcontentloaded", timeout=180000)
+        await page.wait_for_selector(f"{CHAT_LIST_SELECTOR}, {QR_SELECTOR}", timeout=180000)
+        load_s = time.perf_counter() - start
+
+        # Deixa as fotos/miniaturas da lista terminarem de chegar antes de medir a memória
+        await asyncio.sleep(settle)
+        metrics = {m["name"]: m["value"] for m in (await cdp.send("Performance.getMetrics"))["metrics"]}
+        return {
+            "load_s": round(load_s, 2),
+            "js_heap_mb": round(metrics.get("JSHeapUsedSize", 0) / 1048576, 1),
+            "rss_mb": chromium_rss_mb(profile),
+            "requests": len(requests),
+            "blocked": policy.stats()["blocked"],
+        }
+    finally:
+        await context.close()
+
+
+def summarize(runs):
+    keys = ("load_s", "js_heap_mb", "rss_mb", "requests", "blocked")
+    return {
+        key: round(statistics.median(r[key] for r in runs), 2) if runs[0][key] is not None else None
+        for key in keys
+    }
+
+
+async def run(args):
+    modes = {
+        "sem_filtro": lambda: ResourcePolicy((), ()),
+        "com_filtro": lambda: ResourcePolicy(parse_list(args.block), parse_list(args.hosts)),
+    }
+    results = {name: [] for name in modes}
+    async with pw_async_api.async_playwright() as p:
+        # Alterna os modos a cada rodada para o cache de disco pesar igual nos dois
+        for i in range(args.runs):
+            for name, make_policy in modes.items():
+                result = await measure(p, args.profile, make_policy(), args.settle)
+                results[name].append(result)
+                print(f"   rodada {i + 1} {name}: {result}", flush=True)
+    return {name: {"median": summarize(runs), "runs": runs} for name, runs in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória e carregamento do WhatsApp Web com/sem filtro de recursos")
+    parser.add_argument("--profile", default="C:\\ninja_wp_data", help="perfil do Chromium (o do agente, logado)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--settle", type=float, default=30.0, help="segundos após carregar antes de medir a memória")
+    parser.add_argument("--block", default=",".join(DEFAULT_BLOCK_TYPES))
+    parser.add_argument("--hosts", default=",".join(DEFAULT_BLOCK_HOSTS))
+    parser.add_argument("--save", help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    if not dependency_available("psutil"):
+        print("ℹ️ psutil não instalado: medindo só o heap JS (pip install psutil para o RSS do Chromium)")
+
+    results = asyncio.run(run(args))
+    before, after = results["sem_filtro"]["median"], results["com_filtro"]["median"]
+    print("\n📏 Mediana                 sem filtro   com filtro")
+    for key, label in (("load_s", "carregamento (s)"), ("js_heap_mb", "heap JS (MB)"),
+                       ("rss_mb", "RSS Chromium (MB)"), ("requests", "requisições"), ("blocked", "bloqueadas")):
+        if before[key] is not None:
+            print(f"   {label:<22}{before[key]:>10}   {after[key]:>10}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Resultado salvo em {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+🧭 Verificação Rápida do Chromium do Playwright
+
+Antes, todo início rodava "playwright install chromium" (subprocesso de
+vários segundos, às vezes com rede) antes do Flask subir. Agora um manifesto
+guarda a versão do Playwright e o caminho/tamanho/data do executável do
+Chromium; se bater (um os.stat), o motor está pronto na hora. Só quando a
+verificação falha o instalador roda, e em segundo plano.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+
+def playwright_version():
+    try:
+        from importlib.metadata import version
+        return version("playwright")
+    except Exception:
+        pass
+    try:
+        from playwright._repo_version import version
+        return version
+    except Exception:
+        return "desconhecida"
+
+
+def chromium_executable():
+    """Caminho do Chromium que o Playwright vai usar (sobe o driver: lento, só no caminho lento)"""
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        return p.chromium.executable_path
+
+
+def run_installer():
+    """Mesma rotina de antes: python -m playwright install chromium (com fallback pro python do PATH)"""
+    python_exe = sys.executable if not getattr(sys, 'frozen', False) else "python"
+    try:
+        subprocess.run([python_exe, "-m", "playwright", "install", "chromium"], capture_output=True, check=True)
+    except Exception:
+        print("⚙️ Tentando instalar componentes (Aguarde)...", flush=True)
+        subprocess.run(["python", "-m", "playwright", "install", "chromium"], check=True)
+
+
+class BrowserInstall:
+    """Estado da instalação do Chromium: caminho rápido por manifesto, instalação em segundo plano"""
+
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.ready = threading.Event()
+        self.state = "pendente"  # pendente -> pronto | instalando -> pronto | falhou
+        self.error = None
+        self.check_ms = None
+        self._thread = None
+
+    def start(self):
+        """Verificação barata agora; se falhar, instala numa thread e retorna na hora"""
+        start = time.perf_counter()
+        ok = self.fast_check()
+        self.check_ms = round((time.perf_counter() - start) * 1000, 2)
+        if ok:
+            self.state = "pronto"
+            self.ready.set()
+            print(f"✅ Motores ninja prontos! (manifesto, {self.check_ms} ms)", flush=True)
+            return
+        self.state = "instalando"
+        print("🔍 Verificando motores ninja em segundo plano...", flush=True)
+        self._thread = threading.Thread(target=self._install, name="playwright-install", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        return self.ready.wait(timeout)
+
+    def fast_check(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("playwright") != playwright_version():
+                return False
+            if manifest.get("browsers_path") != os.environ.get("PLAYWRIGHT_BROWSERS_PATH"):
+                return False
+            st = os.stat(manifest["executable"])
+            return st.st_size == manifest["size"] and int(st.st_mtime) == manifest["mtime"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def status(self):
+        return {"state": self.state, "error": self.error, "check_ms": self.check_ms}
+
+    def _install(self):
+        try:
+            run_installer()
+            executable = chromium_executable()
+            st = os.stat(executable)
+            self._write_manifest({
+                "playwright": playwright_version(),
+                "browsers_path": os.environ.get("PLAYWRIGHT_BROWSERS_PATH"),
+                "executable": executable,
+                "size": st.st_size,
+                "mtime": int(st.st_mtime),
+                "checked_at": time.time(),
+            })
+            self.state = "pronto"
+            print("✅ Motores ninja prontos!", flush=True)
+        except Exception as e:
+            self.state = "falhou"
+            self.error = str(e)
+            print(f"❌ Erro ao instalar componentes: {e}. Certifique-se que o Python está no PATH.", flush=True)
+        finally:
+            # Mesmo com falha o motor tenta subir (o Chromium pode já estar lá)
+            self.ready.set()
+
+    def _write_manifest(self, manifest):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
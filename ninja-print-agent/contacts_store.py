@@ -0,0 +1,195 @@
+"""
+🤝 Memória de Auto-Respostas (quem já recebeu boas-vindas)
+
+Substitui o dict {telefone: {restaurante_id: timestamp}} que crescia para
+sempre. Cada par (telefone, restaurante) tem validade (TTL), o total de
+entradas é limitado com despejo LRU e há um índice por restaurante, então
+listar/contar/resetar um restaurante não varre todos os telefones.
+
+A memória é gravada em SQLite (write-through) e recarregada na inicialização,
+para um reinício não reenviar boas-vindas para todo mundo. Com preload=False a
+recarga fica para load(), que o agente roda numa fase paralela da subida.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_RESTAURANT = "default"
+
+
+class AutoReplyStore:
+    """Pares (telefone, restaurante) com TTL, limite LRU e índice por restaurante"""
+
+    def __init__(self, path=None, ttl_seconds=30 * 24 * 3600, max_entries=50000, sweep_interval=600, preload=True):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.time()
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # {(phone, rid): timestamp} em ordem de uso (LRU)
+        self._by_restaurant = {}  # {rid: {phone: None}} (dict como conjunto ordenado)
+        self._by_phone = {}  # {phone: {rid: None}}
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS auto_reply ("
+                " phone TEXT NOT NULL,"
+                " restaurante_id TEXT NOT NULL,"
+                " ts REAL NOT NULL,"
+                " PRIMARY KEY (phone, restaurante_id))"
+            )
+            if preload:
+                self._load()
+
+    def load(self):
+        """Recarrega as entradas válidas do SQLite (quando criado com preload=False)"""
+        if self._conn:
+            with self._lock:
+                self._load()
+
+    # --- Consulta ---
+
+    def has(self, phone, restaurante_id=None):
+        """Já respondeu este telefone neste restaurante (e a entrada ainda vale)?"""
+        key = (phone, restaurante_id or DEFAULT_RESTAURANT)
+        with self._lock:
+            ts = self._entries.get(key)
+            # Só memória (roda no loop do Playwright): a vencida conta como ausente e o sweep() apaga
+            if ts is None or self._expired(ts):
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def has_phone(self, phone):
+        """Já respondeu este telefone em algum restaurante?"""
+        with self._lock:
+            return any(self.has(phone, rid) for rid in list(self._by_phone.get(phone, ())))
+
+    def count(self, restaurante_id=None):
+        with self._lock:
+            if restaurante_id is None:
+                return len(self._by_phone)
+            return len(self._by_restaurant.get(restaurante_id, ()))
+
+    def phones(self, restaurante_id=None, limit=100, offset=0):
+        """Página de telefones (de um restaurante ou de todos) sem copiar o índice inteiro"""
+        with self._lock:
+            source = self._by_phone if restaurante_id is None else self._by_restaurant.get(restaurante_id, ())
+            result = []
+            for i, phone in enumerate(source):
+                if i < offset:
+                    continue
+                if len(result) >= limit:
+                    break
+                result.append(phone)
+            return result
+
+    # --- Escrita ---
+
+    def mark(self, phone, restaurante_id=None):
+        key = (phone, restaurante_id or DEFAULT_RESTAURANT)
+        ts = time.time()
+        with self._lock:
+            self._insert(key, ts)
+            if self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO auto_reply (phone, restaurante_id, ts) VALUES (?, ?, ?)",
+                    (key[0], key[1], ts),
+                )
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest, persist=True)
+            if ts - self._last_sweep >= self.sweep_interval:
+                self.sweep()
+
+    def sweep(self):
+        """Remove as entradas vencidas. Retorna quantas saíram"""
+        with self._lock:
+            self._last_sweep = time.time()
+            expired = [key for key, ts in self._entries.items() if self._expired(ts)]
+            for key in expired:
+                self._remove(key, persist=False)
+            if self._conn and expired:
+                self._conn.execute("DELETE FROM auto_reply WHERE ts < ?", (time.time() - self.ttl_seconds,))
+            return len(expired)
+
+    def forget_phone(self, phone):
+        """Libera um telefone em todos os restaurantes. Retorna quantas entradas saíram"""
+        with self._lock:
+            rids = list(self._by_phone.get(phone, ()))
+            for rid in rids:
+                self._remove((phone, rid), persist=False)
+            if self._conn and rids:
+                self._conn.execute("DELETE FROM auto_reply WHERE phone = ?", (phone,))
+            return len(rids)
+
+    def forget_restaurant(self, restaurante_id):
+        """Libera todos os telefones de um restaurante (usa o índice, sem varrer)"""
+        with self._lock:
+            phones = list(self._by_restaurant.get(restaurante_id, ()))
+            for phone in phones:
+                self._remove((phone, restaurante_id), persist=False)
+            if self._conn and phones:
+                self._conn.execute("DELETE FROM auto_reply WHERE restaurante_id = ?", (restaurante_id,))
+            return len(phones)
+
+    def clear(self):
+        with self._lock:
+            count = len(self._by_phone)
+            self._entries.clear()
+            self._by_restaurant.clear()
+            self._by_phone.clear()
+            if self._conn:
+                self._conn.execute("DELETE FROM auto_reply")
+            return count
+
+    def __len__(self):
+        return self.count()
+
+    def __contains__(self, phone):
+        return self.has_phone(phone)
+
+    # --- Internos (chamados com self._lock) ---
+
+    def _expired(self, ts):
+        return time.time() - ts > self.ttl_seconds
+
+    def _insert(self, key, ts):
+        phone, rid = key
+        self._entries[key] = ts
+        self._entries.move_to_end(key)
+        self._by_restaurant.setdefault(rid, {})[phone] = None
+        self._by_phone.setdefault(phone, {})[rid] = None
+
+    def _remove(self, key, persist):
+        phone, rid = key
+        self._entries.pop(key, None)
+        phones = self._by_restaurant.get(rid)
+        if phones is not None:
+            phones.pop(phone, None)
+            if not phones:
+                del self._by_restaurant[rid]
+        rids = self._by_phone.get(phone)
+        if rids is not None:
+            rids.pop(rid, None)
+            if not rids:
+                del self._by_phone[phone]
+        if persist and self._conn:
+            self._conn.execute(
+                "DELETE FROM auto_reply WHERE phone = ? AND restaurante_id = ?", (phone, rid)
+            )
+
+    def _load(self):
+        cutoff = time.time() - self.ttl_seconds
+        self._conn.execute("DELETE FROM auto_reply WHERE ts < ?", (cutoff,))
+        rows = self._conn.execute(
+            "SELECT phone, restaurante_id, ts FROM auto_reply ORDER BY ts DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+        for phone, rid, ts in reversed(rows):
+            self._insert((phone, rid), ts)
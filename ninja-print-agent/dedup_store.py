@@ -0,0 +1,85 @@
+"""
+🛡️ Memória de Notificações Enviadas (anti-duplicidade)
+
+Guarda as chaves (pedido, status) já notificadas em SQLite, com validade
+(TTL). O check-and-set é atômico (INSERT condicional), a memória do processo
+fica estável e a proteção continua valendo depois de um crash/reinício.
+"""
+
+import sqlite3
+import threading
+import time
+
+
+class DedupStore:
+    """Conjunto persistente com expiração por tempo e check-and-set atômico"""
+
+    def __init__(self, path, ttl_seconds=24 * 3600, sweep_interval=600):
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dedup ("
+            " key TEXT PRIMARY KEY,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS dedup_expires ON dedup (expires_at)")
+
+    @staticmethod
+    def make_key(*parts):
+        return "|".join(str(p) for p in parts)
+
+    def claim(self, key):
+        """Marca a chave como usada. Retorna False se ela já estava marcada (e válida)"""
+        now = time.time()
+        with self._lock:
+            self._maybe_sweep(now)
+            # Insere se não existe ou se a entrada antiga já expirou, numa única instrução
+            cur = self._conn.execute(
+                "INSERT INTO dedup (key, expires_at) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at "
+                "WHERE dedup.expires_at <= ?",
+                (key, now + self.ttl_seconds, now),
+            )
+            return cur.rowcount == 1
+
+    def release(self, key):
+        """Desfaz um claim (ex.: o envio nem chegou a ser agendado)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM dedup WHERE key = ?", (key,))
+
+    def __contains__(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM dedup WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM dedup WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+
+    def sweep(self):
+        """Remove as entradas vencidas"""
+        with self._lock:
+            return self._sweep(time.time())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Internos (chamados com self._lock) ---
+
+    def _maybe_sweep(self, now):
+        if now - self._last_sweep >= self.sweep_interval:
+            self._sweep(now)
+
+    def _sweep(self, now):
+        self._last_sweep = now
+        return self._conn.execute("DELETE FROM dedup WHERE expires_at <= ?", (now,)).rowcount
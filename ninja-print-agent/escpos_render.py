@@ -0,0 +1,310 @@
+"""
+🧾 Renderizador ESC/POS de Comandas
+
+Recebe o pedido estruturado (JSON do painel) e monta o ticket direto em
+bytes ESC/POS, já na página de código da térmica (CP850/CP860...), então os
+acentos saem certos e o painel não precisa montar texto.
+
+Tudo que não muda entre tickets fica pré-compilado e em cache: o layout de
+cada largura de papel (32/48 colunas) com separadores e títulos já
+codificados, as tabelas de substituição de cada página de código e os bytes
+raster do logo.
+"""
+
+import functools
+import time
+import unicodedata
+
+from print_spooler import ESCPOS_CUT
+
+ESC = b"\x1b"
+GS = b"\x1d"
+
+INIT = ESC + b"@"
+ALIGN_LEFT = ESC + b"a\x00"
+ALIGN_CENTER = ESC + b"a\x01"
+BOLD_ON = ESC + b"E\x01"
+BOLD_OFF = ESC + b"E\x00"
+DOUBLE_ON = GS + b"!\x11"
+DOUBLE_OFF = GS + b"!\x00"
+FEED = ESC + b"d\x04"
+
+# Largura do papel (mm) -> colunas na fonte A e pontos da cabeça de impressão
+PAPER_COLUMNS = {58: 32, 80: 48}
+PAPER_DOTS = {58: 384, 80: 576}
+
+# Página de código -> n do comando ESC t n (tabela padrão Epson/Elgin/Bematech)
+CODEPAGES = {"cp437": 0, "cp850": 2, "cp860": 3, "cp858": 19}
+
+TEMPLATES = ("complete", "kitchen", "delivery")
+
+ORDER_TYPES = {
+    "comanda": "Mesa/Local",
+    "local": "Mesa/Local",
+    "delivery": "Entrega",
+    "retirada": "Retirada",
+}
+
+PAYMENT_NAMES = {
+    "cash": "Dinheiro",
+    "dinheiro": "Dinheiro",
+    "card": "Cartão",
+    "cartao": "Cartão",
+    "pix": "PIX",
+}
+
+
+class CodepageEncoder:
+    """Codifica texto na página de código da impressora (emoji somem, o resto vira ASCII)"""
+
+    def __init__(self, codec):
+        if codec not in CODEPAGES:
+            raise ValueError(f"Página de código não suportada: {codec}")
+        self.codec = codec
+        self.select = ESC + b"t" + bytes([CODEPAGES[codec]])
+        self._fallback = {}  # {ord(caractere): substituto} só para o que a página não tem
+
+    def encode(self, text):
+        try:
+            return text.encode(self.codec)
+        except UnicodeEncodeError:
+            for ch in set(text):
+                if ord(ch) not in self._fallback:
+                    self._learn(ch)
+            return text.translate(self._fallback).encode(self.codec, errors="replace")
+
+    def _learn(self, ch):
+        try:
+            ch.encode(self.codec)
+            return
+        except UnicodeEncodeError:
+            pass
+        decomposed = unicodedata.normalize("NFKD", ch)
+        base = "".join(c for c in decomposed if not unicodedata.combining(c))
+        if base and base != ch:
+            try:
+                base.encode(self.codec)
+                self._fallback[ord(ch)] = base
+                return
+            except UnicodeEncodeError:
+                pass
+        # Emoji, seletores de variação e símbolos sem equivalente não vão para o papel
+        self._fallback[ord(ch)] = "" if unicodedata.category(ch) in ("So", "Mn", "Cf", "Sk") else "?"
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(codec):
+    return CodepageEncoder(codec)
+
+
+class TicketLayout:
+    """Layout pré-compilado de uma largura de papel numa página de código"""
+
+    def __init__(self, paper_width, codec):
+        if paper_width not in PAPER_COLUMNS:
+            raise ValueError(f"Largura de papel não suportada: {paper_width}mm")
+        self.paper_width = paper_width
+        self.columns = PAPER_COLUMNS[paper_width]
+        self.enc = get_encoder(codec)
+        self.header = INIT + self.enc.select + ALIGN_LEFT
+        self.sep = self.line("-" * self.columns)
+        self.double_sep = self.line("=" * self.columns)
+        self._static = {}
+
+    def line(self, text=""):
+        return self.enc.encode(text) + b"\n"
+
+    def static(self, text, center=True, bold=False):
+        """Linha fixa (títulos, rodapé) codificada uma única vez"""
+        key = (text, center, bold)
+        cached = self._static.get(key)
+        if cached is None:
+            cached = self.center(text) if center else self.line(text)
+            if bold:
+                cached = BOLD_ON + cached + BOLD_OFF
+            self._static[key] = cached
+        return cached
+
+    def center(self, text):
+        text = str(text or "")[: self.columns]
+        left = (self.columns - len(text)) // 2
+        return self.line(" " * left + text)
+
+    def lr(self, left, right):
+        left, right = str(left or ""), str(right or "")
+        spaces = self.columns - len(left) - len(right)
+        if spaces <= 0:
+            return self.line(left[: max(self.columns - len(right) - 1, 0)] + " " + right)
+        return self.line(left + " " * spaces + right)
+
+    def wrap(self, text, indent=""):
+        """Quebra por palavra na largura do papel"""
+        out = []
+        for paragraph in str(text or "").splitlines() or [""]:
+            current = ""
+            for word in paragraph.split():
+                candidate = f"{current} {word}" if current else word
+                if len(indent) + len(candidate) > self.columns and current:
+                    out.append(self.line(indent + current))
+                    current = word
+                else:
+                    current = candidate
+            out.append(self.line(indent + current))
+        return b"".join(out)
+
+
+@functools.lru_cache(maxsize=None)
+def get_layout(paper_width, codec):
+    return TicketLayout(paper_width, codec)
+
+
+@functools.lru_cache(maxsize=8)
+def load_logo(path, paper_width, scale=0.5):
+    """Logo em raster ESC/POS (GS v 0), centralizado. b'' se não houver PIL/arquivo"""
+    try:
+        from PIL import Image
+        img = Image.open(path).convert("RGBA")
+    except Exception:
+        return b""
+    # Fundo transparente vira branco antes de binarizar
+    background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+    img = Image.alpha_composite(background, img).convert("L")
+    width = int(PAPER_DOTS[paper_width] * scale) // 8 * 8
+    height = max(1, int(img.height * width / img.width))
+    img = img.resize((width, height)).point(lambda p: 0 if p < 128 else 255, "1")
+    # No modo "1" do PIL o bit 1 é branco; na térmica o bit 1 é preto
+    data = bytes(b ^ 0xFF for b in img.tobytes())
+    width_bytes = width // 8
+    return (
+        ALIGN_CENTER
+        + GS + b"v0\x00"
+        + bytes([width_bytes & 0xFF, width_bytes >> 8, height & 0xFF, height >> 8])
+        + data
+        + b"\n" + ALIGN_LEFT
+    )
+
+
+def _number(value):
+    """Valor numérico do pedido (o painel às vezes manda "5" em vez de 5); vazio vale 0"""
+    return float(value or 0)
+
+
+def _money(value):
+    return f"R$ {_number(value):.2f}"
+
+
+def encode_text(text, codepage="cp850"):
+    """Ticket em texto pronto (painel) na página de código da térmica, com acentos certos"""
+    enc = get_encoder(codepage)
+    return INIT + enc.select + enc.encode(text)
+
+
+def render_ticket(order, template="complete", paper_width=80, codepage="cp850", company=None,
+                  bairro_cidade="", reprint=False, logo_path=None, cut=True, now=None):
+    """Monta a comanda ESC/POS completa (bytes) a partir do pedido estruturado"""
+    if template not in TEMPLATES:
+        template = "complete"
+    lay = get_layout(int(paper_width), codepage)
+    company = company or {}
+    kitchen = template == "kitchen"
+    now = now or time.localtime()
+    stamp = time.strftime("%d/%m/%Y %H:%M:%S", now)
+    out = [lay.header]
+
+    # 1. Cabeçalho do restaurante (a via da cozinha economiza papel)
+    if logo_path and not kitchen:
+        out.append(load_logo(logo_path, lay.paper_width))
+    out.append(lay.static("Fome Ninja Restaurante", bold=True))
+    if not kitchen:
+        for text in (company.get('name'), company.get('address'), bairro_cidade):
+            if text:
+                out.append(lay.center(text))
+        if company.get('phone'):
+            out.append(lay.center(f"Tel: {company['phone']}"))
+        out.append(lay.sep)
+
+    # 2. Informações do pedido
+    numero = order.get('numero_pedido') or str(order.get('id', ''))[:8]
+    out.append(ALIGN_CENTER + DOUBLE_ON + lay.line(f"PEDIDO #{numero}") + DOUBLE_OFF + ALIGN_LEFT)
+    out.append(lay.lr("Data/Hora:", stamp))
+    if order.get('customerName'):
+        out.append(lay.lr("Cliente:", order['customerName']))
+    if order.get('customerPhone') and not kitchen:
+        out.append(lay.lr("Telefone:", order['customerPhone']))
+    out.append(lay.lr("Tipo:", ORDER_TYPES.get(order.get('type'), "Balcão")))
+    out.append(lay.sep)
+
+    # Endereço de entrega
+    address = order.get('deliveryAddress')
+    if order.get('type') == 'delivery' and address and not kitchen:
+        out.append(lay.static("--- ENDEREÇO DE ENTREGA ---"))
+        out.append(lay.wrap(f"{address.get('street', '')}, {address.get('number', '')}"))
+        if address.get('complement'):
+            out.append(lay.wrap(f"Compl: {address['complement']}"))
+        out.append(lay.wrap(f"{address.get('neighborhood', '')} - {address.get('city', '')}"))
+        if address.get('reference'):
+            out.append(lay.wrap(f"Ref: {address['reference']}"))
+        out.append(lay.sep)
+
+    # 3. Itens
+    out.append(lay.static("VIA DA COZINHA" if kitchen else "ITENS DO PEDIDO", bold=True))
+    out.append(lay.sep)
+    out.append(lay.static("Qtd Nome", center=False) if kitchen else lay.lr("Qtd Nome", "Valor Unit."))
+    out.append(lay.sep)
+    subtotal = 0.0
+    for item in order.get('items') or []:
+        qty = int(_number(item.get('qty', 1)))
+        price = _number(item.get('price'))
+        subtotal += price * qty
+        if kitchen:
+            out.append(BOLD_ON + lay.wrap(f"{qty} {item.get('name', '')}") + BOLD_OFF)
+        else:
+            out.append(lay.lr(f"{qty} {item.get('name', '')}", _money(price)))
+        if item.get('notes'):
+            out.append(lay.wrap(f"> OBS: {item['notes']}", indent="  "))
+        out.append(lay.sep)
+
+    # 4. Totais e pagamento
+    if not kitchen:
+        total = _number(order.get('total')) or subtotal
+        desconto = _number(order.get('desconto'))
+        taxa_entrega = _number(order.get('taxa_entrega'))
+        out.append(lay.lr("Subtotal", _money(subtotal)))
+        if desconto > 0:
+            out.append(lay.lr("Desconto", "-" + _money(desconto)))
+        if taxa_entrega > 0:
+            out.append(lay.lr("Taxa Entrega", _money(taxa_entrega)))
+        out.append(lay.double_sep)
+        out.append(BOLD_ON + lay.lr("TOTAL DO PEDIDO", _money(total)) + BOLD_OFF)
+        out.append(lay.double_sep)
+        out.append(lay.static("PAGAMENTO"))
+        metodo = (order.get('paymentMethod') or "").lower()
+        out.append(lay.lr(PAYMENT_NAMES.get(metodo, order.get('paymentMethod') or "Não informado"), _money(total)))
+        troco = _number(order.get('troco'))
+        if metodo in ("cash", "dinheiro") and troco > 0:
+            out.append(lay.lr("Troco para:", _money(troco)))
+        out.append(lay.sep)
+
+    # 5. Observações, tempo, reimpressão
+    obs = order.get('comments') or order.get('observacoes')
+    if obs:
+        out.append(lay.static("OBS GERAIS:", center=False, bold=True))
+        out.append(lay.wrap(obs))
+        out.append(lay.sep)
+    if order.get('prepTime'):
+        out.append(lay.center(f"Tempo Prep: {order['prepTime']} min"))
+        out.append(lay.sep)
+    if reprint:
+        out.append(lay.static("*** REIMPRESSÃO ***", bold=True))
+        out.append(lay.sep)
+
+    # 6. Rodapé
+    if not kitchen:
+        out.append(lay.static("Obrigado pela preferência!"))
+        out.append(lay.center(stamp))
+        out.append(lay.static("www.fomeninja.com.br"))
+
+    out.append(FEED)
+    if cut:
+        out.append(ESCPOS_CUT)
+    return b"".join(out)
@@ -0,0 +1,153 @@
+"""
+🎯 Classificador de Intenções (Aho-Corasick)
+
+Todas as palavras-chave de todas as intenções viram UM autômato, construído
+uma vez. A mensagem é percorrida uma única vez e sai com todas as intenções
+encontradas e uma pontuação para cada. Acentos e maiúsculas são dobrados
+("Cardápio" == "cardapio").
+
+Conjuntos de palavras por restaurante podem ser carregados/trocados em tempo
+de execução (o autômato é reconstruído e trocado de forma atômica).
+"""
+
+import json
+import threading
+import unicodedata
+from collections import deque
+
+
+def fold(text):
+    """Minúsculas e sem acentos (cardápio -> cardapio)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def validate_keywords(keywords):
+    """Confere o formato {intencao: [palavra, ...]} (ValueError se não bater)"""
+    if not isinstance(keywords, dict):
+        raise ValueError("keywords deve ser {intencao: [palavras]}")
+    for intent, words in keywords.items():
+        if not isinstance(intent, str) or not intent.strip():
+            raise ValueError("intenção vazia ou não é texto")
+        # Uma string solta viraria uma lista de letras (toda mensagem casaria)
+        if not isinstance(words, list) or not words:
+            raise ValueError(f"'{intent}': esperada uma lista não vazia de palavras")
+        for word in words:
+            if not isinstance(word, str) or not fold(word).strip():
+                raise ValueError(f"'{intent}': palavra inválida {word!r}")
+
+
+class AhoCorasick:
+    """Autômato de múltiplos padrões (padrões já dobrados)"""
+
+    def __init__(self, patterns):
+        # patterns: {padrao: [(intencao, peso), ...]}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, labels in patterns.items():
+            self._add(pattern, labels)
+        self._build()
+
+    def _add(self, pattern, labels):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].extend(labels)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text):
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield from out[node]
+
+
+class IntentMatcher:
+    """Classificador de intenções com conjuntos globais e por restaurante"""
+
+    def __init__(self, keywords):
+        # keywords: {intencao: [palavra, ...]} em ordem de prioridade
+        self._lock = threading.Lock()
+        self._global = {intent: list(words) for intent, words in keywords.items()}
+        self._priority = list(self._global)
+        self._extra = {}  # {restaurante_id: {intencao: [palavra, ...]}}
+        self._automata = {None: self._compile(self._global)}
+
+    @staticmethod
+    def _compile(keywords):
+        patterns = {}
+        for intent, words in keywords.items():
+            for word in words:
+                folded = fold(word).strip()
+                if folded:
+                    # Palavras mais longas (frases) pesam mais que termos soltos
+                    patterns.setdefault(folded, []).append((intent, len(folded.split())))
+        return AhoCorasick(patterns)
+
+    def set_restaurant_keywords(self, restaurante_id, keywords):
+        """Troca as palavras extras de um restaurante sem reiniciar o agente (ValueError se mal formadas)"""
+        validate_keywords(keywords)
+        merged = {intent: list(words) for intent, words in self._global.items()}
+        for intent, words in keywords.items():
+            merged.setdefault(intent, []).extend(words)
+        automaton = self._compile(merged)
+        with self._lock:
+            self._extra[restaurante_id] = keywords
+            for intent in keywords:
+                if intent not in self._priority:
+                    self._priority.append(intent)
+            self._automata[restaurante_id] = automaton
+
+    def load_restaurant_file(self, path):
+        """Carrega {restaurante_id: {intencao: [palavras]}} de um JSON"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("o arquivo deve ser {restaurante_id: {intencao: [palavras]}}")
+        # Confere tudo antes de trocar qualquer autômato
+        for restaurante_id, keywords in data.items():
+            try:
+                validate_keywords(keywords)
+            except ValueError as e:
+                raise ValueError(f"restaurante {restaurante_id}: {e}") from None
+        for restaurante_id, keywords in data.items():
+            self.set_restaurant_keywords(restaurante_id, keywords)
+        return len(data)
+
+    def classify(self, mensagem, restaurante_id=None):
+        """Retorna [(intencao, pontuacao), ...] do maior para o menor, numa única passada"""
+        if not mensagem:
+            return []
+        automaton = self._automata.get(restaurante_id) or self._automata[None]
+        scores = {}
+        for intent, weight in automaton.iter_matches(fold(mensagem)):
+            scores[intent] = scores.get(intent, 0) + weight
+        order = {intent: i for i, intent in enumerate(self._priority)}
+        return sorted(scores.items(), key=lambda kv: (-kv[1], order.get(kv[0], len(order))))
+
+    def best(self, mensagem, restaurante_id=None):
+        matches = self.classify(mensagem, restaurante_id)
+        return matches[0][0] if matches else None
@@ -0,0 +1,78 @@
+"""
+💤 Importação Preguiçosa de Dependências Pesadas
+
+PIL, pystray, playwright e a família win32 custam centenas de ms para
+importar e nem todo caminho usa todas (o modo serviço nem tem bandeja).
+LazyModule só importa o módulo de verdade no primeiro atributo acessado e
+anota quanto tempo levou; dependency_available() confere se um pacote está
+instalado sem importá-lo (find_spec só procura o arquivo). No modo bandeja
+quase tudo acaba carregado logo na subida: o ganho ali é tirar esses imports
+do caminho até o servidor HTTP atender, não evitá-los.
+"""
+
+import importlib
+import importlib.util
+import threading
+import time
+
+_registry = {}  # {nome: LazyModule}
+_registry_lock = threading.Lock()
+
+
+class LazyModule:
+    """Procurador de módulo: importa no primeiro uso, seguro entre threads"""
+
+    def __init__(self, name):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+        object.__setattr__(self, "_import_ms", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self):
+        module = self._module
+        if module is not None:
+            return module
+        with self._lock:
+            if self._module is None:
+                start = time.perf_counter()
+                module = importlib.import_module(self._name)
+                object.__setattr__(self, "_import_ms", round((time.perf_counter() - start) * 1000, 1))
+                object.__setattr__(self, "_module", module)
+            return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "carregado" if self.loaded else "pendente"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy(name):
+    """LazyModule compartilhado por nome (o mesmo procurador em todo o agente)"""
+    with _registry_lock:
+        module = _registry.get(name)
+        if module is None:
+            module = _registry[name] = LazyModule(name)
+        return module
+
+
+def dependency_available(name):
+    """O pacote está instalado? (não executa o import)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_stats():
+    """{nome: ms do import ou None se ainda não foi usado}"""
+    with _registry_lock:
+        return {name: module._import_ms for name, module in sorted(_registry.items())}
@@ -0,0 +1,117 @@
+"""
+🔥 Teste de Carga - API local do Agente
+
+Dispara requisições concorrentes (conexões keep-alive) em /status e /print
+e mede requisições/s, p50 e p99. Para comparar os modos de servidor, rode
+o agente com AGENT_SERVER=dev e depois com AGENT_SERVER=waitress
+(use PRINT_BACKEND=file para não gastar papel), salvando cada resultado:
+
+    py loadtest_agent.py --save dev.json
+    py loadtest_agent.py --save waitress.json --baseline dev.json
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+
+ENDPOINTS = {
+    "status": ("GET", "/status", None),
+    "print": ("POST", "/print", json.dumps({"content": "TESTE DE CARGA\n" * 20})),
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def worker(host, port, method, path, body, deadline, latencies, errors, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    headers = {"Content-Type": "application/json"} if body else {}
+    local, local_errors = [], 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                local_errors += 1
+            if response.will_close:
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=10)
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        local.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    with lock:
+        latencies.extend(local)
+        errors[0] += local_errors
+
+
+def run(host, port, name, concurrency, duration):
+    method, path, body = ENDPOINTS[name]
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(host, port, method, path, body, deadline, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do agente local")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--concurrency", type=int, default=16, help="conexões simultâneas (abas do painel)")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos por endpoint")
+    parser.add_argument("--endpoints", default="status,print")
+    parser.add_argument("--save", help="grava o resultado em JSON")
+    parser.add_argument("--baseline", help="JSON de uma rodada anterior para comparar")
+    args = parser.parse_args()
+
+    results = {}
+    print("=" * 60)
+    print(f"🔥 Carga em {args.host}:{args.port} ({args.concurrency} conexões, {args.duration:.0f}s por endpoint)")
+    print("=" * 60)
+    for name in args.endpoints.split(","):
+        results[name] = r = run(args.host, args.port, name, args.concurrency, args.duration)
+        print(f"{name:>8}: {r['rps']:8.1f} req/s | p50 {r['p50_ms']:7.2f} ms | p99 {r['p99_ms']:7.2f} ms | erros {r['errors']}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        print("-" * 60)
+        for name, r in results.items():
+            b = base.get(name)
+            if not b or not b["rps"] or not r["p99_ms"]:
+                continue
+            print(f"{name:>8}: {r['rps'] / b['rps']:.2f}x req/s | p99 {b['p99_ms']:.2f} -> {r['p99_ms']:.2f} ms")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultado salvo em {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+🧵 Serviços Bloqueantes fora do Loop do Playwright
+
+O loop asyncio do motor (pw_loop) não pode esperar rede, disco ou SQLite:
+enquanto espera, nenhuma aba anda. BlockingServices roda essas chamadas num
+pool de threads e devolve um awaitable. LoopLagMonitor mede o atraso do
+loop e avisa (com a pilha de quem está segurando) quando ele passa do limite.
+"""
+
+import asyncio
+import functools
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BlockingServices:
+    """Pool de threads para chamadas bloqueantes feitas a partir do loop"""
+
+    def __init__(self, max_workers=4, name="pw-io"):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.inflight = 0
+        self.slowest_ms = 0.0
+
+    async def run(self, fn, *args, **kwargs):
+        """await services.run(func, ...) — executa func numa thread do pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(self._timed, fn, *args, **kwargs))
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "inflight": self.inflight, "slowest_ms": round(self.slowest_ms, 1)}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _timed(self, fn, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.inflight += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.inflight -= 1
+                self.slowest_ms = max(self.slowest_ms, elapsed)
+
+
+class LoopLagMonitor:
+    """Mede o atraso do loop (sleep agendado x acordado de fato) e loga travadas"""
+
+    def __init__(self, threshold=0.1, interval=0.05, label="pw_loop"):
+        self.threshold = threshold
+        self.interval = interval
+        self.label = label
+        self.stalls = 0
+        self.max_lag_ms = 0.0
+        self.last_stall_ms = 0.0
+        self._beat = None
+        self._loop_thread_id = None
+        self._task = None
+        self._watchdog = None
+
+    def start(self):
+        """Chamar de dentro do loop que será vigiado"""
+        if self._task is None:
+            self._loop_thread_id = threading.get_ident()
+            self._beat = time.monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            # O cão de guarda roda fora do loop: consegue ver QUEM está travando enquanto trava
+            self._watchdog = threading.Thread(target=self._watch, name=f"{self.label}-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self):
+        return {
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "last_stall_ms": round(self.last_stall_ms, 1),
+            "threshold_ms": round(self.threshold * 1000),
+        }
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._beat = now
+            lag = (now - expected) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, lag)
+            if lag > self.threshold * 1000:
+                self.stalls += 1
+                self.last_stall_ms = lag
+                print(f"🐢 [{self.label}] Loop travado por {lag:.0f} ms", flush=True)
+
+    def _watch(self):
+        reported = None
+        while self._task is not None:
+            time.sleep(self.threshold)
+            beat = self._beat
+            if beat is None or beat == reported:
+                continue
+            if time.monotonic() - beat > self.threshold + self.interval:
+                reported = beat  # uma pilha por travada
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    stack = "".join(traceback.format_stack(frame, limit=8))
+                    print(f"🐢 [{self.label}] Travado agora em:\n{stack}", flush=True)
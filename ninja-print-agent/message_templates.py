@@ -0,0 +1,156 @@
+"""
+💬 Motor de Templates das Mensagens (mensagens_reserva.json)
+
+A matriz é lida UMA vez e compilada em templates com placeholders nomeados
+({customer_name}, {codigo_entrega}, {cardapio_link}...). Todos os
+placeholders são validados na carga; um arquivo com erro é recusado e a
+última versão boa continua valendo.
+
+Uma thread vigia o mtime do arquivo e recarrega quando ele muda, então a
+renderização nunca toca no disco.
+"""
+
+import json
+import os
+import random
+import string
+import threading
+import time
+
+# Placeholders aceitos em cada parte da matriz
+STATUS_FIELDS = frozenset({"customer_name", "codigo_entrega"})
+AUTO_REPLY_FIELDS = frozenset({"customer_name", "cardapio_link", "restaurante_nome"})
+
+_formatter = string.Formatter()
+
+
+class TemplateError(ValueError):
+    """Template inválido na matriz de mensagens"""
+
+
+class Template:
+    """Texto pré-compilado em pedaços (literal, placeholder)"""
+
+    __slots__ = ("source", "parts", "fields")
+
+    def __init__(self, source, allowed, where):
+        self.source = source
+        self.parts = []
+        self.fields = set()
+        try:
+            parsed = list(_formatter.parse(source))
+        except ValueError as e:
+            raise TemplateError(f"{where}: {e}")
+        for literal, field, spec, conversion in parsed:
+            if field is not None:
+                if field not in allowed:
+                    raise TemplateError(f"{where}: placeholder desconhecido {{{field}}}")
+                if spec or conversion:
+                    raise TemplateError(f"{where}: formatação não suportada em {{{field}}}")
+                self.fields.add(field)
+            self.parts.append((literal, field))
+
+    def render(self, values):
+        out = []
+        for literal, field in self.parts:
+            out.append(literal)
+            if field is not None:
+                value = values.get(field)
+                out.append("" if value is None else str(value))
+        return "".join(out)
+
+
+def _compile_list(items, allowed, where):
+    if not isinstance(items, list) or not items:
+        raise TemplateError(f"{where}: esperado uma lista não vazia")
+    return [Template(text, allowed, f"{where}[{i}]") for i, text in enumerate(items)]
+
+
+def compile_matrix(matriz):
+    """Valida e compila a matriz inteira (levanta TemplateError no primeiro problema)"""
+    corpos = matriz.get('corpos', {})
+    auto = matriz.get('auto_resposta', {})
+    return {
+        'saudacoes': _compile_list(matriz.get('saudacoes', ["Olá, {customer_name}!"]), STATUS_FIELDS, "saudacoes"),
+        'corpos': {
+            status: _compile_list(textos, STATUS_FIELDS, f"corpos.{status}")
+            for status, textos in corpos.items()
+        },
+        'corpo_padrao': [Template("Seu pedido foi atualizado.", STATUS_FIELDS, "corpo_padrao")],
+        'fechamentos': _compile_list(matriz.get('fechamentos', ["😉"]), STATUS_FIELDS, "fechamentos"),
+        'auto_saudacoes': _compile_list(
+            auto.get('saudacoes', ["Olá! Bem-vindo ao nosso restaurante! 🥷"]), AUTO_REPLY_FIELDS, "auto_resposta.saudacoes"
+        ),
+        'auto_corpo': Template(
+            auto.get('corpo', "Confira nosso cardápio: {cardapio_link}"), AUTO_REPLY_FIELDS, "auto_resposta.corpo"
+        ),
+        'auto_fechamentos': _compile_list(
+            auto.get('fechamentos', ["Qualquer dúvida estamos aqui! 👍"]), AUTO_REPLY_FIELDS, "auto_resposta.fechamentos"
+        ),
+    }
+
+
+class MessageTemplates:
+    """Matriz de mensagens compilada, com recarga automática quando o arquivo muda"""
+
+    def __init__(self, path, poll_interval=2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._compiled = None
+        self._mtime = None
+        self._watcher = None
+        self.reload()
+
+    @property
+    def loaded(self):
+        return self._compiled is not None
+
+    def reload(self):
+        """Recompila se o arquivo mudou. Retorna True se uma nova versão entrou em uso"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                compiled = compile_matrix(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Matriz de mensagens recusada ({e}). Mantendo a versão anterior.", flush=True)
+            return False
+        # Troca atômica: quem está renderizando continua com a versão antiga
+        self._compiled = compiled
+        print("💬 Matriz de mensagens carregada e compilada", flush=True)
+        return True
+
+    def start_watching(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch_loop, name="templates-watch", daemon=True)
+            self._watcher.start()
+
+    def status_message(self, status_key, **values):
+        m = self._compiled
+        corpos = m['corpos'].get(status_key) or m['corpo_padrao']
+        return " ".join((
+            random.choice(m['saudacoes']).render(values),
+            random.choice(corpos).render(values),
+            random.choice(m['fechamentos']).render(values),
+        ))
+
+    def auto_reply_message(self, **values):
+        m = self._compiled
+        return "\n\n".join((
+            random.choice(m['auto_saudacoes']).render(values),
+            m['auto_corpo'].render(values),
+            random.choice(m['auto_fechamentos']).render(values),
+        ))
+
+    def _watch_loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"⚠️ Erro ao vigiar a matriz de mensagens: {e}", flush=True)
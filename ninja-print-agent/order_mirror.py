@@ -0,0 +1,241 @@
+"""
+🪞 Espelho Local de Pedidos Ativos
+
+Em vez de consultar o Supabase a cada "cadê meu pedido?", o agente mantém
+em memória os pedidos recentes de cada restaurante, atualizados de forma
+incremental por um consumidor de mudanças (feed). A resposta de status sai
+direto da memória, sem rede e sem travar o loop do WhatsApp.
+
+O feed é plugável: PollingFeed busca o delta por uma coluna de data
+(updated_at/criado_em) no PostgREST; FakeFeed é alimentado à mão nos testes.
+O espelho só vale para os restaurantes que o feed cobre (covers()): fora
+deles a consulta vai para a rede.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def normalize_phone(phone):
+    """Só dígitos, com DDI 55 (mesma regra usada no agente)"""
+    clean = "".join(filter(str.isdigit, str(phone or "")))
+    if clean and not clean.startswith("55") and len(clean) <= 11:
+        clean = "55" + clean
+    return clean
+
+
+class ChangeFeed:
+    """Fonte de mudanças: fetch(cursor) -> (linhas alteradas, novo cursor)"""
+
+    def initial_cursor(self):
+        return None
+
+    def fetch(self, cursor):
+        raise NotImplementedError
+
+    def covers(self, restaurante_id):
+        """Os pedidos deste restaurante chegam por este feed?"""
+        return True
+
+
+class PollingFeed(ChangeFeed):
+    """Delta por coluna de data via PostgREST (cursor = maior valor já visto)"""
+
+    def __init__(self, client, table="pedidos", cursor_column="updated_at", lookback_hours=12,
+                 page_size=500, restaurant_ids=None):
+        self.client = client
+        self.table = table
+        self.cursor_column = cursor_column
+        self.lookback_hours = lookback_hours
+        self.page_size = page_size
+        self.restaurant_ids = restaurant_ids  # callable -> lista de ids (ou None = todos)
+        self._known_ids = None
+        self._synced_ids = frozenset()  # ids cuja janela inteira já foi buscada
+        self._synced_all = False  # sem lista de restaurantes: todos, depois da primeira busca
+
+    def initial_cursor(self):
+        since = datetime.now(timezone.utc) - timedelta(hours=self.lookback_hours)
+        return since.isoformat()
+
+    def fetch(self, cursor):
+        ids = sorted(str(i) for i in self.restaurant_ids()) if self.restaurant_ids else None
+        if ids != self._known_ids:
+            # Restaurante novo no agente: refaz a janela inteira para ele não começar vazio
+            self._known_ids = ids
+            self._synced_ids = frozenset()
+            cursor = self.initial_cursor()
+        if ids is not None and not ids:
+            # Nenhum restaurante no agente: sem filtro viriam os pedidos de todos os clientes
+            return [], cursor
+        rows = []
+        while True:
+            # gte + upsert idempotente: linhas com o mesmo carimbo na virada de página não se perdem
+            params = {
+                self.cursor_column: f"gte.{cursor}",
+                "order": f"{self.cursor_column}.asc",
+                "limit": str(self.page_size),
+            }
+            if ids:
+                params["id_restaurante"] = "in.(" + ",".join(ids) + ")"
+            page = self.client.get(self.table, params) or []
+            rows.extend(page)
+            new_cursor = max((r.get(self.cursor_column) or cursor for r in page), default=cursor)
+            if len(page) < self.page_size or new_cursor == cursor:
+                if ids is None:
+                    self._synced_all = True
+                else:
+                    self._synced_ids = frozenset(ids)
+                return rows, new_cursor
+            cursor = new_cursor
+
+    def covers(self, restaurante_id):
+        if self._synced_all:
+            return True
+        if restaurante_id is None:
+            return bool(self._synced_ids)
+        return str(restaurante_id) in self._synced_ids
+
+
+class FakeFeed(ChangeFeed):
+    """Feed manual para testes: push() enfileira, fetch() entrega o que chegou"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._seq = 0
+        self.fail_next = 0
+
+    def push(self, *rows):
+        with self._lock:
+            self._pending.extend(rows)
+
+    def fetch(self, cursor):
+        with self._lock:
+            if self.fail_next:
+                self.fail_next -= 1
+                raise ConnectionError("feed falso indisponível")
+            rows, self._pending = self._pending, []
+            self._seq += len(rows)
+            return rows, self._seq
+
+
+class OrderMirror:
+    """Pedidos recentes em memória, indexados por telefone e por restaurante"""
+
+    def __init__(self, feed, poll_interval=2.0, retention_hours=12, stale_after=30.0):
+        self.feed = feed
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_hours * 3600
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._orders = {}  # {order_id: (pedido, visto_em)}
+        self._by_phone = {}  # {telefone: {order_id: None}}
+        self._by_restaurant = {}  # {id_restaurante: {order_id: None}}
+        self._cursor = feed.initial_cursor()
+        self._last_sync = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.syncs = 0
+        self.errors = 0
+        self.last_error = None
+
+    # --- Consulta (memória pura) ---
+
+    @property
+    def fresh(self):
+        """Já sincronizou e a última sincronização é recente?"""
+        last = self._last_sync
+        return last is not None and time.monotonic() - last < self.stale_after
+
+    def covers(self, restaurante_id=None):
+        """O espelho tem os pedidos deste restaurante? (senão a consulta vai para a rede)"""
+        return self.feed.covers(restaurante_id)
+
+    def latest(self, phone, restaurante_id=None):
+        """Pedido mais recente do telefone (no restaurante, se informado)"""
+        phone = normalize_phone(phone)
+        with self._lock:
+            best = None
+            for order_id in self._by_phone.get(phone, ()):
+                pedido = self._orders[order_id][0]
+                if restaurante_id and str(pedido.get('id_restaurante')) != str(restaurante_id):
+                    continue
+                if best is None or (pedido.get('criado_em') or "") > (best.get('criado_em') or ""):
+                    best = pedido
+            return best
+
+    def stats(self):
+        with self._lock:
+            return {
+                "orders": len(self._orders),
+                "restaurants": {str(rid): len(ids) for rid, ids in self._by_restaurant.items()},
+                "fresh": self.fresh,
+                "syncs": self.syncs,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "sync_age_s": round(time.monotonic() - self._last_sync, 1) if self._last_sync else None,
+            }
+
+    # --- Sincronização ---
+
+    def sync_once(self):
+        """Aplica um delta do feed. Retorna quantas linhas chegaram"""
+        try:
+            rows, cursor = self.feed.fetch(self._cursor)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            return 0
+        self.apply(rows)
+        self._cursor = cursor
+        self._last_sync = time.monotonic()
+        self.syncs += 1
+        self.last_error = None
+        return len(rows)
+
+    def apply(self, rows):
+        """Upsert idempotente das linhas (a mesma linha pode chegar mais de uma vez)"""
+        now = time.monotonic()
+        with self._lock:
+            for row in rows:
+                order_id = row.get('id')
+                if order_id is None:
+                    continue
+                if order_id in self._orders:
+                    self._unindex(order_id)
+                self._orders[order_id] = (row, now)
+                self._by_phone.setdefault(normalize_phone(row.get('telefone')), {})[order_id] = None
+                self._by_restaurant.setdefault(row.get('id_restaurante'), {})[order_id] = None
+            self._prune(now)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="order-mirror", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # --- Internos ---
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sync_once()
+            self._stop.wait(self.poll_interval)
+
+    def _prune(self, now):
+        old = [oid for oid, (_, seen) in self._orders.items() if now - seen > self.retention_seconds]
+        for order_id in old:
+            self._unindex(order_id)
+            del self._orders[order_id]
+
+    def _unindex(self, order_id):
+        row = self._orders[order_id][0]
+        for index, key in ((self._by_phone, normalize_phone(row.get('telefone'))),
+                           (self._by_restaurant, row.get('id_restaurante'))):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(order_id, None)
+                if not ids:
+                    del index[key]
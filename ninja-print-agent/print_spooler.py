@@ -0,0 +1,397 @@
+"""
+🖨️ Spooler de Impressão Ninja
+
+O /print apenas enfileira o trabalho e devolve um job_id. Cada impressora tem
+seus próprios workers (threads dedicadas) que drenam a fila mantendo o handle
+da impressora aberto entre um ticket e outro.
+
+A camada de impressora fica atrás de PrinterBackend, então no Linux dá pra
+usar a FilePrinter (grava os documentos RAW em arquivo) para testes de carga.
+
+Impressora fora do ar (offline, sem papel) não perde comanda: o documento
+fica segurando a fila daquela impressora, com nova tentativa em backoff
+exponencial após uma sondagem de saúde, e a fila é liberada na ordem quando
+ela volta. Com um PrintJobStore, os pendentes sobrevivem a um reinício.
+Impressora que não existe não é "fora do ar": o submit recusa o nome (e o
+limite de impressoras segura nomes inventados), e se o Windows disser que
+o nome é inválido o documento falha na hora, sem backoff.
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# ESC/POS: avança até a guilhotina e corta o papel (GS V 66 n)
+ESCPOS_CUT = b"\x1dVB\x00"
+
+# Win32: PRINTER_STATUS_* que impedem a impressão e PRINTER_ATTRIBUTE_WORK_OFFLINE
+PRINTER_BAD_STATUS = {
+    0x00000002: "erro",
+    0x00000008: "papel atolado",
+    0x00000010: "sem papel",
+    0x00000080: "offline",
+    0x00000400: "porta aberta",
+    0x00001000: "indisponível",
+    0x00400000: "intervenção do usuário",
+}
+PRINTER_ATTRIBUTE_WORK_OFFLINE = 0x00000400
+
+
+# Win32: ERROR_INVALID_PRINTER_NAME
+ERROR_INVALID_PRINTER_NAME = 1801
+
+
+class PrinterUnavailable(Exception):
+    """Sondagem indicou que a impressora não pode imprimir agora"""
+
+
+class PrinterRejected(Exception):
+    """O spooler não aceita documentos para esta impressora (erro do chamador, não do papel)"""
+
+
+class PrinterNotFound(PrinterRejected):
+    """A impressora não existe: tentar de novo não adianta"""
+
+
+def batch_pages(tickets, cut=ESCPOS_CUT):
+    """Transforma N tickets (bytes) nas páginas de um único documento RAW, com corte entre eles"""
+    last = len(tickets) - 1
+    return [ticket + cut if i < last else ticket for i, ticket in enumerate(tickets)]
+
+
+# --- Camada de Impressora ---
+
+class PrinterBackend:
+    """Interface de uma impressora RAW (um handle por worker)"""
+
+    def __init__(self, printer_name):
+        self.printer_name = printer_name
+
+    def open(self):
+        raise NotImplementedError
+
+    def write_document(self, doc_name, pages):
+        """Grava um documento RAW com uma ou mais páginas (bytes)"""
+        raise NotImplementedError
+
+    def probe(self):
+        """None se a impressora está pronta, senão o motivo (texto)"""
+        return None
+
+    def close(self):
+        raise NotImplementedError
+
+
+class Win32Printer(PrinterBackend):
+    """Impressora real do Windows via win32print (RAW)"""
+
+    def __init__(self, printer_name):
+        super().__init__(printer_name)
+        self._handle = None
+
+    def open(self):
+        import win32print
+        try:
+            self._handle = win32print.OpenPrinter(self.printer_name)
+        except Exception as e:
+            if getattr(e, "winerror", None) == ERROR_INVALID_PRINTER_NAME:
+                raise PrinterNotFound(f"Impressora não encontrada: {self.printer_name}") from e
+            raise
+
+    def probe(self):
+        import win32print
+        info = win32print.GetPrinter(self._handle, 2)
+        if info["Attributes"] & PRINTER_ATTRIBUTE_WORK_OFFLINE:
+            return "trabalhando offline"
+        problems = [name for flag, name in PRINTER_BAD_STATUS.items() if info["Status"] & flag]
+        return ", ".join(problems) or None
+
+    def write_document(self, doc_name, pages):
+        import win32print
+        win32print.StartDocPrinter(self._handle, 1, (doc_name, None, "RAW"))
+        try:
+            for page in pages:
+                win32print.StartPagePrinter(self._handle)
+                win32print.WritePrinter(self._handle, page)
+                win32print.EndPagePrinter(self._handle)
+        finally:
+            win32print.EndDocPrinter(self._handle)
+
+    def close(self):
+        if self._handle is not None:
+            import win32print
+            try:
+                win32print.ClosePrinter(self._handle)
+            finally:
+                self._handle = None
+
+
+class FilePrinter(PrinterBackend):
+    """Impressora de mentira: grava cada documento RAW em um arquivo (testes de carga)"""
+
+    def __init__(self, printer_name, directory=None, latency=0.0):
+        super().__init__(printer_name)
+        self.directory = directory or os.path.join(".", "print_spool_out")
+        self.latency = latency  # Simula uma térmica lenta (segundos por página)
+        self._file = None
+
+    def open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in self.printer_name)
+        self._path = os.path.join(self.directory, safe_name)
+        self._file = open(self._path + ".prn", "ab")
+
+    def probe(self):
+        # Simula "impressora desligada" enquanto existir <nome>.offline no diretório
+        return "offline (arquivo .offline)" if os.path.exists(self._path + ".offline") else None
+
+    def write_document(self, doc_name, pages):
+        for page in pages:
+            if self.latency:
+                time.sleep(self.latency)
+            self._file.write(page)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+
+
+# --- Trabalhos de Impressão ---
+
+class PrintJob:
+    """Um documento RAW na fila de uma impressora"""
+
+    def __init__(self, printer_name, pages, doc_name="Fome Ninja Print"):
+        self.id = uuid.uuid4().hex[:12]
+        self.printer_name = printer_name
+        self.pages = pages
+        self.doc_name = doc_name
+        self.status = "queued"  # queued -> printing -> done | retrying -> ... | failed
+        self.error = None
+        self.attempts = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "printer": self.printer_name,
+            "status": self.status,
+            "pages": len(self.pages),
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class PrintSpooler:
+    """Fila de impressão com um pool de workers dedicado por impressora"""
+
+    def __init__(self, backend_factory, workers_per_printer=1, max_history=500, store=None,
+                 retry_base=2.0, retry_max=60.0, max_age=6 * 3600, printer_exists=None, max_printers=16):
+        self.backend_factory = backend_factory
+        self.printer_exists = printer_exists  # printer_exists(nome) -> bool, checado no submit
+        self.max_printers = max_printers  # teto de impressoras (cada uma tem threads próprias)
+        self.workers_per_printer = max(1, workers_per_printer)
+        self.max_history = max_history
+        self.store = store  # PrintJobStore opcional (pendentes sobrevivem a reinício)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_age = max_age  # depois disso a comanda é dada como perdida
+        self._queues = {}  # {printer_name: queue.Queue}
+        self._workers = {}  # {printer_name: [Thread, ...]}
+        self._retrying = {}  # {printer_name: {job_id: motivo}}
+        self._jobs = OrderedDict()  # {job_id: PrintJob} (histórico limitado)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.failed_total = 0
+        self.retries_total = 0
+
+    def submit(self, printer_name, pages, doc_name="Fome Ninja Print"):
+        """Enfileira um documento e retorna o PrintJob imediatamente (PrinterRejected se o nome não serve)"""
+        if self.printer_exists is not None and not self.printer_exists(printer_name):
+            raise PrinterNotFound(f"Impressora não encontrada: {printer_name}")
+        with self._lock:
+            if printer_name not in self._queues and len(self._queues) >= self.max_printers:
+                raise PrinterRejected(f"Limite de {self.max_printers} impressoras no spooler atingido")
+        job = PrintJob(printer_name, pages, doc_name)
+        if self.store is not None:
+            self.store.add(job)
+        self._enqueue(job)
+        return job
+
+    def restore(self):
+        """Reenfileira (na ordem) os documentos que ficaram pendentes no store"""
+        if self.store is None:
+            return 0
+        pending = self.store.pending()
+        for job_id, printer, doc_name, pages, created_at, attempts in pending:
+            job = PrintJob(printer, pages, doc_name)
+            job.id, job.created_at, job.attempts = job_id, created_at, attempts
+            self._enqueue(job)
+        return len(pending)
+
+    def _enqueue(self, job):
+        printer_name = job.printer_name
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim_history()
+            q = self._queues.get(printer_name)
+            if q is None:
+                q = self._start_printer(printer_name)
+        q.put(job)
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "queued": q.qsize(),
+                    "workers": len(self._workers[name]),
+                    "retrying": len(self._retrying.get(name, ())),
+                    "problem": next(iter(self._retrying.get(name, {}).values()), None),
+                }
+                for name, q in self._queues.items()
+            }
+
+    def summary(self):
+        """Totais para o /status"""
+        printers = self.stats()
+        return {
+            "queued": sum(p["queued"] for p in printers.values()),
+            "retrying": sum(p["retrying"] for p in printers.values()),
+            "failed": self.failed_total,
+            "retries": self.retries_total,
+            "persisted": self.store.count() if self.store is not None else None,
+            "printers": printers,
+        }
+
+    def shutdown(self, timeout=5):
+        self._stop.set()
+        with self._lock:
+            for name, q in self._queues.items():
+                for _ in self._workers[name]:
+                    q.put(None)
+            threads = [t for ts in self._workers.values() for t in ts]
+        for t in threads:
+            t.join(timeout)
+
+    def _start_printer(self, printer_name):
+        # Chamado com self._lock adquirido
+        q = queue.Queue()
+        self._queues[printer_name] = q
+        self._workers[printer_name] = []
+        for i in range(self.workers_per_printer):
+            t = threading.Thread(
+                target=self._worker_loop, args=(printer_name, q),
+                name=f"spool-{printer_name}-{i}", daemon=True
+            )
+            self._workers[printer_name].append(t)
+            t.start()
+        print(f"🖨️ Spooler: {self.workers_per_printer} worker(s) dedicado(s) para '{printer_name}'", flush=True)
+        return q
+
+    def _trim_history(self):
+        # Descarta os trabalhos finalizados mais antigos (chamado com self._lock)
+        while len(self._jobs) > self.max_history:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.done.is_set():
+                break
+            del self._jobs[oldest_id]
+
+    def _worker_loop(self, printer_name, q):
+        backend = None
+        while not self._stop.is_set():
+            job = q.get()
+            if job is None:
+                break
+            try:
+                backend = self._print_with_retry(printer_name, job, backend)
+            finally:
+                q.task_done()
+        if backend is not None:
+            self._close(backend)
+
+    def _print_with_retry(self, printer_name, job, backend):
+        """Imprime segurando a fila desta impressora até dar certo (ou expirar). Retorna o backend"""
+        while True:
+            job.status = "printing"
+            job.started_at = job.started_at or time.time()
+            job.attempts += 1
+            try:
+                # Handle aberto sob demanda e mantido entre os tickets
+                if backend is None:
+                    backend = self.backend_factory(printer_name)
+                    backend.open()
+                problem = backend.probe()
+                if problem:
+                    raise PrinterUnavailable(problem)
+                backend.write_document(job.doc_name, job.pages)
+            except PrinterNotFound as e:
+                # Nome inválido não volta sozinho: falha já e libera a fila
+                job.error = str(e)
+                if backend is not None:
+                    self._close(backend)
+                print(f"❌ Spooler: {e} (job {job.id} descartado)", flush=True)
+                self._finish(job, "failed")
+                self.failed_total += 1
+                return None
+            except Exception as e:
+                job.error = str(e)
+                # Handle possivelmente inválido: reabre na próxima tentativa
+                if backend is not None:
+                    self._close(backend)
+                    backend = None
+                if time.time() - job.created_at > self.max_age:
+                    print(f"❌ Spooler: desistindo do job {job.id} em '{printer_name}' ({e})", flush=True)
+                    self._finish(job, "failed")
+                    self.failed_total += 1
+                    return None
+                delay = min(self.retry_base * 2 ** (job.attempts - 1), self.retry_max)
+                job.status = "retrying"
+                with self._lock:
+                    self._retrying.setdefault(printer_name, {})[job.id] = job.error
+                if self.store is not None:
+                    self.store.set_attempts(job.id, job.attempts)
+                self.retries_total += 1
+                print(f"⏳ Spooler: '{printer_name}' indisponível ({e}). Nova tentativa em {delay:.0f}s", flush=True)
+                if self._stop.wait(delay):
+                    return None  # Encerrando: o job continua no store para o próximo início
+                continue
+            if job.attempts > 1:
+                print(f"✅ Spooler: '{printer_name}' voltou, liberando a fila", flush=True)
+            self._finish(job, "done")
+            return backend
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        with self._lock:
+            retrying = self._retrying.get(job.printer_name)
+            if retrying:
+                retrying.pop(job.id, None)
+        if self.store is not None:
+            self.store.remove(job.id)
+        job.done.set()
+
+    @staticmethod
+    def _close(backend):
+        try:
+            backend.close()
+        except Exception:
+            pass
@@ -0,0 +1,69 @@
+"""
+💾 Fila Persistente de Impressão
+
+Todo documento entra aqui antes de ir para o spooler e só sai quando a
+impressora confirmar (ou quando desistimos de vez). Se o agente cair com a
+impressora desligada, as comandas pendentes voltam para a fila, na mesma
+ordem, no próximo início.
+"""
+
+import base64
+import json
+import sqlite3
+import threading
+
+
+class PrintJobStore:
+    """Documentos pendentes por impressora em SQLite"""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS print_jobs ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " job_id TEXT UNIQUE NOT NULL,"
+            " printer TEXT NOT NULL,"
+            " doc_name TEXT NOT NULL,"
+            " pages TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def add(self, job):
+        pages = json.dumps([base64.b64encode(p).decode('ascii') for p in job.pages])
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO print_jobs (job_id, printer, doc_name, pages, created_at, attempts)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, job.printer_name, job.doc_name, pages, job.created_at, job.attempts),
+            )
+
+    def set_attempts(self, job_id, attempts):
+        with self._lock:
+            self._conn.execute("UPDATE print_jobs SET attempts = ? WHERE job_id = ?", (attempts, job_id))
+
+    def remove(self, job_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM print_jobs WHERE job_id = ?", (job_id,))
+
+    def pending(self):
+        """[(job_id, printer, doc_name, pages, created_at, attempts)] em ordem de chegada"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, printer, doc_name, pages, created_at, attempts FROM print_jobs ORDER BY seq"
+            ).fetchall()
+        return [
+            (job_id, printer, doc_name, [base64.b64decode(p) for p in json.loads(pages)], created_at, attempts)
+            for job_id, printer, doc_name, pages, created_at, attempts in rows
+        ]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM print_jobs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,191 @@
+"""
+🗂️ Inventário de Impressoras (cache em memória)
+
+Enumerar impressoras de rede pode levar segundos, e o painel consulta o
+/status o tempo todo. Uma thread atualiza o inventário em segundo plano
+(por intervalo ou quando o spooler avisa de mudança) e as rotas só leem a
+memória, informando a idade do dado.
+
+A enumeração fica atrás de InventoryBackend: Win32Inventory no Windows,
+FakeInventory nos testes (roda em qualquer sistema). O win32print só é
+importado na primeira consulta, já na fase "impressoras" (thread própria,
+depois que o servidor HTTP sobe).
+"""
+
+import threading
+import time
+
+from lazy_imports import lazy
+
+NO_PRINTER = "Nenhuma impressora encontrada"
+
+
+class InventoryBackend:
+    """Fonte do inventário"""
+
+    def default_printer(self):
+        raise NotImplementedError
+
+    def list_printers(self):
+        raise NotImplementedError
+
+    def wait_for_change(self, timeout):
+        """Bloqueia até uma mudança no spooler (True) ou até o timeout (False)"""
+        time.sleep(timeout)
+        return False
+
+
+class Win32Inventory(InventoryBackend):
+    """Inventário real via win32print, com aviso de mudança do spooler"""
+
+    CHANGE_FLAGS = 0x000000FF  # PRINTER_CHANGE_PRINTER (add/set/delete; ignora jobs)
+
+    def __init__(self):
+        self._win32print = lazy("win32print")
+        self._notify = None
+        self._spooler = None
+
+    def default_printer(self):
+        return self._win32print.GetDefaultPrinter()
+
+    def list_printers(self):
+        wp = self._win32print
+        return [p[2] for p in wp.EnumPrinters(wp.PRINTER_ENUM_LOCAL | wp.PRINTER_ENUM_CONNECTIONS)]
+
+    def wait_for_change(self, timeout):
+        try:
+            win32event = lazy("win32event")
+            if self._notify is None:
+                self._spooler = self._win32print.OpenPrinter(None)
+                self._notify = self._win32print.FindFirstPrinterChangeNotification(
+                    self._spooler, self.CHANGE_FLAGS, 0, None
+                )
+            result = win32event.WaitForSingleObject(self._notify, int(timeout * 1000))
+            if result == win32event.WAIT_OBJECT_0:
+                self._win32print.FindNextPrinterChangeNotification(self._notify, 0)
+                return True
+            return False
+        except Exception:
+            # Sem notificação disponível (permissão/driver): fica só no intervalo
+            self._notify = None
+            return super().wait_for_change(timeout)
+
+
+class FakeInventory(InventoryBackend):
+    """Inventário de mentira para testes (com atraso de enumeração simulado)"""
+
+    def __init__(self, printers=None, default=None, delay=0.0):
+        self.printers = list(printers or [])
+        self.default = default or (self.printers[0] if self.printers else None)
+        self.delay = delay
+        self.enumerations = 0
+        self._changed = threading.Event()
+
+    def set(self, printers, default=None):
+        self.printers = list(printers)
+        self.default = default or (self.printers[0] if self.printers else None)
+        self._changed.set()
+
+    def default_printer(self):
+        if not self.default:
+            raise RuntimeError("sem impressora padrão")
+        return self.default
+
+    def list_printers(self):
+        self.enumerations += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return list(self.printers)
+
+    def wait_for_change(self, timeout):
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
+
+
+class PrinterInventory:
+    """Cache do inventário com atualização em segundo plano"""
+
+    def __init__(self, backend, refresh_interval=60.0, wake_interval=1.0):
+        self.backend = backend
+        self.refresh_interval = refresh_interval
+        self.wake_interval = wake_interval  # de quanto em quanto a thread confere pedidos de atualização
+        self._lock = threading.Lock()
+        self._default = None
+        self._printers = []
+        self._refreshed_at = None  # time.time() da última enumeração completa
+        self._refreshing = threading.Event()
+        self._wanted = threading.Event()  # request_refresh(): alguém pediu uma enumeração antes do intervalo
+        self._thread = None
+        self.refreshes = 0
+        self.last_error = None
+        self.last_duration_ms = None
+
+    def start(self):
+        """Lê só a padrão (rápido) agora; a enumeração completa vai para a thread"""
+        self._refresh_default()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="printer-inventory", daemon=True)
+            self._thread.start()
+
+    def default_printer(self):
+        with self._lock:
+            return self._default or NO_PRINTER
+
+    def snapshot(self):
+        with self._lock:
+            refreshed_at = self._refreshed_at
+            return {
+                "default": self._default or NO_PRINTER,
+                "printers": list(self._printers),
+                "refreshed_at": refreshed_at,
+                "age_s": round(time.time() - refreshed_at, 1) if refreshed_at else None,
+                "refreshing": self._refreshing.is_set(),
+                "last_error": self.last_error,
+            }
+
+    def request_refresh(self):
+        """Pede uma enumeração à thread (não bloqueia: quem chama responde com o cache atual)"""
+        self._wanted.set()
+
+    def refresh(self):
+        """Enumeração completa (bloqueante; normalmente chamada pela thread)"""
+        self._refreshing.set()
+        start = time.perf_counter()
+        try:
+            printers = self.backend.list_printers()
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            return False
+        finally:
+            self._refreshing.clear()
+        self._refresh_default()
+        with self._lock:
+            self._printers = printers
+            self._refreshed_at = time.time()
+        self.refreshes += 1
+        self.last_error = None
+        self.last_duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        return True
+
+    def _refresh_default(self):
+        try:
+            default = self.backend.default_printer()
+        except Exception:
+            default = None
+        with self._lock:
+            self._default = default
+
+    def _run(self):
+        while True:
+            self._wanted.clear()
+            self.refresh()
+            # Acorda no intervalo ou antes, se o spooler avisar que algo mudou ou alguém pedir
+            deadline = time.monotonic() + self.refresh_interval
+            while not self._wanted.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if self.backend.wait_for_change(min(remaining, self.wake_interval)):
+                    print("🗂️ Mudança nas impressoras detectada, atualizando inventário...", flush=True)
+                    break
@@ -0,0 +1,169 @@
+"""
+⏱️ Orquestrador de Inicialização
+
+Mede cada fase do início do agente (início relativo ao processo e duração),
+roda as fases independentes em paralelo e mantém uma bandeira de prontidão
+por subsistema. O agent.py sobe o servidor HTTP primeiro e só então dispara
+as fases pesadas (memória de contatos, fila de impressão, impressoras,
+Chromium); as rotas que dependem de uma fase esperam por ela com
+wait_ready() e o /status responde desde o primeiro instante. A linha do
+tempo é gravada em JSON (substitui os startup_log.txt/startup_check.txt).
+"""
+
+import json
+import os
+import threading
+import time
+
+# Referência zero da linha do tempo: importação deste módulo (logo no início do agent.py)
+T0 = time.perf_counter()
+
+
+def _now_ms():
+    return round((time.perf_counter() - T0) * 1000, 1)
+
+
+class StartupOrchestrator:
+    """Fases cronometradas + bandeiras de prontidão por subsistema"""
+
+    def __init__(self, timeline_path=None, poll_interval=0.05):
+        self.timeline_path = timeline_path
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)  # avisa quem espera em wait_ready()
+        self._phases = []  # [{phase, start_ms, duration_ms, thread, error}]
+        self._subsystems = {}  # {nome: {ready, since_ms, ready_ms, error}}
+        self._probes = {}  # {nome: callable -> bool}
+        self._watcher = None
+        self._last_checkpoint = 0.0
+        self.started_at = time.time() - (time.perf_counter() - T0)
+
+    # --- Fases ---
+
+    def checkpoint(self, name):
+        """Fecha a fase sequencial `name` (do checkpoint anterior até agora)"""
+        start, self._last_checkpoint = self._last_checkpoint, _now_ms()
+        self._record(name, start, None)
+
+    def run_parallel(self, name, fn, *args, ready=True, **kwargs):
+        """Roda fn numa thread própria; ao terminar, marca o subsistema `name` como pronto"""
+        self._declare(name)
+
+        def runner():
+            start = _now_ms()
+            error = None
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                print(f"⚠️ Fase de inicialização '{name}' falhou: {error}", flush=True)
+            finally:
+                self._record(name, start, error)
+                if ready or error:
+                    self.mark_ready(name, error)
+
+        t = threading.Thread(target=runner, name=f"startup-{name}", daemon=True)
+        t.start()
+        return t
+
+    # --- Prontidão ---
+
+    def expect(self, name):
+        """Declara um subsistema que alguém vai marcar com mark_ready()"""
+        self._declare(name)
+
+    def track(self, name, probe):
+        """Subsistema que fica pronto sozinho: probe() é consultado até dar True"""
+        self._declare(name)
+        with self._lock:
+            self._probes[name] = probe
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="startup-watch", daemon=True)
+                self._watcher.start()
+
+    def mark_ready(self, name, error=None):
+        with self._lock:
+            sub = self._subsystems.setdefault(name, {"ready": False, "since_ms": _now_ms(), "ready_ms": None, "error": None})
+            if sub["ready"]:
+                return
+            sub["ready"] = error is None
+            sub["ready_ms"] = _now_ms()
+            sub["error"] = error
+            self._probes.pop(name, None)
+            self._changed.notify_all()
+        if error is None:
+            print(f"🟢 {name} pronto em {sub['ready_ms']:.0f} ms", flush=True)
+        self.write_timeline()
+
+    def is_ready(self, name):
+        with self._lock:
+            sub = self._subsystems.get(name)
+            return bool(sub and sub["ready"])
+
+    def wait_ready(self, name, timeout=None):
+        """Bloqueia até o subsistema ficar pronto (ou falhar). Retorna is_ready(name)"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._subsystems.get(name, {}).get("ready_ms") is not None, timeout)
+            sub = self._subsystems.get(name)
+            return bool(sub and sub["ready"])
+
+    def readiness(self):
+        with self._lock:
+            return {
+                "uptime_s": round(time.perf_counter() - T0, 1),
+                "all_ready": all(s["ready"] for s in self._subsystems.values()),
+                "subsystems": {name: dict(sub) for name, sub in self._subsystems.items()},
+            }
+
+    # --- Linha do tempo ---
+
+    def timeline(self):
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "phases": list(self._phases),
+                "subsystems": {name: dict(sub) for name, sub in self._subsystems.items()},
+            }
+
+    def write_timeline(self):
+        if not self.timeline_path:
+            return
+        try:
+            tmp = self.timeline_path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.timeline(), f, indent=2, ensure_ascii=False)
+            os.replace(tmp, self.timeline_path)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar a linha do tempo de inicialização: {e}", flush=True)
+
+    # --- Internos ---
+
+    def _declare(self, name):
+        with self._lock:
+            self._subsystems.setdefault(name, {"ready": False, "since_ms": _now_ms(), "ready_ms": None, "error": None})
+
+    def _record(self, name, start, error):
+        with self._lock:
+            self._phases.append({
+                "phase": name,
+                "start_ms": start,
+                "duration_ms": round(_now_ms() - start, 1),
+                "thread": threading.current_thread().name,
+                "error": error,
+            })
+
+    def _watch(self):
+        while True:
+            with self._lock:
+                probes = list(self._probes.items())
+                if not probes:
+                    self._watcher = None
+                    return
+            for name, probe in probes:
+                try:
+                    ok = probe()
+                except Exception:
+                    ok = False
+                if ok:
+                    self.mark_ready(name)
+            time.sleep(self.poll_interval)
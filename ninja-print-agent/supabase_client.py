@@ -0,0 +1,176 @@
+"""
+🔗 Cliente REST do Supabase (PostgREST)
+
+Mantém um pool de conexões HTTPS keep-alive com o projeto (nada de abrir
+conexão + handshake TLS a cada consulta), com timeout, novas tentativas com
+backoff e um cache curto por (telefone, restaurante), para várias mensagens
+"cadê meu pedido?" seguidas não irem todas ao banco.
+"""
+
+import http.client
+import json
+import queue
+import ssl
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+
+# Status que valem nova tentativa (sobrecarga/instabilidade do lado de lá)
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class SupabaseError(Exception):
+    """Falha definitiva ao consultar o Supabase"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class SupabaseClient:
+    """Cliente PostgREST com pool keep-alive, retry com backoff e cache TTL"""
+
+    def __init__(self, base_url, api_key, pool_size=4, timeout=5.0, retries=2, backoff=0.2,
+                 cache_ttl=15.0, cache_max=1000):
+        parsed = urllib.parse.urlsplit(base_url.rstrip('/'))
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"URL do Supabase inválida: {base_url!r}")
+        self._https = parsed.scheme == "https"
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._prefix = parsed.path
+        self._ssl = ssl.create_default_context() if self._https else None
+        self._headers = {
+            'apikey': api_key,
+            'Authorization': f'Bearer {api_key}',
+            'Accept': 'application/json',
+            'Connection': 'keep-alive',
+        }
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_ttl = cache_ttl
+        self.cache_max = cache_max
+
+        self._pool = queue.LifoQueue(maxsize=pool_size)  # LIFO: reusa a conexão mais "quente"
+        self._cache = OrderedDict()  # {(phone, rid): (expira_em, pedido)}
+        self._cache_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "errors": 0, "connections": 0,
+                       "cache_hits": 0, "cache_misses": 0}
+
+    # --- Consultas ---
+
+    def get(self, table, params):
+        """GET /rest/v1/<table>?<params> e devolve o JSON decodificado"""
+        path = f"{self._prefix}/rest/v1/{table}?{urllib.parse.urlencode(params)}"
+        return self._request("GET", path)
+
+    def latest_order(self, phone, restaurante_id=None):
+        """Pedido mais recente do telefone (com cache curto, inclusive para 'não achei')"""
+        key = (phone, restaurante_id)
+        now = time.monotonic()
+        with self._cache_lock:
+            hit = self._cache.get(key)
+            if hit and hit[0] > now:
+                self._cache.move_to_end(key)
+                self._count("cache_hits")
+                return hit[1]
+        self._count("cache_misses")
+
+        params = {"telefone": f"eq.{phone}"}
+        if restaurante_id:
+            params["id_restaurante"] = f"eq.{restaurante_id}"
+        params["order"] = "criado_em.desc"
+        params["limit"] = "1"
+        pedidos = self.get("pedidos", params)
+        pedido = pedidos[0] if pedidos else None
+
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, pedido)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max:
+                self._cache.popitem(last=False)
+        return pedido
+
+    def invalidate(self, phone=None):
+        """Esquece o cache (de um telefone ou inteiro)"""
+        with self._cache_lock:
+            if phone is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0] == phone]:
+                    del self._cache[key]
+
+    def stats(self):
+        with self._stats_lock:
+            data = dict(self._stats)
+        data["pool_idle"] = self._pool.qsize()
+        data["cache_size"] = len(self._cache)
+        return data
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # --- Internos ---
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def _connect(self):
+        self._count("connections")
+        if self._https:
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout, context=self._ssl)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _request(self, method, path):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._count("retries")
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            self._count("requests")
+            conn = self._acquire()
+            try:
+                conn.request(method, path, headers=self._headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                # Conexão quebrada/expirada pelo servidor: descarta e tenta de novo numa nova
+                conn.close()
+                last_error = SupabaseError(f"{type(e).__name__}: {e}")
+                continue
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+
+            if response.status in RETRY_STATUS:
+                last_error = SupabaseError(f"HTTP {response.status}", response.status)
+                continue
+            if response.status >= 400:
+                self._count("errors")
+                raise SupabaseError(f"HTTP {response.status}: {body[:200]!r}", response.status)
+            return json.loads(body.decode('utf-8')) if body else None
+
+        self._count("errors")
+        raise last_error
@@ -0,0 +1,89 @@
+"""
+🧪 Teste da memória anti-duplicidade (DedupStore)
+
+Confere que o claim é atômico (várias threads disputando a mesma chave, só
+uma ganha), que a chave vencida pode ser reclamada, que release() libera a
+chave na hora e que a memória sobrevive a um reinício (mesmo arquivo).
+
+Uso: py test_dedup_store.py
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from dedup_store import DedupStore
+
+
+def test_atomic_claim(path):
+    # Duas conexões no mesmo arquivo: a atomicidade vem do INSERT condicional, não só da trava
+    stores = [DedupStore(path), DedupStore(path)]
+    key = DedupStore.make_key("pedido-42", "pronto")
+    barrier = threading.Barrier(16)
+    wins = []
+
+    def worker(store):
+        barrier.wait()
+        if store.claim(key):
+            wins.append(threading.get_ident())
+
+    threads = [threading.Thread(target=worker, args=(stores[i % 2],)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(wins) == 1, wins
+    assert all(key in store and len(store) == 1 for store in stores)
+    for store in stores:
+        store.close()
+    print("✅ 16 threads em duas conexões disputando a mesma chave: só um claim venceu")
+
+    # Reinício: a chave continua marcada
+    store = DedupStore(path)
+    assert not store.claim(key)
+    store.close()
+    print("✅ Chave continua marcada depois de reabrir o arquivo")
+
+
+def test_ttl_reclaim(path):
+    store = DedupStore(path, ttl_seconds=0.2)
+    key = DedupStore.make_key("pedido-7", "saiu_para_entrega")
+
+    assert store.claim(key)
+    assert not store.claim(key)
+    time.sleep(0.3)
+    assert key not in store and len(store) == 0
+    assert store.claim(key), "chave vencida deveria ser reclamada"
+    assert not store.claim(key)
+    print("✅ Chave vencida (TTL) volta a ser reclamada uma única vez")
+
+    time.sleep(0.3)
+    assert store.sweep() == 1 and store.sweep() == 0
+    store.close()
+    print("✅ sweep() remove as entradas vencidas")
+
+
+def test_release(path):
+    store = DedupStore(path)
+    key = DedupStore.make_key("pedido-9", "aceito")
+
+    assert store.claim(key)
+    store.release(key)
+    assert key not in store
+    assert store.claim(key), "chave liberada deveria ser reclamada"
+    assert not store.claim(key)
+    store.release("chave-que-nao-existe")
+    store.close()
+    print("✅ release() desfaz o claim e a chave pode ser reclamada")
+
+
+def main():
+    for test in (test_atomic_claim, test_ttl_reclaim, test_release):
+        with tempfile.TemporaryDirectory() as directory:
+            test(os.path.join(directory, "dedup.db"))
+
+
+if __name__ == "__main__":
+    main()
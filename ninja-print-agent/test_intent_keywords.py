@@ -0,0 +1,99 @@
+"""
+🧪 Teste das palavras-chave por restaurante (ponta a ponta)
+
+1. Offline: o IntentMatcher só reconhece a palavra extra no restaurante dela
+   e recusa palavras mal formadas (string solta, item que não é texto).
+2. Com o agente rodando: registra um restaurante pelo painel
+   (/register-restaurant), envia as palavras dele (/intent-keywords) e pede a
+   detecção SEM restaurante_id (/intent-keywords/detect), como a caixa de
+   entrada faz: o agente tem que resolver o restaurante sozinho e usar as
+   palavras extras.
+
+Uso: py test_intent_keywords.py   (parte 2 pulada se o agente não estiver no ar)
+"""
+
+import json
+import os
+import tempfile
+import urllib.error
+import urllib.request
+
+from intent_matcher import IntentMatcher
+
+BASE_URL = "http://localhost:5001"
+RESTAURANTE = "teste-palavras-chave"
+PALAVRA = "rodizio de sushi"
+MENSAGEM = "Boa noite, hoje tem rodízio de sushi?"
+
+
+def post(path, payload):
+    req = urllib.request.Request(
+        BASE_URL + path, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def test_matcher():
+    matcher = IntentMatcher({"cardapio": ["cardápio", "menu"], "horario": ["horário"]})
+    matcher.set_restaurant_keywords(RESTAURANTE, {"cardapio": [PALAVRA]})
+    assert matcher.best(MENSAGEM) is None
+    assert matcher.best(MENSAGEM, "outro-restaurante") is None
+    assert matcher.best(MENSAGEM, RESTAURANTE) == "cardapio"
+    print("✅ Palavra extra reconhecida só no restaurante dela")
+
+
+def test_invalid_keywords():
+    matcher = IntentMatcher({"cardapio": ["cardápio"]})
+    for bad in ({"cardapio": "pizza"}, {"cardapio": [123]}, {"cardapio": []}, {"cardapio": ["  "]}, ["pizza"]):
+        try:
+            matcher.set_restaurant_keywords(RESTAURANTE, bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"formato inválido aceito: {bad!r}")
+    # String solta viraria letras soltas: nada pode ter sido trocado
+    assert matcher.classify("oi tudo bem", RESTAURANTE) == []
+
+    path = os.path.join(tempfile.mkdtemp(), "palavras.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"ok": {"cardapio": ["pizza"]}, RESTAURANTE: {"cardapio": "pizza"}}, f)
+    try:
+        matcher.load_restaurant_file(path)
+        raise AssertionError("arquivo inválido aceito")
+    except ValueError as e:
+        assert RESTAURANTE in str(e), e
+    assert matcher.best("tem pizza?", "ok") is None, "arquivo inválido não pode ser aplicado pela metade"
+    print("✅ Palavras-chave mal formadas recusadas (endpoint responde 400)")
+
+
+def test_agent():
+    try:
+        post("/register-restaurant", {
+            "restaurante_id": RESTAURANTE, "nome": "Teste", "cardapio_link": "https://exemplo.com/cardapio"
+        })
+    except urllib.error.URLError:
+        print("⏭️ Agente não está rodando: parte ponta a ponta pulada (execute agent.py)")
+        return
+    try:
+        post("/intent-keywords", {"restaurante_id": RESTAURANTE, "keywords": {"cardapio": "pizza"}})
+        raise AssertionError("o agente aceitou keywords mal formadas")
+    except urllib.error.HTTPError as e:
+        assert e.code == 400, e.code
+    post("/intent-keywords", {"restaurante_id": RESTAURANTE, "keywords": {"cardapio": [PALAVRA]}})
+
+    result = post("/intent-keywords/detect", {"mensagem": MENSAGEM})
+    if result["restaurante_id"] != RESTAURANTE:
+        print(f"⚠️ O agente usa RESTAURANTE_ID={result['restaurante_id']} do .env; conferindo com ele explícito")
+        result = post("/intent-keywords/detect", {"mensagem": MENSAGEM, "restaurante_id": RESTAURANTE})
+    assert result["intencao"] == "cardapio", result
+    print(f"✅ Caixa de entrada usa as palavras do restaurante: {result}")
+
+
+def main():
+    test_matcher()
+    test_invalid_keywords()
+    test_agent()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+🧪 Teste da contrapressão do /notify (pool limitado + 429 + Retry-After)
+
+1. Offline: enche o BoundedExecutor (threads presas) e confere que o
+   try_submit seguinte recusa na hora, sem bloquear nem criar threads, com
+   uma estimativa de Retry-After; a vaga volta quando a fila anda.
+2. Offline: o claim do DedupStore devolvido na recusa pode ser reclamado
+   (o painel consegue reenviar a mesma notificação).
+3. Com o agente rodando com NOTIFY_MAX_BACKLOG=0 (toda notificação é
+   recusada, nada é enviado no WhatsApp): /notify responde 429 com
+   Retry-After, e repetir o mesmo pedido/status dá 429 de novo em vez de
+   "Já enviado", provando que a chave foi liberada.
+
+Uso: py test_notify_backpressure.py   (parte 3 pulada se o agente não estiver no ar)
+     Para a parte 3: set NOTIFY_MAX_BACKLOG=0 && py agent.py
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from dedup_store import DedupStore
+from worker_pool import BoundedExecutor
+
+BASE_URL = "http://localhost:5001"
+
+
+def test_pool_saturation():
+    pool = BoundedExecutor(max_workers=2, max_queue=3, name="teste-notify")
+    gate = threading.Event()
+    started = threading.Semaphore(0)
+
+    def blocked_task():
+        started.release()
+        gate.wait(5)
+
+    accepted = [pool.try_submit(blocked_task) for _ in range(5)]
+    assert all(accepted), accepted
+    for _ in range(2):
+        assert started.acquire(timeout=1), "as threads do pool não começaram"
+
+    start = time.perf_counter()
+    assert pool.try_submit(blocked_task) is False
+    assert (time.perf_counter() - start) < 0.05, "try_submit não pode bloquear com a fila cheia"
+    stats = pool.stats()
+    assert stats["rejected"] == 1 and stats["active"] == 2 and stats["queued"] == 3, stats
+    assert pool.pending() == 5 and pool.retry_after() >= 1
+    print(f"✅ Pool cheio (2 threads + 3 na fila): 6ª tarefa recusada na hora, Retry-After {pool.retry_after()}s")
+
+    gate.set()
+    deadline = time.time() + 5
+    while pool.pending() and time.time() < deadline:
+        time.sleep(0.01)
+    assert pool.pending() == 0, pool.stats()
+    assert pool.try_submit(lambda: None)
+    pool.shutdown()
+    stats = pool.stats()
+    assert stats["completed"] == 6 and stats["threads"] <= 2, stats
+    print("✅ Fila escoou e o pool voltou a aceitar, sem criar threads além do limite")
+
+
+def test_released_claim():
+    path = os.path.join(tempfile.mkdtemp(), "notificacoes.db")
+    store = DedupStore(path)
+    notif_id = DedupStore.make_key("pedido-123", "pronto")
+
+    # Mesmo caminho do reject_notify: claim, fila cheia, devolve a chave
+    assert store.claim(notif_id)
+    store.release(notif_id)
+    assert notif_id not in store
+    assert store.claim(notif_id), "a chave devolvida na recusa deveria poder ser reclamada"
+    assert not store.claim(notif_id)
+    store.close()
+    print("✅ Chave liberada na recusa é reclamada no reenvio (e só uma vez)")
+
+
+def post(path, payload):
+    req = urllib.request.Request(
+        BASE_URL + path, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, resp.headers, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, json.loads(e.read())
+
+
+def test_agent():
+    try:
+        with urllib.request.urlopen(BASE_URL + "/status", timeout=5) as resp:
+            status = json.loads(resp.read())
+    except urllib.error.URLError:
+        print("⏭️ Agente não está rodando: parte HTTP pulada (execute agent.py com NOTIFY_MAX_BACKLOG=0)")
+        return
+    if status["notify_backlog"]["max"] != 0:
+        print("⏭️ Agente rodando sem NOTIFY_MAX_BACKLOG=0: parte HTTP pulada (ela não envia mensagens de verdade)")
+        return
+
+    payload = {
+        "status": "pronto",
+        "customer_name": "Teste Contrapressão",
+        "phone": "5500000000000",
+        "order_id": f"teste-429-{int(time.time())}",
+    }
+    for attempt in range(2):
+        code, headers, body = post("/notify", payload)
+        assert code == 429, (attempt, code, body)
+        retry_after = int(headers["Retry-After"])
+        assert retry_after >= 1 and body["retry_after"] == retry_after, (headers, body)
+    print(f"✅ /notify recusou com 429 + Retry-After {retry_after}s e liberou a chave (repetição também 429)")
+
+
+def main():
+    test_pool_saturation()
+    test_released_claim()
+    test_agent()
+
+
+if __name__ == "__main__":
+    main()
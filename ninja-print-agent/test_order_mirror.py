@@ -0,0 +1,76 @@
+"""
+🧪 Teste do espelho de pedidos com um feed falso
+
+Alimenta o OrderMirror pelo FakeFeed (sem Supabase) e confere: pedido mais
+recente por telefone/restaurante, atualização de status, falha do feed e o
+custo de uma consulta em memória; e que o PollingFeed não busca nada sem
+restaurante e só cobre os restaurantes que já buscou.
+
+Uso: py test_order_mirror.py
+"""
+
+import timeit
+
+from order_mirror import FakeFeed, OrderMirror, PollingFeed
+
+
+class FakeClient:
+    """Cliente PostgREST falso: registra os parâmetros e devolve página vazia"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, table, params):
+        self.calls.append(params)
+        return []
+
+
+def main():
+    feed = FakeFeed()
+    mirror = OrderMirror(feed, poll_interval=0.05)
+    assert not mirror.fresh
+
+    feed.push(
+        {"id": 1, "telefone": "(83) 99999-0000", "id_restaurante": "fenix", "status": "aceito", "criado_em": "2024-01-01T12:00:00"},
+        {"id": 2, "telefone": "5583999990000", "id_restaurante": "fenix", "status": "preparando", "criado_em": "2024-01-01T13:00:00"},
+        {"id": 3, "telefone": "83999990000", "id_restaurante": "outro", "status": "pendente", "criado_em": "2024-01-01T14:00:00"},
+    )
+    assert mirror.sync_once() == 3 and mirror.fresh
+    assert mirror.latest("83999990000", "fenix")["id"] == 2
+    assert mirror.latest("83999990000")["id"] == 3
+    assert mirror.latest("11888880000", "fenix") is None
+    print("✅ Pedido mais recente por telefone e restaurante")
+
+    # Mudança de status chega pelo feed e substitui a linha (upsert)
+    feed.push({"id": 2, "telefone": "5583999990000", "id_restaurante": "fenix", "status": "saiu_entrega", "criado_em": "2024-01-01T13:00:00"})
+    mirror.sync_once()
+    assert mirror.latest("83999990000", "fenix")["status"] == "saiu_entrega"
+    assert mirror.stats()["orders"] == 3
+    print("✅ Atualização incremental de status")
+
+    # Feed fora do ar: espelho mantém os dados e registra o erro
+    feed.fail_next = 1
+    assert mirror.sync_once() == 0
+    assert mirror.stats()["errors"] == 1 and mirror.latest("83999990000", "fenix")
+    print("✅ Falha do feed não apaga o espelho")
+
+    # Feed por PostgREST: sem restaurante não consulta; só cobre os restaurantes já buscados
+    client = FakeClient()
+    ids = []
+    polling = PollingFeed(client, restaurant_ids=lambda: ids)
+    assert polling.fetch(polling.initial_cursor())[0] == [] and not client.calls
+    assert not polling.covers("fenix")
+    ids.append("fenix")
+    polling.fetch(polling.initial_cursor())
+    assert client.calls[-1]["id_restaurante"] == "in.(fenix)"
+    assert polling.covers("fenix") and not polling.covers("outro")
+    print("✅ Feed sem restaurante não busca nada; restaurante fora do feed vai para a rede")
+
+    n = 100000
+    t = timeit.timeit(lambda: mirror.latest("83999990000", "fenix"), number=n)
+    print(f"⏱️ Consulta em memória: {t / n * 1e6:.2f} µs")
+    print("📊", mirror.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+🧪 Teste do spooler de impressão com a FilePrinter
+
+Grava os documentos RAW em um diretório temporário e confere que a ordem de
+chegada é mantida, que uma impressora "desligada" (arquivo .offline) segura a
+fila em backoff e libera tudo na ordem quando volta, que os pendentes
+voltam do PrintJobStore depois de um reinício e que um nome fora do
+inventário é recusado no submit.
+
+Uso: py test_print_spooler.py
+"""
+
+import os
+import tempfile
+import time
+
+from print_spooler import FilePrinter, PrinterNotFound, PrintSpooler
+from print_store import PrintJobStore
+from printer_inventory import FakeInventory, PrinterInventory
+
+PRINTER = "Elgin i9"
+
+
+def make_spooler(directory, **kwargs):
+    return PrintSpooler(lambda name: FilePrinter(name, directory=directory), **kwargs)
+
+
+def read_output(directory):
+    with open(os.path.join(directory, "Elgin_i9.prn"), "rb") as f:
+        return f.read()
+
+
+def wait_all(jobs, timeout=5):
+    for job in jobs:
+        assert job.done.wait(timeout), f"job {job.id} não terminou ({job.status})"
+
+
+def test_order(directory):
+    spooler = make_spooler(directory)
+    jobs = [spooler.submit(PRINTER, [f"pedido {i}\n".encode()]) for i in range(20)]
+    wait_all(jobs)
+    spooler.shutdown()
+
+    assert all(job.status == "done" and job.attempts == 1 for job in jobs)
+    expected = b"".join(f"pedido {i}\n".encode() for i in range(20))
+    assert read_output(directory) == expected, read_output(directory)
+    print("✅ 20 comandas impressas na ordem de chegada")
+
+
+def test_offline_backoff(directory):
+    offline_flag = os.path.join(directory, "Elgin_i9.offline")
+    open(offline_flag, "w").close()
+
+    spooler = make_spooler(directory, retry_base=0.1, retry_max=0.2)
+    first = spooler.submit(PRINTER, [b"A\n"])
+    second = spooler.submit(PRINTER, [b"B\n"])
+
+    # Fora do ar: o primeiro fica em backoff segurando a fila, o segundo espera atrás dele
+    time.sleep(0.6)
+    assert first.status == "retrying" and "offline" in first.error, first.to_dict()
+    assert second.status == "queued", second.to_dict()
+    assert first.attempts >= 2 and spooler.retries_total >= first.attempts - 1, (first.attempts, spooler.retries_total)
+    summary = spooler.summary()
+    assert summary["retrying"] == 1 and summary["queued"] == 1, summary
+    print(f"✅ Impressora offline detectada: {first.attempts} tentativas em backoff, fila segurada")
+
+    # Backoff exponencial com teto: 0.1, 0.2, 0.2... (nada de martelar a impressora)
+    attempts = first.attempts
+    time.sleep(0.4)
+    assert first.attempts - attempts <= 3, first.attempts - attempts
+    print("✅ Intervalo entre tentativas respeita o teto do backoff")
+
+    os.remove(offline_flag)
+    wait_all([first, second])
+    spooler.shutdown()
+
+    assert first.status == "done" and second.status == "done"
+    assert read_output(directory) == b"A\nB\n", read_output(directory)
+    assert spooler.summary()["retrying"] == 0 and spooler.failed_total == 0
+    print("✅ Impressora voltou e a fila foi liberada na ordem")
+
+
+def test_restore(directory):
+    store_path = os.path.join(directory, "print_jobs.db")
+    offline_flag = os.path.join(directory, "Elgin_i9.offline")
+    open(offline_flag, "w").close()
+
+    # Agente cai com a impressora desligada e três comandas na fila
+    store = PrintJobStore(store_path)
+    spooler = make_spooler(directory, store=store, retry_base=0.1, retry_max=0.1)
+    jobs = [spooler.submit(PRINTER, [f"comanda {i}\n".encode()]) for i in range(3)]
+    time.sleep(0.3)
+    spooler.shutdown()
+    assert store.count() == 3, store.count()
+    assert not any(job.done.is_set() for job in jobs)
+    store.close()
+    print("✅ 3 comandas pendentes persistidas no desligamento")
+
+    # Novo início com a impressora ligada: voltam na mesma ordem, com o mesmo id
+    os.remove(offline_flag)
+    store = PrintJobStore(store_path)
+    spooler = make_spooler(directory, store=store)
+    assert spooler.restore() == 3
+    restored = [spooler.get_job(job.id) for job in jobs]
+    assert all(job is not None for job in restored)
+    assert restored[0].attempts >= 1, restored[0].attempts
+    wait_all(restored)
+    spooler.shutdown()
+
+    assert read_output(directory) == b"comanda 0\ncomanda 1\ncomanda 2\n", read_output(directory)
+    assert store.count() == 0, store.count()
+    store.close()
+    print("✅ Pendentes restaurados do PrintJobStore e impressos na ordem")
+
+
+def test_unknown_printer(directory):
+    inventory = PrinterInventory(FakeInventory([PRINTER]))
+    inventory.refresh()
+    known = set(inventory.snapshot()["printers"])
+    spooler = make_spooler(directory, printer_exists=known.__contains__)
+
+    try:
+        spooler.submit("Impressora Inventada", [b"x"])
+        raise AssertionError("nome fora do inventário deveria ser recusado")
+    except PrinterNotFound:
+        pass
+    assert spooler.stats() == {}, spooler.stats()
+
+    job = spooler.submit(PRINTER, [b"ok\n"])
+    wait_all([job])
+    spooler.shutdown()
+    assert job.status == "done"
+    print("✅ Impressora fora do inventário recusada no submit, sem criar workers")
+
+
+def main():
+    for test in (test_order, test_offline_backoff, test_restore, test_unknown_printer):
+        with tempfile.TemporaryDirectory() as directory:
+            test(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+🧪 Teste do inventário de impressoras com um backend falso
+
+Simula uma enumeração lenta (impressoras de rede) e confere que as leituras
+saem da memória, que a idade do dado é informada e que um aviso de mudança
+do spooler atualiza o cache antes do intervalo, assim como request_refresh()
+(pedido de quem não achou a impressora, sem enumerar na própria thread).
+
+Uso: py test_printer_inventory.py
+"""
+
+import time
+
+from printer_inventory import FakeInventory, PrinterInventory
+
+
+def main():
+    backend = FakeInventory(["Elgin i9", "EPSON TM-T20"], delay=0.5)
+    inventory = PrinterInventory(backend, refresh_interval=30)
+    inventory.start()
+
+    # Padrão já disponível; enumeração lenta ainda em andamento
+    snap = inventory.snapshot()
+    assert snap["default"] == "Elgin i9" and snap["age_s"] is None, snap
+    print("✅ Impressora padrão disponível antes da enumeração terminar")
+
+    time.sleep(0.7)
+    start = time.perf_counter()
+    for _ in range(10000):
+        snap = inventory.snapshot()
+    per_call = (time.perf_counter() - start) / 10000 * 1e6
+    assert snap["printers"] == ["Elgin i9", "EPSON TM-T20"] and snap["age_s"] is not None
+    assert backend.enumerations == 1
+    print(f"✅ 10000 leituras, 1 enumeração ({per_call:.2f} µs por leitura)")
+
+    # Aviso de mudança do spooler: atualiza sem esperar os 30s
+    backend.set(["Bematech MP-4200"])
+    time.sleep(0.7)
+    snap = inventory.snapshot()
+    assert snap["printers"] == ["Bematech MP-4200"] and snap["default"] == "Bematech MP-4200", snap
+    print("✅ Mudança detectada e inventário atualizado:", snap)
+
+    # Impressora instalada sem aviso do spooler: request_refresh() volta na hora e a thread reenumera
+    backend.printers.append("Elgin i8")
+    start = time.perf_counter()
+    inventory.request_refresh()
+    assert (time.perf_counter() - start) < 0.01, "request_refresh não pode enumerar na thread de quem chama"
+    time.sleep(1.5 + 0.7)
+    assert "Elgin i8" in inventory.snapshot()["printers"], inventory.snapshot()
+    print("✅ request_refresh() reenumera em segundo plano")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+🧪 Teste do cliente Supabase contra um servidor PostgREST falso (local)
+
+Sobe um HTTP/1.1 keep-alive em 127.0.0.1 que responde /rest/v1/pedidos e
+confere: reuso de conexão, cache por (telefone, restaurante), retry em 5xx e
+timeout.
+
+Uso: py test_supabase_client.py
+"""
+
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from supabase_client import SupabaseClient, SupabaseError
+
+PEDIDOS = [
+    {"id": 101, "telefone": "5583999990000", "id_restaurante": "fenix", "status": "preparando", "criado_em": "2024-01-01T12:00:00"},
+    {"id": 102, "telefone": "5583999990000", "id_restaurante": "fenix", "status": "pronto", "criado_em": "2024-01-01T13:00:00"},
+]
+
+
+class StubPostgrest(ThreadingHTTPServer):
+    """Servidor falso: conta conexões/requisições e pode falhar ou atrasar sob comando"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.connections = 0
+        self.requests = 0
+        self.fail_next = 0
+        self.delay = 0.0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def handle_error(self, request, client_address):
+        pass  # cliente que desistiu (timeout) fecha o socket no meio da resposta
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        srv.requests += 1
+        if srv.delay:
+            time.sleep(srv.delay)
+        if srv.fail_next:
+            srv.fail_next -= 1
+            return self._send(503, {"message": "indisponível"})
+
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != "/rest/v1/pedidos" or self.headers.get("apikey") != "chave-teste":
+            return self._send(404, {"message": "não encontrado"})
+        q = dict(urllib.parse.parse_qsl(url.query))
+        rows = [p for p in PEDIDOS if "eq." + p["telefone"] == q.get("telefone")]
+        if "id_restaurante" in q:
+            rows = [p for p in rows if "eq." + p["id_restaurante"] == q["id_restaurante"]]
+        rows.sort(key=lambda p: p["criado_em"], reverse=True)
+        self._send(200, rows[: int(q.get("limit", len(rows)))])
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    srv = StubPostgrest().start()
+    client = SupabaseClient(srv.url, "chave-teste", timeout=0.5, retries=2, backoff=0.01, cache_ttl=0.3)
+
+    # 1) Consulta + reuso da mesma conexão keep-alive
+    pedido = client.latest_order("5583999990000", "fenix")
+    assert pedido["id"] == 102, pedido
+    client.invalidate()
+    client.latest_order("5583999990000", "fenix")
+    assert srv.connections == 1 and srv.requests == 2, (srv.connections, srv.requests)
+    print("✅ Pool keep-alive: 2 consultas, 1 conexão")
+
+    # 2) Cache por (telefone, restaurante), inclusive para "não achei"
+    for _ in range(5):
+        client.latest_order("5583999990000", "fenix")
+        assert client.latest_order("5511000000000", "fenix") is None
+    assert srv.requests == 3, srv.requests
+    time.sleep(0.35)
+    client.latest_order("5583999990000", "fenix")
+    assert srv.requests == 4, srv.requests
+    print("✅ Cache TTL: repetições não vão ao servidor e expiram")
+
+    # 3) Retry com backoff em 503
+    client.invalidate()
+    srv.fail_next = 2
+    assert client.latest_order("5583999990000", "fenix")["id"] == 102
+    srv.fail_next = 5
+    client.invalidate()
+    try:
+        client.latest_order("5583999990000", "fenix")
+        raise AssertionError("deveria falhar depois das novas tentativas")
+    except SupabaseError as e:
+        assert e.status == 503
+    srv.fail_next = 0
+    print("✅ Retry: 2 falhas recuperadas, 3 falhas viram SupabaseError")
+
+    # 4) Timeout
+    client.invalidate()
+    srv.delay = 1.0
+    start = time.monotonic()
+    try:
+        client.latest_order("5583999990000", "fenix")
+        raise AssertionError("deveria estourar o timeout")
+    except SupabaseError:
+        pass
+    elapsed = time.monotonic() - start
+    assert elapsed < 2.5, elapsed
+    srv.delay = 0.0
+    print(f"✅ Timeout: desistiu em {elapsed:.2f}s")
+
+    print("📊", client.stats())
+    client.close()
+    srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
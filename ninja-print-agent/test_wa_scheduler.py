@@ -0,0 +1,95 @@
+"""
+🧪 Teste do agendador de prioridades do WhatsApp
+
+Com as três pistas cheias, a retirada segue os pesos do agente (status 4 /
+auto_reply 2 / intencao 1) de forma intercalada, sem estrangular nenhuma
+pista. Confere também o reenfileiramento na frente (front=True), a ordem
+dentro de cada pista e que get() espera até chegar trabalho.
+
+Uso: py test_wa_scheduler.py
+"""
+
+import asyncio
+from collections import Counter
+
+from wa_scheduler import PriorityScheduler
+
+WEIGHTS = {"status": 4, "auto_reply": 2, "intencao": 1}
+
+
+async def test_weighted_dequeue():
+    scheduler = PriorityScheduler(WEIGHTS)
+    for lane in WEIGHTS:
+        for i in range(40):
+            scheduler.put_nowait(lane, f"{lane}-{i}")
+
+    taken = [await scheduler.get() for _ in range(70)]
+    counts = Counter(lane for lane, _ in taken)
+    assert counts == {"status": 40, "auto_reply": 20, "intencao": 10}, counts
+    print(f"✅ 70 retiradas com as pistas cheias: {dict(counts)} (4:2:1)")
+
+    # Suave: em qualquer janela de 7 retiradas cada pista aparece na proporção do peso
+    for start in range(0, 70, 7):
+        window = Counter(lane for lane, _ in taken[start:start + 7])
+        assert window == {"status": 4, "auto_reply": 2, "intencao": 1}, (start, window)
+    print("✅ Pistas intercaladas a cada 7 retiradas (nenhuma fica sem vez)")
+
+    # Dentro da pista a ordem de chegada é mantida
+    status_items = [item for lane, item in taken if lane == "status"]
+    assert status_items == [f"status-{i}" for i in range(40)], status_items[:5]
+    assert scheduler.depth("auto_reply") == 20 and scheduler.depth("intencao") == 30
+    print("✅ Ordem de chegada mantida dentro de cada pista")
+
+
+async def test_only_one_lane():
+    scheduler = PriorityScheduler(WEIGHTS)
+    for i in range(5):
+        scheduler.put_nowait("intencao", i)
+    taken = [await scheduler.get() for _ in range(5)]
+    assert taken == [("intencao", i) for i in range(5)], taken
+    assert scheduler.qsize() == 0
+    print("✅ Pista de peso baixo sozinha é atendida sem esperar as outras")
+
+
+async def test_front():
+    scheduler = PriorityScheduler(WEIGHTS)
+    scheduler.put_nowait("status", "novo-1")
+    scheduler.put_nowait("status", "novo-2")
+    scheduler.put_nowait("status", "retentativa", front=True)
+    taken = [await scheduler.get() for _ in range(3)]
+    assert [item for _, item in taken] == ["retentativa", "novo-1", "novo-2"], taken
+    print("✅ front=True devolve a tarefa para a frente da pista")
+
+    try:
+        scheduler.put_nowait("marketing", "x")
+        raise AssertionError("pista desconhecida deveria ser recusada")
+    except ValueError:
+        pass
+    print("✅ Pista desconhecida recusada")
+
+
+async def test_get_waits():
+    scheduler = PriorityScheduler(WEIGHTS)
+    getter = asyncio.ensure_future(scheduler.get())
+    await asyncio.sleep(0.05)
+    assert not getter.done()
+
+    asyncio.get_running_loop().call_soon(scheduler.put_nowait, "auto_reply", "oi")
+    lane, item = await asyncio.wait_for(getter, timeout=1)
+    assert (lane, item) == ("auto_reply", "oi")
+    print("✅ get() espera até chegar trabalho em qualquer pista")
+
+
+async def run_all():
+    await test_weighted_dequeue()
+    await test_only_one_lane()
+    await test_front()
+    await test_get_waits()
+
+
+def main():
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+🧪 Teste do supervisor da aba principal com páginas falsas
+
+Simula abas do WhatsApp Web (sem Chromium): a principal trava, estoura a
+memória ou fecha, e confere que a reserva aquecida assume em bem menos de
+um segundo, que a aba trocada é fechada e que a queda do contexto é
+repassada para o motor relançar o navegador. Também confere que a principal
+que perdeu a sessão ("Usar aqui") a retoma, que a reserva lazy só existe
+enquanto a principal falha e que um envio em andamento (trava da sessão)
+não conta como falha nem tem a aba trocada no meio.
+
+Uso: py test_wa_supervisor.py
+"""
+
+import asyncio
+import time
+
+from wa_supervisor import PageSupervisor, probe_page
+
+
+class FakePage:
+    """Aba falsa: state = ok | outra_aba | deslogado | carregando | travada"""
+
+    def __init__(self, context, state="outra_aba", heap_mb=200, load_delay=0.3):
+        self.context = context
+        self.state = state
+        self.heap_mb = heap_mb
+        self.load_delay = load_delay
+        self._closed = False
+        self._handlers = {}
+
+    def on(self, event, handler):
+        self._handlers.setdefault(event, []).append(handler)
+
+    def is_closed(self):
+        return self._closed
+
+    async def close(self):
+        if not self._closed:
+            self._closed = True
+            for handler in self._handlers.get("close", []):
+                handler(self)
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        await asyncio.sleep(self.load_delay)  # carregamento "frio" do WhatsApp Web
+
+    async def wait_for_selector(self, selector, timeout=None):
+        if self.state in ("travada", "carregando"):
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError(selector)
+
+    async def bring_to_front(self):
+        pass
+
+    async def evaluate(self, script, arg=None):
+        if self.state == "travada":
+            await asyncio.sleep(3600)
+        if isinstance(arg, list) and len(arg) == 3:
+            return {
+                "chats": self.state == "ok",
+                "qr": self.state == "deslogado",
+                "use_here": self.state == "outra_aba",
+                "heap_mb": self.heap_mb,
+            }
+        self.state = "ok"  # clique em "Usar aqui"
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self._handlers = []
+
+    def on(self, event, handler):
+        self._handlers.append(handler)
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        for page in self.pages:
+            await page.close()
+        for handler in self._handlers:
+            handler(self)
+
+
+async def wait_standby(supervisor, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not supervisor.stats()["standby_ready"]:
+        assert time.monotonic() < deadline, "reserva não aqueceu"
+        await asyncio.sleep(0.01)
+
+
+async def run():
+    context = FakeContext()
+    primary = FakePage(context, state="ok")
+    supervisor = PageSupervisor(context, primary, probe_interval=0.05, failures_to_recycle=2, max_heap_mb=1024,
+                                standby=True, load_timeout=1.0, probe_timeout=0.1, activate_timeout=0.5)
+    await supervisor.start()
+
+    result = await probe_page(primary, 0.1)
+    assert result["state"] == "ok" and result["ok"], result
+    assert (await probe_page(FakePage(context, state="deslogado"), 0.1))["ok"], "deslogado não deve trocar a aba"
+    assert not (await probe_page(FakePage(context, state="outra_aba"), 0.1))["ok"], "sessão em outra aba é falha"
+    print("✅ Sondagem: ok e deslogado não são falhas; sessão em outra aba é")
+
+    # 0. Sessão tomada por outra aba: a principal clica "Usar aqui" e continua sendo a principal
+    primary.state = "outra_aba"
+    deadline = time.monotonic() + 2.0
+    while supervisor.stats()["reclaims"] == 0:
+        assert time.monotonic() < deadline, supervisor.stats()
+        await asyncio.sleep(0.01)
+    assert supervisor.primary is primary and primary.state == "ok" and supervisor.stats()["recycles"] == 0
+    print("✅ Sessão em outra aba retomada pela própria aba principal")
+
+    # 1. Aba principal trava: duas sondagens ruins e a reserva assume
+    await wait_standby(supervisor)
+    primary.state = "travada"
+    new = await supervisor.replacement(primary, timeout=2.0)
+    assert new is not None and new is not primary and new.state == "ok", supervisor.stats()
+    assert primary.is_closed(), "aba travada deveria ter sido fechada"
+    stats = supervisor.stats()
+    assert stats["last_recovery_ms"] < 1000 and stats["cold_reloads"] == 0, stats
+    print(f"✅ Aba travada trocada pela reserva em {stats['last_recovery_ms']:.1f} ms")
+
+    # 2. Memória acima do limite: troca já na primeira sondagem
+    await wait_standby(supervisor)
+    new.heap_mb = 4096
+    newer = await supervisor.replacement(new, timeout=2.0)
+    assert newer is not None and supervisor.stats()["last_reason"] == "memoria", supervisor.stats()
+    print(f"✅ Heap estourado: aba trocada em {supervisor.stats()['last_recovery_ms']:.1f} ms")
+
+    # 3. Aba fechada sem reserva pronta: recarga fria de uma aba nova
+    supervisor.standby_enabled = False
+    await supervisor._close(supervisor.standby)
+    supervisor.standby = None
+    await newer.close()
+    cold = await supervisor.replacement(newer, timeout=2.0)
+    assert cold is not None and supervisor.stats()["cold_reloads"] == 1, supervisor.stats()
+    print(f"✅ Sem reserva: recarga fria em {supervisor.stats()['last_recovery_ms']:.1f} ms")
+
+    # 4. Contexto caiu: o motor é avisado para relançar o navegador
+    await context.close()
+    assert supervisor.lost() and await supervisor.replacement(cold, timeout=0.5) is None
+    await supervisor.stop()
+    print("✅ Queda do contexto repassada ao motor:", supervisor.stats())
+
+
+async def run_lazy():
+    context = FakeContext()
+    primary = FakePage(context, state="ok")
+    supervisor = PageSupervisor(context, primary, probe_interval=0.05, failures_to_recycle=100,
+                                load_timeout=1.0, probe_timeout=0.1, activate_timeout=0.5)
+    await supervisor.start()
+
+    # Principal saudável: nenhuma segunda instância do WhatsApp Web na memória
+    await asyncio.sleep(0.3)
+    assert not context.pages and not supervisor.stats()["standby_ready"], supervisor.stats()
+
+    # Primeira falha aquece a reserva; a principal volta e a reserva é fechada
+    primary.state = "carregando"
+    await wait_standby(supervisor)
+    standby = supervisor.standby
+    primary.state = "ok"
+    deadline = time.monotonic() + 2.0
+    while not standby.is_closed():
+        assert time.monotonic() < deadline, supervisor.stats()
+        await asyncio.sleep(0.01)
+    assert supervisor.primary is primary and supervisor.stats()["recycles"] == 0
+    await supervisor.stop()
+    print("✅ Reserva lazy: aquecida só enquanto a principal falha, fechada quando ela volta")
+
+
+async def run_session_lock():
+    context = FakeContext()
+    primary = FakePage(context, state="ok")
+    session_lock = asyncio.Lock()
+    supervisor = PageSupervisor(context, primary, probe_interval=0.05, failures_to_recycle=2, standby=False,
+                                load_timeout=1.0, probe_timeout=0.1, activate_timeout=0.5, session_lock=session_lock)
+    await supervisor.start()
+
+    # Envio no meio de um page.goto: a aba "carrega", mas o supervisor não sonda nem troca
+    async with session_lock:
+        primary.state = "carregando"
+        await asyncio.sleep(0.4)
+        stats = supervisor.stats()
+        assert stats["skipped_probes"] > 0 and stats["recycles"] == 0 and not primary.is_closed(), stats
+        primary.state = "ok"
+    await asyncio.sleep(0.2)
+    assert supervisor.primary is primary and supervisor.stats()["recycles"] == 0, supervisor.stats()
+    await supervisor.stop()
+    print(f"✅ Envio em andamento: {stats['skipped_probes']} sondagem(ns) pulada(s), nenhuma troca de aba")
+
+
+def main():
+    asyncio.run(run())
+    asyncio.run(run_lazy())
+    asyncio.run(run_session_lock())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+🗂️ Despachante de Envios do WhatsApp
+
+O WhatsApp Web só mantém UMA aba ativa por sessão: uma aba que clica em
+"Usar aqui" tira a sessão de todas as outras (inclusive da caixa de
+entrada). Por isso os envios saem pela aba ativa (a principal), sob a mesma
+trava que o atendimento da caixa de entrada usa, e são SERIAIS: um envio
+por vez, na ordem em que o agendador entregou (então mensagens para o mesmo
+chat saem na ordem em que chegaram). A prioridade entre pistas fica no
+agendador; aqui não há paralelismo a configurar.
+"""
+
+import asyncio
+
+
+class PageDispatcher:
+    """Envia as tarefas uma a uma pela aba ativa da sessão"""
+
+    def __init__(self, page_provider, send_fn, session_lock, backlog=1):
+        self.page_provider = page_provider  # page_provider() -> aba ativa atual
+        self.send_fn = send_fn  # async send_fn(page, task)
+        self.session_lock = session_lock  # asyncio.Lock da aba ativa (envio e caixa de entrada)
+        # Fila curta: o acúmulo fica no agendador, que decide a prioridade
+        self._queue = asyncio.Queue(maxsize=backlog)
+        self._inflight = None
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.create_task(self._send_loop())
+        print("🗂️ Despachante WhatsApp: envios em série pela aba ativa", flush=True)
+
+    async def submit(self, task):
+        """Entrega a tarefa ao despachante (espera se já há uma na fila)"""
+        await self._queue.put(task)
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "busy": self._inflight is not None}
+
+    async def stop(self):
+        """Para o despachante e devolve as tarefas que ainda não foram enviadas"""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+        # Tarefa interrompida no meio do envio volta na frente
+        leftovers = []
+        if self._inflight is not None:
+            leftovers.append(self._inflight)
+            self._inflight = None
+        while not self._queue.empty():
+            leftovers.append(self._queue.get_nowait())
+        return leftovers
+
+    async def _send_loop(self):
+        while True:
+            task = await self._queue.get()
+            self._inflight = task
+            try:
+                # Uma aba ativa por sessão: envios e atendimento da caixa de entrada se revezam nela
+                async with self.session_lock:
+                    await self.send_fn(self.page_provider(), task)
+            except Exception as e:
+                print(f"⚠️ Erro no envio para {task.get('customer_name')}: {e}", flush=True)
+            # Em caso de cancelamento, a tarefa fica em _inflight para o stop() devolver
+            self._inflight = None
+            self._queue.task_done()
@@ -0,0 +1,172 @@
+"""
+👂 Vigia da Caixa de Entrada do WhatsApp Web
+
+Um MutationObserver injetado na página acompanha a lista de conversas e, a
+cada mudança, avisa o Python (via expose_binding) quais chats estão com
+mensagens não lidas. Nada de varrer a lista a cada 30s nem recarregar o
+WhatsApp Web depois de responder.
+"""
+
+import asyncio
+
+from wa_steps import COMPOSE_SELECTOR
+
+BINDING_NAME = "__ninjaInboxEvent"
+
+# Item da lista de conversas e o badge de não lidas
+CHAT_CELL_SELECTOR = "div[data-testid='cell-frame-container']"
+UNREAD_BADGE_SELECTOR = "span[data-testid='unread-count']"
+
+# Aviso de número inválido ao abrir uma conversa por telefone
+INVALID_NUMBER_SELECTOR = "[data-testid='popup-controls-ok']"
+
+# Mensagens recebidas na conversa aberta
+INCOMING_TEXT_SELECTOR = "div.message-in span.selectable-text"
+
+WATCHER_JS = """
+(() => {
+    if (window.__ninjaInboxWatcher) return;
+    window.__ninjaInboxWatcher = true;
+
+    const CELL = "%(cell)s";
+    const BADGE = "%(badge)s";
+    const lastSeen = new Map();  // titulo -> assinatura (badge + prévia)
+    let timer = null;
+
+    const scan = () => {
+        timer = null;
+        const unreadNow = new Set();
+        document.querySelectorAll(CELL).forEach((cell) => {
+            const badge = cell.querySelector(BADGE);
+            const titleEl = cell.querySelector("span[title]");
+            if (!badge || !titleEl) return;
+            const title = titleEl.getAttribute("title");
+            if (!title) return;
+            unreadNow.add(title);
+            const signature = badge.innerText + "|" + cell.innerText.slice(-80);
+            if (lastSeen.get(title) === signature) return;
+            lastSeen.set(title, signature);
+            window.%(binding)s({title: title, unread: parseInt(badge.innerText, 10) || 1});
+        });
+        // Chats lidos saem do mapa: a próxima mensagem deles gera evento de novo
+        for (const title of Array.from(lastSeen.keys())) {
+            if (!unreadNow.has(title)) lastSeen.delete(title);
+        }
+    };
+
+    const schedule = () => { if (!timer) timer = setTimeout(scan, 250); };
+    const start = () => {
+        new MutationObserver(schedule).observe(document.body, {
+            childList: true, subtree: true, characterData: true
+        });
+        schedule();
+    };
+    if (document.body) start(); else document.addEventListener("DOMContentLoaded", start);
+})();
+""" % {"cell": CHAT_CELL_SELECTOR, "badge": UNREAD_BADGE_SELECTOR, "binding": BINDING_NAME}
+
+
+class InboxWatcher:
+    """Recebe os eventos de chats não lidos empurrados pela página e repassa ao sink"""
+
+    def __init__(self, page, sink):
+        self.page = page
+        self.sink = sink  # sink(event) roda no loop do Playwright
+        self._pending = set()  # títulos aguardando atendimento (evita processar o mesmo chat duas vezes)
+        self._closed = asyncio.Event()
+
+    async def start(self):
+        await self.page.expose_binding(BINDING_NAME, self._on_event)
+        # Reinjeta sozinho se a página recarregar; evaluate cobre o documento atual
+        await self.page.add_init_script(WATCHER_JS)
+        await self.page.evaluate(WATCHER_JS)
+        self.page.on("close", lambda _: self._closed.set())
+        self.page.on("crash", lambda _: self._closed.set())
+        print("👂 Vigia da caixa de entrada injetado (MutationObserver)", flush=True)
+
+    def _on_event(self, source, event):
+        title = (event or {}).get("title")
+        if not title or title in self._pending:
+            return
+        self._pending.add(title)
+        self.sink(event)
+
+    def done(self, title):
+        """Chat atendido: novas mensagens dele voltam a gerar eventos"""
+        self._pending.discard(title)
+
+    async def guard(self, awaitable):
+        """Aguarda o awaitable, mas falha se a aba da caixa de entrada fechar ou travar"""
+        task = asyncio.ensure_future(awaitable)
+        closed = asyncio.ensure_future(self._closed.wait())
+        done, _ = await asyncio.wait({task, closed}, return_when=asyncio.FIRST_COMPLETED)
+        closed.cancel()
+        if task in done:
+            return task.result()
+        task.cancel()
+        raise RuntimeError("Aba da caixa de entrada foi fechada ou travou")
+
+
+async def open_chat(page, title, timeout=10000):
+    """Abre a conversa pelo título na lista lateral (sem navegar)"""
+    cell = page.locator(CHAT_CELL_SELECTOR).filter(
+        has=page.locator(f"span[title={_css_string(title)}]")
+    ).first
+    await cell.click(timeout=timeout)
+    await page.wait_for_selector(COMPOSE_SELECTOR, timeout=timeout)
+
+
+# Link de conversa clicado dentro do app: o WhatsApp Web trata links wa.me/api.whatsapp.com por
+# dentro (preventDefault) e abre o chat sem recarregar. Se ninguém tratou, o clique é cancelado aqui
+# (ouvinte na window roda depois do React) e o chamador cai no /send/ com recarga.
+_JS_OPEN_PHONE_LINK = """(href) => {
+    let handled = false;
+    const after = (ev) => {
+        handled = ev.defaultPrevented;
+        ev.preventDefault();
+    };
+    window.addEventListener("click", after);
+    const a = document.createElement("a");
+    a.href = href;
+    a.style.display = "none";
+    (document.querySelector("#app") || document.body).appendChild(a);
+    try {
+        a.click();
+    } finally {
+        a.remove();
+        window.removeEventListener("click", after);
+    }
+    return handled;
+}"""
+
+
+async def open_phone_chat(page, phone, timeout=10000):
+    """Abre a conversa de um telefone dentro do app, sem recarregar a aba. False se o app não tratou o link"""
+    # Fecha a conversa aberta antes: senão o campo de texto dela "confirmaria" a abertura
+    await close_chat(page)
+    try:
+        await page.wait_for_selector(COMPOSE_SELECTOR, state="detached", timeout=timeout)
+    except Exception:
+        return False
+    if not await page.evaluate(_JS_OPEN_PHONE_LINK, f"https://api.whatsapp.com/send?phone={phone}"):
+        return False
+    # Chat aberto ou aviso de número inválido
+    await page.wait_for_selector(f"{COMPOSE_SELECTOR}, {INVALID_NUMBER_SELECTOR}", timeout=timeout)
+    return True
+
+
+async def close_chat(page):
+    """Fecha a conversa aberta (Esc) e volta para a lista, sem recarregar o app"""
+    await page.keyboard.press("Escape")
+
+
+async def read_last_incoming(page):
+    """Texto da última mensagem recebida na conversa aberta"""
+    items = await page.query_selector_all(INCOMING_TEXT_SELECTOR)
+    if not items:
+        return None
+    return await items[-1].inner_text()
+
+
+def _css_string(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
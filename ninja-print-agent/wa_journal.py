@@ -0,0 +1,157 @@
+"""
+📒 Diário da Fila do WhatsApp
+
+Toda mensagem é gravada num diário append-only (SQLite em modo WAL) antes de
+entrar na fila do Playwright. Se o agente cair ou o motor reiniciar, o que não
+foi confirmado é reenfileirado na próxima inicialização, desde que não tenha
+passado de max_age: um aviso de status horas depois mais confunde do que
+ajuda, então o que venceu é descartado no replay.
+
+Os commits são agrupados por uma thread de flush (group commit), então o
+fsync acontece uma vez por lote e não a cada mensagem.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+
+class MessageJournal:
+    """Diário durável das tarefas de envio do WhatsApp"""
+
+    def __init__(self, path, flush_interval=0.05, max_batch=64, max_attempts=3, compact_interval=300, max_age=None):
+        self.path = path
+        self.max_age = max_age  # segundos; None = sem limite
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self.compact_interval = compact_interval
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self._closed = False
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " created_at REAL NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " acked INTEGER NOT NULL DEFAULT 0)"  # 0 pendente, 1 confirmada, 2 descartada
+        )
+        self._flusher = threading.Thread(target=self._flush_loop, name="wa-journal-flush", daemon=True)
+        self._flusher.start()
+
+    def append(self, task):
+        """Grava a tarefa no diário e retorna o id da entrada"""
+        payload = json.dumps({k: v for k, v in task.items() if k != 'journal_id'}, ensure_ascii=False)
+        with self._lock:
+            self._begin()
+            cur = self._conn.execute(
+                "INSERT INTO jobs (created_at, payload) VALUES (?, ?)", (time.time(), payload)
+            )
+            self._mark_dirty()
+            return cur.lastrowid
+
+    def ack(self, entry_id):
+        """Confirma que a tarefa terminou (enviada ou descartada de vez)"""
+        if entry_id is None:
+            return
+        with self._lock:
+            self._begin()
+            self._conn.execute("UPDATE jobs SET acked = 1 WHERE id = ?", (entry_id,))
+            self._mark_dirty()
+
+    def fail(self, entry_id):
+        """Descarta a tarefa de vez (não será reenviada no replay)"""
+        if entry_id is None:
+            return
+        with self._lock:
+            self._begin()
+            self._conn.execute("UPDATE jobs SET acked = 2 WHERE id = ?", (entry_id,))
+            self._mark_dirty()
+
+    def replay(self):
+        """Retorna as tarefas pendentes (ordem de chegada) para reenfileirar na inicialização"""
+        with self._lock:
+            self._begin()
+            # Tarefas que já falharam demais são descartadas para não travar a fila para sempre
+            self._conn.execute(
+                "UPDATE jobs SET acked = 2 WHERE acked = 0 AND attempts >= ?", (self.max_attempts,)
+            )
+            expired = 0
+            if self.max_age is not None:
+                expired = self._conn.execute(
+                    "UPDATE jobs SET acked = 2 WHERE acked = 0 AND created_at < ?", (time.time() - self.max_age,)
+                ).rowcount
+            rows = self._conn.execute(
+                "SELECT id, payload FROM jobs WHERE acked = 0 ORDER BY id"
+            ).fetchall()
+            self._conn.execute("UPDATE jobs SET attempts = attempts + 1 WHERE acked = 0")
+            self._commit()
+
+        if expired:
+            print(f"🗑️ Diário WhatsApp: {expired} mensagem(ns) vencida(s) descartada(s) (mais de {self.max_age / 60:.0f} min)", flush=True)
+        tasks = []
+        for entry_id, payload in rows:
+            task = json.loads(payload)
+            task['journal_id'] = entry_id
+            tasks.append(task)
+        return tasks
+
+    def compact(self):
+        """Remove entradas confirmadas e trunca o arquivo WAL"""
+        with self._lock:
+            self._commit()
+            removed = self._conn.execute("DELETE FROM jobs WHERE acked <> 0").rowcount
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE acked = 0").fetchone()[0]
+
+    def flush(self):
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        self._closed = True
+        self._flusher.join(self.flush_interval * 4)
+        with self._lock:
+            self._commit()
+            self._conn.close()
+
+    # --- Internos (chamados com self._lock) ---
+
+    def _begin(self):
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+
+    def _commit(self):
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+        self._dirty = 0
+
+    def _mark_dirty(self):
+        self._dirty += 1
+        if self._dirty >= self.max_batch:
+            self._commit()
+
+    def _flush_loop(self):
+        last_compact = time.time()
+        while not self._closed:
+            time.sleep(self.flush_interval)
+            try:
+                with self._lock:
+                    if self._closed:
+                        break
+                    if self._dirty:
+                        self._commit()
+                if time.time() - last_compact >= self.compact_interval:
+                    last_compact = time.time()
+                    self.compact()
+            except Exception as e:
+                print(f"⚠️ Diário WhatsApp: erro no flush: {e}", flush=True)
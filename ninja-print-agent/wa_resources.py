@@ -0,0 +1,129 @@
+"""
+🪶 Política de Recursos do WhatsApp Web
+
+O agente só manda e lê texto, mas o WhatsApp Web baixa fotos de perfil,
+miniaturas de mídia, figurinhas e fontes o tempo todo. Nos PCs simples dos
+restaurantes isso vira memória e CPU do Chromium. Rotas no contexto inteiro
+(aba principal e reserva) cortam o que não é preciso para texto:
+
+- imagens: respondidas com um GIF 1x1 transparente (o layout não quebra e
+  o WhatsApp não fica tentando de novo);
+- fontes e mídia (áudio/vídeo): abortadas, o Chromium usa a fonte do sistema;
+- hosts de mídia (fotos de perfil, anexos): abortados mesmo quando vêm por
+  fetch/xhr, que não têm tipo "image".
+
+As rotas são estreitas (regex dos hosts de mídia e das extensões de
+imagem/fonte/mídia): só essas requisições passam pelo handler Python no
+pw_loop; JS, XHR e o websocket do WhatsApp nem são interceptados. Imagem sem
+extensão fora dos hosts de mídia escapa do filtro, e isso é aceito.
+
+Requisições servidas pelo service worker do WhatsApp podem não passar pela
+rota; o bench_wa_resources.py mede o efeito real (memória e carregamento).
+"""
+
+import base64
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+# GIF 1x1 transparente
+BLANK_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+DEFAULT_BLOCK_TYPES = ("image", "media", "font")
+# pps: fotos de perfil; mmg: anexos (imagens, áudios, figurinhas)
+DEFAULT_BLOCK_HOSTS = ("pps.whatsapp.net", "mmg.whatsapp.net")
+
+# Extensões que a rota intercepta para cada tipo bloqueado
+TYPE_EXTENSIONS = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "bmp"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "media": ("mp4", "webm", "ogg", "opus", "mp3", "m4a", "aac", "wav"),
+}
+
+
+def parse_list(value):
+    """'image, font' -> ('image', 'font'); vazio desliga"""
+    return tuple(item.strip().lower() for item in (value or "").split(",") if item.strip())
+
+
+class ResourcePolicy:
+    """Bloqueia/substitui recursos pesados em todas as abas de um contexto"""
+
+    def __init__(self, block_types=DEFAULT_BLOCK_TYPES, block_hosts=DEFAULT_BLOCK_HOSTS, allow_hosts=()):
+        self.block_types = frozenset(block_types)
+        self.block_hosts = tuple(block_hosts)
+        self.allow_hosts = tuple(allow_hosts)
+        self.counts = Counter()  # {"stub:image": n, "abort:font": n, "pass": n}
+        self._ext_kind = {
+            ext: kind for kind in self.block_types for ext in TYPE_EXTENSIONS.get(kind, ())
+        }
+
+    @property
+    def enabled(self):
+        return bool(self.block_types or self.block_hosts)
+
+    def patterns(self):
+        """Regex das URLs interceptadas (o resto nem chega ao Python)"""
+        patterns = []
+        if self.block_hosts:
+            hosts = "|".join(re.escape(h) for h in self.block_hosts)
+            patterns.append(re.compile(rf"^[a-z]+://([^/?#]*\.)?({hosts})(:\d+)?([/?#]|$)", re.IGNORECASE))
+        if self._ext_kind:
+            exts = "|".join(sorted(self._ext_kind))
+            patterns.append(re.compile(rf"^[^?#]*\.({exts})([?#]|$)", re.IGNORECASE))
+        return patterns
+
+    async def install(self, context):
+        if self.enabled:
+            for pattern in self.patterns():
+                await context.route(pattern, self.handle)
+            print(f"🪶 Filtro de recursos ativo: tipos {sorted(self.block_types)}, hosts {list(self.block_hosts)}", flush=True)
+
+    def kind(self, url, resource_type):
+        """Tipo bloqueado da requisição (pelo resource_type ou pela extensão) ou None"""
+        if resource_type in self.block_types:
+            return resource_type
+        path = urlsplit(url).path
+        ext = path.rsplit(".", 1)[-1].lower() if "." in path.rsplit("/", 1)[-1] else ""
+        return self._ext_kind.get(ext)
+
+    def decide(self, url, resource_type):
+        """'pass' | 'stub' | 'abort' para uma requisição"""
+        host = (urlsplit(url).hostname or "").lower()
+        if _host_matches(host, self.allow_hosts):
+            return "pass"
+        kind = self.kind(url, resource_type)
+        if kind:
+            return "stub" if kind == "image" else "abort"
+        if _host_matches(host, self.block_hosts):
+            return "abort"
+        return "pass"
+
+    async def handle(self, route):
+        request = route.request
+        action = self.decide(request.url, request.resource_type)
+        try:
+            if action == "stub":
+                await route.fulfill(status=200, content_type="image/gif", body=BLANK_GIF)
+            elif action == "abort":
+                await route.abort("blockedbyclient")
+            else:
+                await route.continue_()
+        except Exception:
+            # Aba fechou no meio da requisição: nada a fazer
+            return
+        self.counts["pass" if action == "pass" else f"{action}:{request.resource_type}"] += 1
+
+    def stats(self):
+        blocked = sum(n for key, n in self.counts.items() if key != "pass")
+        return {
+            "enabled": self.enabled,
+            "routes": len(self.patterns()) if self.enabled else 0,
+            "blocked": blocked,
+            "passed": self.counts["pass"],
+            "by_kind": dict(self.counts),
+        }
+
+
+def _host_matches(host, patterns):
+    return any(host == p or host.endswith("." + p) for p in patterns)
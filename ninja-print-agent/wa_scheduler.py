@@ -0,0 +1,116 @@
+"""
+⚖️ Agendador de Prioridades do WhatsApp
+
+Substitui a fila única por pistas separadas (status de pedido, auto-resposta,
+respostas por intenção). A retirada é por round-robin ponderado suave: uma
+rajada de /notify não mata as auto-respostas de fome, e uma varredura lenta
+da caixa de entrada não atrasa os avisos de status.
+
+Todas as operações rodam no loop do Playwright; de outras threads use
+loop.call_soon_threadsafe(scheduler.put_nowait, lane, item).
+"""
+
+import asyncio
+import time
+from collections import deque
+
+
+class LaneStats:
+    """Profundidade e tempo de espera de uma pista"""
+
+    def __init__(self):
+        self.enqueued = 0
+        self.dequeued = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_last = 0.0
+
+    def record_wait(self, seconds):
+        self.dequeued += 1
+        self.wait_total += seconds
+        self.wait_last = seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+
+class PriorityScheduler:
+    """Fila com pistas e retirada ponderada (smooth weighted round-robin)"""
+
+    def __init__(self, weights):
+        self.weights = dict(weights)
+        self._lanes = {lane: deque() for lane in self.weights}
+        self._current = {lane: 0 for lane in self.weights}
+        self._stats = {lane: LaneStats() for lane in self.weights}
+        self._not_empty = asyncio.Event()
+        # Tempo médio entre retiradas com fila acumulada (≈ tempo de um envio), para estimar o Retry-After
+        self._service_s = None
+        self._last_get = None
+        self._backlogged = False
+
+    def put_nowait(self, lane, item, front=False):
+        if lane not in self._lanes:
+            raise ValueError(f"Pista desconhecida: {lane}")
+        entry = (time.monotonic(), item)
+        if front:
+            self._lanes[lane].appendleft(entry)
+        else:
+            self._lanes[lane].append(entry)
+        self._stats[lane].enqueued += 1
+        self._not_empty.set()
+
+    async def get(self):
+        """Retorna (pista, item) respeitando os pesos entre as pistas com trabalho"""
+        while True:
+            ready = [lane for lane, q in self._lanes.items() if q]
+            if ready:
+                break
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        total = 0
+        for lane in ready:
+            self._current[lane] += self.weights[lane]
+            total += self.weights[lane]
+        lane = max(ready, key=lambda l: self._current[l])
+        self._current[lane] -= total
+
+        enqueued_at, item = self._lanes[lane].popleft()
+        now = time.monotonic()
+        self._stats[lane].record_wait(now - enqueued_at)
+        if self._backlogged and self._last_get is not None:
+            gap = now - self._last_get
+            self._service_s = gap if self._service_s is None else self._service_s * 0.8 + gap * 0.2
+        self._last_get = now
+        self._backlogged = self.qsize() > 0
+        return lane, item
+
+    def qsize(self):
+        return sum(len(q) for q in self._lanes.values())
+
+    def depth(self, lane):
+        """Itens aguardando numa pista (len de deque: seguro de ler de outra thread)"""
+        return len(self._lanes[lane])
+
+    def drain_eta(self, items, default_service_s=5.0):
+        """Segundos estimados para o agendador escoar `items` envios"""
+        return items * (self._service_s or default_service_s)
+
+    def stats(self):
+        now = time.monotonic()
+        result = {}
+        for lane, q in self._lanes.items():
+            st = self._stats[lane]
+            try:
+                oldest = q[0][0]
+            except IndexError:  # /status lê de outra thread; a pista pode ter esvaziado
+                oldest = None
+            result[lane] = {
+                "weight": self.weights[lane],
+                "depth": len(q),
+                "enqueued": st.enqueued,
+                "dequeued": st.dequeued,
+                "wait_avg_ms": round(st.wait_total / st.dequeued * 1000, 1) if st.dequeued else 0.0,
+                "wait_max_ms": round(st.wait_max * 1000, 1),
+                "wait_last_ms": round(st.wait_last * 1000, 1),
+                "oldest_wait_ms": round((now - oldest) * 1000, 1) if oldest is not None else 0.0,
+            }
+        return result
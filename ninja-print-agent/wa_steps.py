@@ -0,0 +1,229 @@
+"""
+⏱️ Etapas de Envio do WhatsApp Web (orientadas a eventos)
+
+Em vez de esperas fixas (sleep), cada etapa espera a condição do DOM que ela
+representa: campo de texto pronto, bolha de saída aparecendo e o tique de
+confirmação mudando. Cada etapa tem seu próprio timeout e a latência real é
+registrada pelo StepTimer.
+"""
+
+import time
+from collections import Counter
+
+# Campo de digitação da conversa aberta
+COMPOSE_SELECTOR = "footer div[contenteditable='true']"
+
+# Bolhas de mensagens enviadas por nós
+OUTGOING_SELECTOR = "div.message-out"
+
+# Timeouts por etapa (ms)
+STEP_TIMEOUTS = {
+    "compose": 10000,
+    "texto": 5000,
+    "bolha": 10000,
+    "ack": 20000,
+}
+
+_JS_COMPOSE_READY = """(sel) => {
+    const el = document.querySelector(sel);
+    return !!el && el.isConnected && el.offsetParent !== null && document.activeElement === el;
+}"""
+
+_JS_COMPOSE_HAS_TEXT = """(sel) => {
+    const el = document.querySelector(sel);
+    return !!el && el.innerText.trim().length > 0;
+}"""
+
+_JS_OUTGOING_COUNT = """(sel) => document.querySelectorAll(sel).length"""
+
+_JS_NEW_OUTGOING = """([sel, before]) => document.querySelectorAll(sel).length > before"""
+
+# Tique da última bolha deixa de ser o relógio (msg-time) e vira check/duplo check
+_JS_ACK_CHANGED = """(sel) => {
+    const bubbles = document.querySelectorAll(sel);
+    if (!bubbles.length) return false;
+    const last = bubbles[bubbles.length - 1];
+    return !!last.querySelector("[data-icon='msg-check'], [data-icon='msg-dblcheck'], [data-icon='msg-dblcheck-ack']");
+}"""
+
+
+class StepTimer:
+    """Mede a latência de cada etapa de um envio"""
+
+    def __init__(self, label):
+        self.label = label
+        self.steps = []  # [(etapa, ms, ok)]
+        self._start = time.perf_counter()
+
+    async def run(self, name, awaitable):
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            result = await awaitable
+            ok = True
+            return result
+        finally:
+            self.steps.append((name, (time.perf_counter() - t0) * 1000, ok))
+
+    def total_ms(self):
+        return (time.perf_counter() - self._start) * 1000
+
+    def as_dict(self):
+        return {name: round(ms, 1) for name, ms, _ in self.steps}
+
+    def report(self):
+        parts = " | ".join(f"{name} {ms:.0f}ms{'' if ok else ' ❌'}" for name, ms, ok in self.steps)
+        print(f"⏱️ {self.label}: {parts} | total {self.total_ms():.0f}ms", flush=True)
+
+
+async def focus_compose(page, timeout=None):
+    """Clica no campo de texto e espera ele estar visível e focado"""
+    timeout = timeout or STEP_TIMEOUTS["compose"]
+    await page.click(COMPOSE_SELECTOR, timeout=timeout)
+    await page.wait_for_function(_JS_COMPOSE_READY, arg=COMPOSE_SELECTOR, timeout=timeout)
+
+
+async def wait_compose_text(page, timeout=None):
+    """Espera o texto aparecer no campo de digitação"""
+    await page.wait_for_function(
+        _JS_COMPOSE_HAS_TEXT, arg=COMPOSE_SELECTOR, timeout=timeout or STEP_TIMEOUTS["texto"]
+    )
+
+
+async def compose_has_text(page):
+    return await page.evaluate(_JS_COMPOSE_HAS_TEXT, COMPOSE_SELECTOR)
+
+
+async def count_outgoing(page):
+    return await page.evaluate(_JS_OUTGOING_COUNT, OUTGOING_SELECTOR)
+
+
+async def wait_outgoing_bubble(page, before, timeout=None):
+    """Espera surgir uma nova bolha de saída (mensagem entrou na conversa)"""
+    await page.wait_for_function(
+        _JS_NEW_OUTGOING, arg=[OUTGOING_SELECTOR, before], timeout=timeout or STEP_TIMEOUTS["bolha"]
+    )
+
+
+async def wait_ack(page, timeout=None):
+    """Espera o tique da última mensagem sair do relógio (enviada ao servidor)"""
+    await page.wait_for_function(
+        _JS_ACK_CHANGED, arg=OUTGOING_SELECTOR, timeout=timeout or STEP_TIMEOUTS["ack"]
+    )
+
+
+# --- Inserção do Texto (caminho rápido primeiro, digitação só como fallback) ---
+
+_JS_COMPOSE_TEXT = """(sel) => {
+    const el = document.querySelector(sel);
+    return el ? el.innerText : "";
+}"""
+
+# Cola via evento de clipboard sintético (não depende da área de transferência do Windows)
+_JS_PASTE = """([sel, text]) => {
+    const el = document.querySelector(sel);
+    if (!el) return false;
+    el.focus();
+    const dt = new DataTransfer();
+    dt.setData('text/plain', text);
+    el.dispatchEvent(new ClipboardEvent('paste', {clipboardData: dt, bubbles: true, cancelable: true}));
+    return true;
+}"""
+
+# Quantas mensagens usaram cada estratégia desde que o agente subiu
+insert_strategy_stats = Counter()
+
+
+def _normalize(text):
+    return " ".join((text or "").split())
+
+
+async def _compose_matches(page, message):
+    return _normalize(await page.evaluate(_JS_COMPOSE_TEXT, COMPOSE_SELECTOR)) == _normalize(message)
+
+
+async def _clear_compose(page):
+    await page.click(COMPOSE_SELECTOR)
+    await page.keyboard.press("Control+A")
+    await page.keyboard.press("Backspace")
+
+
+async def _insert_text(page, message):
+    await page.keyboard.insert_text(message)
+
+
+async def _paste(page, message):
+    await page.evaluate(_JS_PASTE, [COMPOSE_SELECTOR, message])
+
+
+async def _type(page, message, delay=20):
+    # Enter envia a mensagem no WhatsApp: quebras de linha viram Shift+Enter
+    for i, line in enumerate(message.split("\n")):
+        if i:
+            await page.keyboard.press("Shift+Enter")
+        if line:
+            await page.keyboard.type(line, delay=delay)
+
+
+INSERT_STRATEGIES = [
+    ("insert_text", _insert_text),
+    ("colar", _paste),
+]
+
+
+async def insert_message(page, message, timer=None):
+    """Coloca a mensagem no campo (com o campo já focado) e retorna a estratégia usada"""
+    for name, strategy in INSERT_STRATEGIES:
+        try:
+            t0 = time.perf_counter()
+            await strategy(page, message)
+            ok = await _compose_matches(page, message)
+            if timer:
+                timer.steps.append((name, (time.perf_counter() - t0) * 1000, ok))
+            if ok:
+                insert_strategy_stats[name] += 1
+                return name
+        except Exception as e:
+            print(f"    ⚠️ Estratégia '{name}' falhou: {e}", flush=True)
+        await _clear_compose(page)
+
+    # Último recurso: digitação tecla a tecla
+    if timer:
+        await timer.run("digitacao", _type(page, message))
+    else:
+        await _type(page, message)
+    insert_strategy_stats["digitacao"] += 1
+    return "digitacao"
+
+
+# Seletores conhecidos do botão de enviar (em ordem de preferência)
+SEND_BUTTON_SELECTORS = [
+    "span[data-icon='send']",
+    "[data-testid='compose-btn-send']",
+    "button[aria-label='Enviar']",
+    "footer button",
+]
+
+
+async def click_send(page):
+    """Clica no botão de enviar (ou Enter como fallback) e retorna o que foi usado"""
+    for sel in SEND_BUTTON_SELECTORS:
+        btn = await page.query_selector(sel)
+        if btn:
+            await btn.click()
+            return sel
+    await page.keyboard.press("Enter")
+    return "Enter"
+
+
+async def send_and_confirm(page, timer):
+    """Envia o que está no campo e espera a bolha de saída e o tique mudar"""
+    before = await count_outgoing(page)
+    used = await timer.run("enviar", click_send(page))
+    await timer.run("bolha", wait_outgoing_bubble(page, before))
+    try:
+        await timer.run("ack", wait_ack(page))
+    except Exception:
+        # Mensagem já está na conversa (relógio): o próprio WhatsApp reenvia
+        print("    ⚠️ Tique de confirmação não mudou a tempo (mensagem ainda no relógio)", flush=True)
+    return used
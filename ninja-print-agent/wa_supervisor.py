@@ -0,0 +1,335 @@
+"""
+🩺 Supervisor da Aba Principal do WhatsApp Web
+
+Sonda a aba principal (a da caixa de entrada) em intervalos: responde ao
+evaluate? está logada? o heap JS está dentro do limite? Quando a aba falha
+algumas sondagens seguidas, trava ou fecha, só ELA é trocada, por uma aba
+reserva que já carregou o WhatsApp Web no mesmo contexto persistente. A
+troca é um clique em "Usar aqui", em vez de relançar o Chromium e esperar
+o WhatsApp carregar de novo. Se o próprio contexto cair, lost() avisa o
+motor, que aí sim relança o navegador.
+
+Aba principal mostrando "Usar aqui" perdeu a sessão (o monitor de conversas
+para): o supervisor clica para retomá-la e, se não der, conta como falha.
+A reserva é uma segunda instância inteira do WhatsApp Web; no modo "lazy"
+(padrão) ela só é aquecida quando a principal começa a falhar e é fechada
+quando a principal volta, para não pesar nos PCs simples.
+
+Envios e atendimento da caixa de entrada usam a principal sob a trava da
+sessão (session_lock). Uma aba no meio de um envio pode estar carregando de
+propósito: a sondagem é pulada enquanto a trava está ocupada, e sondagem e
+troca rodam segurando a trava, sem pisar em um envio em andamento.
+"""
+
+import asyncio
+import contextlib
+import time
+
+WHATSAPP_URL = "https://web.whatsapp.com"
+
+# Lista de conversas (logado) e QR Code (deslogado)
+CHAT_LIST_SELECTOR = "#pane-side"
+QR_SELECTOR = "canvas"
+
+_JS_PROBE = """([chats, qr, useHere]) => {
+    const heap = (performance.memory && performance.memory.usedJSHeapSize) || null;
+    return {
+        chats: !!document.querySelector(chats),
+        qr: !!document.querySelector(qr),
+        use_here: !!Array.from(document.querySelectorAll("div[role='dialog'] button"))
+            .find((b) => useHere.includes(b.innerText.trim())),
+        heap_mb: heap ? Math.round(heap / 1048576) : null,
+    };
+}"""
+
+# Textos do botão "Usar aqui" (o seletor :has-text do Playwright não existe no DOM)
+USE_HERE_TEXTS = ["Usar aqui", "Use here"]
+
+
+async def probe_page(page, timeout=5.0, max_heap_mb=None):
+    """Sonda uma aba: {state, ok, heap_mb, ms}. state: ok | deslogado | outra_aba | carregando | travada | memoria | fechada"""
+    if page is None or page.is_closed():
+        return {"state": "fechada", "ok": False, "heap_mb": None, "ms": None}
+    start = time.perf_counter()
+    try:
+        info = await asyncio.wait_for(
+            page.evaluate(_JS_PROBE, [CHAT_LIST_SELECTOR, QR_SELECTOR, USE_HERE_TEXTS]), timeout
+        )
+    except Exception:
+        return {"state": "travada", "ok": False, "heap_mb": None, "ms": round((time.perf_counter() - start) * 1000, 1)}
+    ms = round((time.perf_counter() - start) * 1000, 1)
+    heap = info.get("heap_mb")
+    if max_heap_mb and heap and heap > max_heap_mb:
+        state, ok = "memoria", False
+    elif info.get("use_here"):
+        # Sessão tomada por outra aba/navegador: esta aba não recebe mais nada
+        state, ok = "outra_aba", False
+    elif info.get("chats"):
+        state, ok = "ok", True
+    elif info.get("qr"):
+        # Trocar de aba não resolve: precisa escanear o QR Code
+        state, ok = "deslogado", True
+    else:
+        state, ok = "carregando", False
+    return {"state": state, "ok": ok, "heap_mb": heap, "ms": ms}
+
+
+class PageSupervisor:
+    """Sonda a aba principal e a troca pela reserva aquecida quando ela falha"""
+
+    def __init__(self, context, page, probe_interval=15.0, failures_to_recycle=2, max_heap_mb=1024,
+                 standby="lazy", load_timeout=180.0, probe_timeout=5.0, activate_timeout=10.0, session_lock=None):
+        self.context = context
+        self.session_lock = session_lock  # asyncio.Lock dos envios/caixa de entrada na aba principal
+        self.primary = page
+        self.probe_interval = probe_interval
+        self.failures_to_recycle = max(1, failures_to_recycle)
+        self.max_heap_mb = max_heap_mb
+        # standby: True (reserva sempre aquecida) | "lazy" (só enquanto a principal falha) | False
+        self.standby_enabled = bool(standby)
+        self.standby_lazy = standby == "lazy"
+        self.load_timeout = load_timeout
+        self.probe_timeout = probe_timeout
+        self.activate_timeout = activate_timeout
+        self.standby = None
+        self._standby_task = None
+        self._probe_task = None
+        self._failures = 0
+        self._swapped = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._recycling = asyncio.Lock()
+        self.last_probe = None
+        self.recycles = 0
+        self.cold_reloads = 0
+        self.reclaims = 0
+        self.skipped_probes = 0
+        self.last_recovery_ms = None
+        self.last_reason = None
+
+    # --- Ciclo de vida ---
+
+    async def start(self):
+        self.context.on("close", lambda _: self._mark_lost())
+        self._watch(self.primary)
+        self._warm_standby()
+        self._probe_task = asyncio.create_task(self._probe_loop())
+        print(f"🩺 Supervisor da aba principal ativo (sonda a cada {self.probe_interval:g}s)", flush=True)
+
+    async def stop(self):
+        for task in (self._probe_task, self._standby_task):
+            if task:
+                task.cancel()
+        await asyncio.gather(*[t for t in (self._probe_task, self._standby_task) if t], return_exceptions=True)
+        await self._close(self.standby)
+        self.standby = None
+
+    def lost(self):
+        """O contexto (navegador) caiu: só relançando"""
+        return self._lost.is_set()
+
+    async def replacement(self, old_page, timeout=None):
+        """Espera a aba que substitui old_page (None se o contexto caiu ou não houve troca a tempo)"""
+        timeout = timeout if timeout is not None else self.activate_timeout + self.probe_timeout
+        deadline = time.monotonic() + timeout
+        while self.primary is old_page and not self._lost.is_set():
+            self._swapped.clear()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._swapped.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+        return None if self._lost.is_set() else self.primary
+
+    def stats(self):
+        return {
+            "primary": self.last_probe,
+            "standby_ready": self.standby is not None and not self.standby.is_closed(),
+            "standby_mode": "lazy" if self.standby_lazy else ("sempre" if self.standby_enabled else "desligada"),
+            "recycles": self.recycles,
+            "reclaims": self.reclaims,
+            "skipped_probes": self.skipped_probes,
+            "cold_reloads": self.cold_reloads,
+            "last_recovery_ms": self.last_recovery_ms,
+            "last_reason": self.last_reason,
+            "context_lost": self._lost.is_set(),
+        }
+
+    # --- Sondagem ---
+
+    async def _probe_loop(self):
+        while not self._lost.is_set():
+            await asyncio.sleep(self.probe_interval)
+            if self.session_lock is not None and self.session_lock.locked():
+                # Envio ou atendimento em andamento na principal: não sonda nem conta falha agora
+                self.skipped_probes += 1
+                continue
+            async with self._session():
+                result = await probe_page(self.primary, self.probe_timeout, self.max_heap_mb)
+                if result["state"] == "outra_aba" and await self._reclaim(self.primary):
+                    result = await probe_page(self.primary, self.probe_timeout, self.max_heap_mb)
+                self.last_probe = result
+                if not result["ok"]:
+                    self._failures += 1
+                    print(f"🩺 Aba principal: {result['state']} ({self._failures}/{self.failures_to_recycle})", flush=True)
+                    self._warm_standby(force=True)
+                    # Fechada ou estourando memória não melhora esperando
+                    if self._failures >= self.failures_to_recycle or result["state"] in ("fechada", "memoria"):
+                        await self._recycle(result["state"], self.primary)
+            if result["ok"]:
+                self._failures = 0
+                if self.standby_lazy:
+                    # Principal saudável: a reserva só ocuparia memória
+                    await self._release_standby()
+
+            # A reserva também precisa estar viva para valer alguma coisa
+            if self.standby is not None:
+                standby = await probe_page(self.standby, self.probe_timeout, self.max_heap_mb)
+                if standby["state"] in ("fechada", "travada", "memoria"):
+                    print(f"🩺 Aba reserva {standby['state']}, aquecendo outra...", flush=True)
+                    await self._close(self.standby)
+                    self.standby = None
+            if self.standby is None:
+                self._warm_standby(force=self._failures > 0)
+
+    async def recycle(self, reason, page=None):
+        """Troca só a aba principal: pela reserva, se pronta; senão recarrega a própria aba"""
+        # Espera o envio/atendimento em andamento largar a aba antes de trocá-la
+        async with self._session():
+            await self._recycle(reason, page)
+
+    async def _recycle(self, reason, page=None):
+        async with self._recycling:
+            # Outro gatilho já trocou a aba que falhou
+            if self._lost.is_set() or (page is not None and self.primary is not page):
+                return
+            start = time.perf_counter()
+            old = self.primary
+            standby, self.standby = self.standby, None
+            new = None
+            if standby is not None and await self._activate(standby):
+                new = standby
+            else:
+                await self._close(standby)
+                new = await self._cold_page(old, reuse=reason != "fechada")
+                self.cold_reloads += 1
+            if new is None:
+                return
+            self.primary = new
+            self._failures = 0
+            self.recycles += 1
+            self.last_reason = reason
+            self.last_recovery_ms = round((time.perf_counter() - start) * 1000, 1)
+            self._swapped.set()
+            if old is not new:
+                self._watch(new)
+                await self._close(old)
+            print(f"♻️ Aba principal trocada ({reason}) em {self.last_recovery_ms:.0f} ms", flush=True)
+            self._warm_standby()
+
+    # --- Internos ---
+
+    def _session(self):
+        return self.session_lock if self.session_lock is not None else contextlib.nullcontext()
+
+    def _watch(self, page):
+        """Aba principal fechou/travou: troca na hora, sem esperar a próxima sondagem"""
+        def on_down(_):
+            if self.primary is page and not self._lost.is_set():
+                asyncio.ensure_future(self.recycle("fechada", page))
+        page.on("close", on_down)
+        page.on("crash", on_down)
+
+    def _warm_standby(self, force=False):
+        """Aquece a reserva em segundo plano (no modo lazy, só com force: a principal está falhando)"""
+        if not self.standby_enabled or self._lost.is_set() or (self.standby_lazy and not force):
+            return
+        if self._standby_task is not None and not self._standby_task.done():
+            return
+        self._standby_task = asyncio.create_task(self._load_standby())
+
+    async def _load_standby(self):
+        page = None
+        try:
+            page = await self.context.new_page()
+            await page.goto(WHATSAPP_URL, wait_until="domcontentloaded", timeout=self.load_timeout * 1000)
+            # O WhatsApp abre a reserva no aviso "Usar aqui": app carregado, sessão ainda na principal
+            await page.wait_for_selector(
+                f"{CHAT_LIST_SELECTOR}, {QR_SELECTOR}, div[role='dialog'] button", timeout=self.load_timeout * 1000
+            )
+            self.standby = page
+            print("🔥 Aba reserva do WhatsApp aquecida", flush=True)
+        except asyncio.CancelledError:
+            await self._close(page)
+            raise
+        except Exception as e:
+            await self._close(page)
+            if not self._lost.is_set():
+                print(f"⚠️ Não foi possível aquecer a aba reserva: {e}", flush=True)
+
+    async def _release_standby(self):
+        if self._standby_task is not None and not self._standby_task.done():
+            self._standby_task.cancel()
+            await asyncio.gather(self._standby_task, return_exceptions=True)
+        if self.standby is not None:
+            standby, self.standby = self.standby, None
+            await self._close(standby)
+            print("🧊 Aba principal saudável: aba reserva fechada", flush=True)
+
+    async def _reclaim(self, page):
+        """A principal perdeu a sessão para outra aba: clica "Usar aqui" nela mesma"""
+        try:
+            await _click_use_here(page)
+            await page.wait_for_selector(f"{CHAT_LIST_SELECTOR}, {QR_SELECTOR}", timeout=self.activate_timeout * 1000)
+        except Exception as e:
+            print(f"⚠️ Não foi possível retomar a sessão na aba principal: {e}", flush=True)
+            return False
+        self.reclaims += 1
+        print("🩺 Sessão estava em outra aba: retomada na aba principal", flush=True)
+        return True
+
+    async def _activate(self, page):
+        """Traz a sessão para a aba reserva (clica "Usar aqui" se preciso) e confirma a lista de conversas"""
+        try:
+            result = await probe_page(page, self.probe_timeout)
+            if result["state"] == "outra_aba":
+                await _click_use_here(page)
+            await page.wait_for_selector(f"{CHAT_LIST_SELECTOR}, {QR_SELECTOR}", timeout=self.activate_timeout * 1000)
+            await page.bring_to_front()
+            return True
+        except Exception as e:
+            print(f"⚠️ Aba reserva não assumiu a sessão: {e}", flush=True)
+            return False
+
+    async def _cold_page(self, old, reuse=True):
+        """Sem reserva: recarrega a aba antiga ou, se ela fechou/quebrou, abre outra"""
+        try:
+            page = old if reuse and old is not None and not old.is_closed() else await self.context.new_page()
+            await page.goto(WHATSAPP_URL, wait_until="domcontentloaded", timeout=self.load_timeout * 1000)
+            await page.wait_for_selector(f"{CHAT_LIST_SELECTOR}, {QR_SELECTOR}", timeout=self.load_timeout * 1000)
+            return page
+        except Exception as e:
+            print(f"❌ Não foi possível recuperar a aba principal: {e}", flush=True)
+            # Nem uma aba nova sobe: trata como contexto perdido e deixa o motor relançar
+            self._mark_lost()
+            return None
+
+    def _mark_lost(self):
+        self._lost.set()
+        self._swapped.set()
+
+    async def _close(self, page):
+        if page is not None and not page.is_closed():
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+
+async def _click_use_here(page):
+    await page.evaluate(
+        """(texts) => Array.from(document.querySelectorAll("div[role='dialog'] button"))
+            .find((b) => texts.includes(b.innerText.trim())).click()""",
+        USE_HERE_TEXTS,
+    )
@@ -0,0 +1,107 @@
+"""
+🏊 Pool de Trabalho Limitado (com contrapressão)
+
+Número fixo de threads e fila com profundidade máxima. Quando a fila enche,
+try_submit() recusa na hora em vez de criar mais threads, e o chamador
+responde 429 + Retry-After. stats() expõe threads, ativos e fila para o
+/status.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BoundedExecutor:
+    """ThreadPoolExecutor com fila limitada e métricas"""
+
+    def __init__(self, max_workers=4, max_queue=100, name="pool"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0  # na fila + executando
+        self._active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._avg_ms = 0.0  # média móvel do tempo de execução
+        self._threads = set()  # idents das threads que já rodaram tarefas (o executor não encerra threads ociosas)
+
+    def try_submit(self, fn, *args, **kwargs):
+        """Agenda fn. Retorna False (sem bloquear) se a fila estiver cheia"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self._pending += 1
+            self.submitted += 1
+        try:
+            self._executor.submit(self._run, fn, args, kwargs)
+        except RuntimeError:
+            # Pool já encerrado
+            self._finish(time.perf_counter(), ok=False, started=False)
+            return False
+        return True
+
+    def pending(self):
+        """Tarefas na fila + executando"""
+        with self._lock:
+            return self._pending
+
+    def retry_after(self):
+        """Estimativa (s) de quando haverá vaga: fila / threads x tempo médio, mínimo 1"""
+        with self._lock:
+            backlog = max(self._pending - self.max_workers + 1, 1)
+            avg = self._avg_ms or 1000.0
+        return max(1, int(round(backlog / self.max_workers * avg / 1000)))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threads": len(self._threads),
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._pending - self._active,
+                "max_queue": self.max_queue,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_ms": round(self._avg_ms, 1),
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    # --- Internos ---
+
+    def _run(self, fn, args, kwargs):
+        start = time.perf_counter()
+        with self._lock:
+            self._active += 1
+            self._threads.add(threading.get_ident())
+        ok = False
+        try:
+            fn(*args, **kwargs)
+            ok = True
+        except Exception as e:
+            print(f"⚠️ Erro em tarefa do pool: {e}", flush=True)
+        finally:
+            self._finish(start, ok)
+
+    def _finish(self, start, ok, started=True):
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._pending -= 1
+            if started:
+                self._active -= 1
+                self._avg_ms = elapsed if not self._avg_ms else self._avg_ms * 0.8 + elapsed * 0.2
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+        self._slots.release()
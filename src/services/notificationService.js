@@ -1,6 +1,7 @@
 import { logger } from "../utils/logger";
 
 const AGENT_URL = 'http://localhost:5001';
+const MAX_BUSY_RETRIES = 2;
 
 /**
  * Serviço para enviar notificações via Agente Local (NinjaTalk AI)
@@ -23,22 +24,33 @@ export const notificationService = {
     try {
       logger.log(`🤖 NinjaTalk: Solicitando notificação para ${order.customerName} - Status: ${status}`);
       
-      const response = await fetch(`${AGENT_URL}/notify`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          status: status,
-          customer_name: order.customerName,
-          phone: phone,
-          order_id: order.id,
-          numero_pedido: order.numero_pedido,
-          codigo_entrega: order.codigo_entrega,
-          estimated_time: estimatedTime // Novo campo para transparência
-        }),
+      const body = JSON.stringify({
+        status: status,
+        customer_name: order.customerName,
+        phone: phone,
+        order_id: order.id,
+        numero_pedido: order.numero_pedido,
+        codigo_entrega: order.codigo_entrega,
+        estimated_time: estimatedTime // Novo campo para transparência
       });
 
+      let response;
+      for (let attempt = 0; attempt <= MAX_BUSY_RETRIES; attempt++) {
+        response = await fetch(`${AGENT_URL}/notify`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body,
+        });
+
+        // 🚦 Agente com a fila cheia: espera o Retry-After e tenta de novo
+        if (response.status !== 429 || attempt === MAX_BUSY_RETRIES) break;
+        const retryAfter = Number(response.headers.get('Retry-After')) || 1;
+        logger.log(`🚦 Agente ocupado, nova tentativa em ${retryAfter}s...`);
+        await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+      }
+
       if (!response.ok) {
         throw new Error('Falha ao comunicar com o Agente Ninja');
       }
@@ -326,6 +326,71 @@ const sendToPrinter = async (content, settings = {}) => {
   });
 };
 
+// Envia várias comandas ao Agente Ninja em UMA requisição (um único documento no spooler)
+const sendBatchToAgent = async (contents, settings = {}) => {
+  const printerName = settings.printerName || printSettings.printerName;
+
+  try {
+    const response = await fetch('http://localhost:5001/print/batch', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        tickets: contents,
+        printer_name: printerName === 'Impressora Padrão' ? null : printerName
+      })
+    });
+
+    if (response.ok) {
+      const data = await response.json();
+      if (data.success) {
+        logger.log(`✅ Lote de ${contents.length} comandas enviado ao Agente Ninja!`);
+        return { success: true, message: `Lote impresso via Agente Ninja na ${printerName}` };
+      }
+    }
+    logger.log('⚠️ Agente Ninja recusou o lote, imprimindo comanda por comanda...');
+  } catch (err) {
+    logger.log('ℹ️ Agente Ninja não detectado para impressão em lote, imprimindo comanda por comanda.');
+  }
+  return { success: false };
+};
+
+// Envia o pedido estruturado para o Agente Ninja renderizar em ESC/POS (acentos na página de código da térmica)
+const sendOrderToAgent = async (order, isReprint, settings = {}, bairroCidade = '') => {
+  const printerName = settings.printerName || printSettings.printerName;
+
+  try {
+    const response = await fetch('http://localhost:5001/print', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        order,
+        ticket: {
+          template: settings.selectedTemplate || 'complete',
+          paper_width: settings.paperWidth || printSettings.paperWidth,
+          company: settings.companyInfo || {},
+          bairro_cidade: bairroCidade,
+          reprint: isReprint,
+          show_logo: settings.showLogo !== false,
+          autocut: settings.autocut !== false
+        },
+        printer_name: printerName === 'Impressora Padrão' ? null : printerName
+      })
+    });
+
+    if (response.ok) {
+      const data = await response.json();
+      if (data.success) {
+        logger.log('✅ Comanda renderizada e impressa pelo Agente Ninja!');
+        return { success: true, message: `Impresso via Agente Ninja na ${printerName}` };
+      }
+    }
+    logger.log('⚠️ Agente Ninja não renderizou o pedido, enviando texto pronto...');
+  } catch (err) {
+    logger.log('ℹ️ Agente Ninja não detectado para renderização, usando texto pronto.');
+  }
+  return { success: false };
+};
+
 // Função auxiliar para escapar HTML
 const escapeHtml = (text) => {
   const div = document.createElement('div');
@@ -348,8 +413,9 @@ export const printService = {
       // Gerar conteúdo da comanda
       const ticketContent = generateTicketContent(order, false, settings, bairroCidade);
       
-      // Enviar para impressora
-      const printResult = await sendToPrinter(ticketContent, settings);
+      // Enviar para impressora (Agente renderiza o pedido; texto pronto como fallback)
+      const agentResult = await sendOrderToAgent(order, false, settings, bairroCidade);
+      const printResult = agentResult.success ? agentResult : await sendToPrinter(ticketContent, settings);
       
       // Registrar no histórico
       const historyEntry = addToPrintHistory(
@@ -397,8 +463,9 @@ export const printService = {
       // Gerar conteúdo da comanda com flag de reimpressão
       const ticketContent = generateTicketContent(order, true, settings, bairroCidade);
       
-      // Enviar para impressora
-      const printResult = await sendToPrinter(ticketContent, settings);
+      // Enviar para impressora (Agente renderiza o pedido; texto pronto como fallback)
+      const agentResult = await sendOrderToAgent(order, true, settings, bairroCidade);
+      const printResult = agentResult.success ? agentResult : await sendToPrinter(ticketContent, settings);
       
       // Registrar no histórico
       const historyEntry = addToPrintHistory(
@@ -486,8 +553,21 @@ export const printService = {
       const results = [];
       let successCount = 0;
       
-      // Imprimir cada comanda
-      for (const order of orders) {
+      // Tentativa via Agente Ninja: todas as comandas em um único envio
+      const bairroCidade = await atualizarConfiguracoesRestaurante();
+      const settings = { ...printSettings, ...options };
+      const contents = orders.map(order => generateTicketContent(order, false, settings, bairroCidade));
+      const batchResult = await sendBatchToAgent(contents, settings);
+      
+      if (batchResult.success) {
+        orders.forEach((order, i) => {
+          results.push({ success: true, message: batchResult.message, ticketContent: contents[i] });
+        });
+        successCount = orders.length;
+      }
+      
+      // Fallback: imprimir cada comanda
+      for (const order of (batchResult.success ? [] : orders)) {
         try {
           const result = await printService.printOrderTicket(order, options);
           results.push(result);